@@ -0,0 +1,252 @@
+"""
+Latency of `GET /api/v2/project/{project_id}/latest-job/` as a function of the
+workflow length.
+
+For each workflow length, a workflow is created through the API and every
+workflow task gets a `HistoryRun` with `NUM_IMAGES` images, written directly
+into the database through the same helpers used by the runner. The script
+also counts the SQL statements issued by each request.
+
+Run (from the `benchmarks` folder, with the same environment variables used
+for `populate_db/populate_db_script.py`):
+
+```bash
+uv run --frozen python latest_job_bench.py
+```
+"""
+
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy import insert
+
+import fractal_server
+from fractal_server.app.db import DB
+from fractal_server.app.db import get_sync_db
+from fractal_server.app.models.v2 import HistoryRun
+from fractal_server.app.models.v2 import HistoryUnit
+from fractal_server.app.models.v2 import JobV2
+from fractal_server.app.schemas.v2 import DatasetCreate
+from fractal_server.app.schemas.v2 import DatasetDump
+from fractal_server.app.schemas.v2 import DatasetRead
+from fractal_server.app.schemas.v2 import HistoryUnitStatus
+from fractal_server.app.schemas.v2 import JobStatusType
+from fractal_server.app.schemas.v2 import ProjectCreate
+from fractal_server.app.schemas.v2 import ProjectDump
+from fractal_server.app.schemas.v2 import ProjectRead
+from fractal_server.app.schemas.v2 import TaskCreate
+from fractal_server.app.schemas.v2 import WorkflowCreate
+from fractal_server.app.schemas.v2 import WorkflowDump
+from fractal_server.app.schemas.v2 import WorkflowRead
+from fractal_server.app.schemas.v2 import WorkflowTaskCreate
+from fractal_server.images.status_tools import set_latest_history_run_no_commit
+from fractal_server.runner.v2.db_tools import bulk_upsert_image_cache_fast
+
+sys.path.append(Path(fractal_server.__file__).parents[1].as_posix())
+
+from scripts.client import FractalClient  # noqa: E402
+
+WORKFLOW_LENGTHS = [5, 20, 50]
+NUM_IMAGES = 1_000
+N_REQUESTS = 25
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(
+            DB.engine_async().sync_engine,
+            "before_cursor_execute",
+            self._increment,
+        )
+
+    def _increment(self, *args, **kwargs):
+        self.count += 1
+
+
+def _add_history(
+    *,
+    job_id: int,
+    dataset_id: int,
+    wftask_ids: list[int],
+    task_id: int,
+) -> None:
+    """
+    Add a `HistoryRun` with one `HistoryUnit` per image for each workflow
+    task, and mark every tenth unit as failed and with warnings.
+    """
+    with next(get_sync_db()) as db:
+        for wftask_id in wftask_ids:
+            history_run = HistoryRun(
+                dataset_id=dataset_id,
+                workflowtask_id=wftask_id,
+                job_id=job_id,
+                task_id=task_id,
+                workflowtask_dump={},
+                task_group_dump={},
+                num_available_images=NUM_IMAGES,
+                status=HistoryUnitStatus.DONE,
+            )
+            db.add(history_run)
+            db.flush()
+            set_latest_history_run_no_commit(
+                dataset_id=dataset_id,
+                workflowtask_id=wftask_id,
+                history_run_id=history_run.id,
+                db=db,
+            )
+            zarr_urls = [f"/zarr/{ind:06d}" for ind in range(NUM_IMAGES)]
+            res = db.execute(
+                insert(HistoryUnit).returning(HistoryUnit.id),
+                [
+                    dict(
+                        history_run_id=history_run.id,
+                        logfile=f"/log/{ind:06d}.log",
+                        status=(
+                            HistoryUnitStatus.FAILED
+                            if ind % 10 == 0
+                            else HistoryUnitStatus.DONE
+                        ),
+                        has_warnings=(ind % 10 == 0),
+                        zarr_urls=[zarr_url],
+                    )
+                    for ind, zarr_url in enumerate(zarr_urls)
+                ],
+            )
+            history_unit_ids = res.scalars().all()
+            db.commit()
+            bulk_upsert_image_cache_fast(
+                list_upsert_objects=[
+                    dict(
+                        zarr_url=zarr_url,
+                        dataset_id=dataset_id,
+                        workflowtask_id=wftask_id,
+                        latest_history_unit_id=history_unit_id,
+                    )
+                    for zarr_url, history_unit_id in zip(
+                        zarr_urls, history_unit_ids
+                    )
+                ],
+                db=db,
+            )
+
+
+def _add_job(
+    *,
+    project: ProjectRead,
+    dataset: DatasetRead,
+    workflow: WorkflowRead,
+    last_task_index: int,
+) -> int:
+    with next(get_sync_db()) as db:
+        job = JobV2(
+            project_id=project.id,
+            dataset_id=dataset.id,
+            workflow_id=workflow.id,
+            user_email="admin@example.org",
+            project_dump=ProjectDump(
+                id=project.id,
+                name=project.name,
+                timestamp_created=project.timestamp_created.isoformat(),
+            ).model_dump(),
+            dataset_dump=DatasetDump(
+                id=dataset.id,
+                name=dataset.name,
+                project_id=project.id,
+                timestamp_created=dataset.timestamp_created.isoformat(),
+                zarr_dir=dataset.zarr_dir,
+            ).model_dump(),
+            workflow_dump=WorkflowDump(
+                id=workflow.id,
+                name=workflow.name,
+                project_id=project.id,
+                timestamp_created=workflow.timestamp_created.isoformat(),
+            ).model_dump(),
+            first_task_index=0,
+            last_task_index=last_task_index,
+            status=JobStatusType.DONE,
+        )
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def run_benchmark() -> list[dict]:
+    client = FractalClient()
+    counter = StatementCounter()
+    name = f"latest-job-bench-{int(time.time())}"
+    task_id = client.add_task(
+        TaskCreate(
+            name=name,
+            command_non_parallel="echo",
+            command_parallel="echo",
+            version="0",
+        )
+    ).id
+    project = client.add_project(ProjectCreate(name=name))
+    dataset = client.add_dataset(project.id, DatasetCreate(name=name))
+
+    results = []
+    for num_tasks in WORKFLOW_LENGTHS:
+        workflow = client.add_workflow(
+            project.id, WorkflowCreate(name=f"{name}-{num_tasks}")
+        )
+        wftask_ids = [
+            client.add_workflowtask(
+                project.id, workflow.id, WorkflowTaskCreate(task_id=task_id)
+            ).id
+            for _ in range(num_tasks)
+        ]
+        job_id = _add_job(
+            project=project,
+            dataset=dataset,
+            workflow=workflow,
+            last_task_index=num_tasks - 1,
+        )
+        _add_history(
+            job_id=job_id,
+            dataset_id=dataset.id,
+            wftask_ids=wftask_ids,
+            task_id=task_id,
+        )
+
+        endpoint = (
+            f"api/v2/project/{project.id}/latest-job/"
+            f"?workflow_id={workflow.id}&dataset_id={dataset.id}"
+        )
+        times_ms = []
+        num_statements = []
+        for _ in range(N_REQUESTS):
+            counter.count = 0
+            t_start = time.perf_counter()
+            res = client.make_request(endpoint=endpoint)
+            times_ms.append((time.perf_counter() - t_start) * 1000)
+            num_statements.append(counter.count)
+            if not res.is_success:
+                sys.exit(f"GET {endpoint} failed: {res.status_code} {res.text}")
+        results.append(
+            dict(
+                num_tasks=num_tasks,
+                num_images=NUM_IMAGES,
+                median_ms=round(statistics.median(times_ms), 1),
+                mean_ms=round(statistics.mean(times_ms), 1),
+                num_statements=max(num_statements),
+            )
+        )
+    return results
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    print(f"{'tasks':>6} {'median (ms)':>12} {'mean (ms)':>10} {'SQL':>5}")
+    for row in results:
+        print(
+            f"{row['num_tasks']:>6} {row['median_ms']:>12} "
+            f"{row['mean_ms']:>10} {row['num_statements']:>5}"
+        )
+    with open("latest_job_bench.json", "w") as f:
+        json.dump(results, f, indent=2)
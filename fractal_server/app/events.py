@@ -0,0 +1,309 @@
+"""
+Dataset events, sent through Postgres `LISTEN/NOTIFY`.
+
+Writers (the runner and some API endpoints) emit a notification on
+`EVENTS_CHANNEL` within the same transaction as the write, so that it is
+only delivered upon commit. Every server process holds a single listening
+connection (see `EventBroker`), and forwards notifications to the
+subscribers of the corresponding dataset (e.g. the clients of the
+`/events/` endpoint).
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from typing import Any
+
+import psycopg
+from sqlalchemy import Text
+from sqlalchemy import cast
+from sqlalchemy import literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlmodel import func
+from sqlmodel import select
+
+from fractal_server.app.models.v2 import HistoryRun
+from fractal_server.app.models.v2 import HistoryStatusSummary
+from fractal_server.app.models.v2 import HistoryUnit
+from fractal_server.config import get_db_settings
+from fractal_server.logger import set_logger
+from fractal_server.syringe import Inject
+
+EVENTS_CHANNEL = "fractal_dataset_events"
+_RECONNECT_INTERVAL = 5.0
+_LISTEN_TIMEOUT = 10.0
+_SUBSCRIBER_QUEUE_SIZE = 1_000
+_SUMMARY_COUNTER_COLUMNS = [
+    "num_submitted_images",
+    "num_done_images",
+    "num_failed_images",
+    "num_images_with_warnings",
+    "num_units_with_warnings",
+]
+
+logger = set_logger(__name__)
+
+
+class DatasetEventType(StrEnum):
+    """
+    Types of dataset events
+
+    Attributes:
+        JOB: A job was created or its status changed.
+        HISTORY_RUN: A history run was created or its status changed.
+        HISTORY_UNITS: The status or image counters of some history units
+            changed (the payload includes the updated counters of the
+            corresponding `HistoryStatusSummary`).
+    """
+
+    JOB = "job"
+    HISTORY_RUN = "history_run"
+    HISTORY_UNITS = "history_units"
+
+
+def _prepare_notify_statement(
+    *,
+    dataset_id: int,
+    event_type: DatasetEventType,
+    data: dict[str, Any],
+):
+    payload = dict(type=event_type, dataset_id=dataset_id, **data)
+    return select(func.pg_notify(EVENTS_CHANNEL, json.dumps(payload)))
+
+
+def notify_dataset_event_no_commit(
+    *,
+    dataset_id: int,
+    event_type: DatasetEventType,
+    data: dict[str, Any],
+    db: Session,
+) -> None:
+    """
+    Emit a dataset event, to be delivered when the transaction is committed.
+
+    Args:
+        dataset_id: The dataset ID
+        event_type: The event type
+        data: Additional (JSON-serializable) event data.
+        db: A sync db session
+    """
+    db.execute(
+        _prepare_notify_statement(
+            dataset_id=dataset_id, event_type=event_type, data=data
+        )
+    )
+
+
+async def notify_dataset_event_async_no_commit(
+    *,
+    dataset_id: int,
+    event_type: DatasetEventType,
+    data: dict[str, Any],
+    db: AsyncSession,
+) -> None:
+    """
+    Emit a dataset event, to be delivered when the transaction is committed.
+
+    Args:
+        dataset_id: The dataset ID
+        event_type: The event type
+        data: Additional (JSON-serializable) event data.
+        db: An async db session
+    """
+    await db.execute(
+        _prepare_notify_statement(
+            dataset_id=dataset_id, event_type=event_type, data=data
+        )
+    )
+
+
+def notify_history_units_no_commit(
+    *,
+    history_unit_ids: list[int],
+    db: Session,
+) -> None:
+    """
+    Emit a `HISTORY_UNITS` event for each history run of some history units.
+
+    The payload includes the current counters of the `HistoryStatusSummary`
+    row of the run (if any), so that it must be emitted after updating the
+    summary within the same transaction. Note that Postgres drops duplicate
+    notifications within a transaction, so that repeated calls for the same
+    run (and with unchanged counters) only deliver a single event.
+
+    Args:
+        history_unit_ids:
+        db: A sync db session
+    """
+    payload = func.json_build_object(
+        literal("type"),
+        literal(DatasetEventType.HISTORY_UNITS.value),
+        literal("dataset_id"),
+        HistoryRun.dataset_id,
+        literal("workflowtask_id"),
+        HistoryRun.workflowtask_id,
+        literal("history_run_id"),
+        HistoryRun.id,
+        *(
+            item
+            for column in _SUMMARY_COUNTER_COLUMNS
+            for item in (
+                literal(column),
+                getattr(HistoryStatusSummary, column),
+            )
+        ),
+    )
+    db.execute(
+        select(func.pg_notify(EVENTS_CHANNEL, cast(payload, Text)))
+        .select_from(HistoryRun)
+        .outerjoin(
+            HistoryStatusSummary,
+            (HistoryStatusSummary.dataset_id == HistoryRun.dataset_id)
+            & (
+                HistoryStatusSummary.workflowtask_id
+                == HistoryRun.workflowtask_id
+            ),
+        )
+        .where(
+            HistoryRun.id.in_(
+                select(HistoryUnit.history_run_id)
+                .where(HistoryUnit.id.in_(history_unit_ids))
+                .distinct()
+            )
+        )
+    )
+
+
+class EventBrokerUnavailableError(RuntimeError):
+    """
+    The listening connection could not be established in time.
+    """
+
+
+class EventBroker:
+    """
+    Per-process dispatcher of dataset events.
+
+    A single connection (opened upon the first subscription) listens on
+    `EVENTS_CHANNEL`, and each notification is put in the queues of the
+    subscribers of its dataset. Events for slow subscribers (whose queue is
+    full) are dropped.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+        self._listener: asyncio.Task | None = None
+        self._listening = asyncio.Event()
+
+    @asynccontextmanager
+    async def subscribe(self, dataset_id: int) -> AsyncIterator[asyncio.Queue]:
+        """
+        Subscribe to the events of a dataset.
+
+        Args:
+            dataset_id: The dataset ID
+
+        Yields:
+            A queue that receives the payloads of the dataset events, from
+            the moment the listening connection is active.
+
+        Raises:
+            EventBrokerUnavailableError:
+                If the listening connection is not active within
+                `_LISTEN_TIMEOUT` seconds.
+        """
+        queue = asyncio.Queue(maxsize=_SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(dataset_id, set()).add(queue)
+        try:
+            await self.start()
+            yield queue
+        finally:
+            queues = self._subscribers[dataset_id]
+            queues.discard(queue)
+            if not queues:
+                self._subscribers.pop(dataset_id)
+
+    async def start(self) -> None:
+        """
+        Open the listening connection (if needed) and wait until it is active.
+
+        Raises:
+            EventBrokerUnavailableError:
+                If the listening connection is not active within
+                `_LISTEN_TIMEOUT` seconds.
+        """
+        if (
+            self._listener is None
+            or self._listener.done()
+            or self._listener.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._listening = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(
+                self._listening.wait(), timeout=_LISTEN_TIMEOUT
+            )
+        except TimeoutError:
+            raise EventBrokerUnavailableError(
+                f"Could not listen on '{EVENTS_CHANNEL}' within "
+                f"{_LISTEN_TIMEOUT} s."
+            )
+
+    async def close(self) -> None:
+        """
+        Stop the listening connection, if any.
+        """
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self._listening.clear()
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            queues = self._subscribers.get(event["dataset_id"], set())
+        except (json.JSONDecodeError, KeyError, TypeError):
+            logger.warning(f"Invalid event payload: {payload}")
+            return
+        for queue in queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning(
+                    f"Dropping event for dataset {event['dataset_id']}."
+                )
+
+    async def _listen(self) -> None:
+        db_settings = Inject(get_db_settings)
+        conninfo = db_settings.DATABASE_URL.set(
+            drivername="postgresql"
+        ).render_as_string(hide_password=False)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    conninfo,
+                    autocommit=True,
+                    connect_timeout=int(_LISTEN_TIMEOUT),
+                ) as conn:
+                    await conn.execute(f"LISTEN {EVENTS_CHANNEL}")
+                    logger.debug(f"Listening on '{EVENTS_CHANNEL}'.")
+                    self._listening.set()
+                    async for notify in conn.notifies():
+                        self._dispatch(notify.payload)
+            except psycopg.Error as e:
+                self._listening.clear()
+                logger.warning(
+                    f"Lost connection for '{EVENTS_CHANNEL}', reconnecting "
+                    f"in {_RECONNECT_INTERVAL} s. Original error: {str(e)}"
+                )
+                await asyncio.sleep(_RECONNECT_INTERVAL)
+
+
+event_broker = EventBroker()
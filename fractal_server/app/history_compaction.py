@@ -0,0 +1,210 @@
+"""
+Retention policy for history units.
+
+Each run of a task creates one `HistoryUnit` per image (or per group of
+images), and any later run of the same task on the same dataset supersedes
+the previous ones. Compacting a superseded run means deleting its history
+units that are not the latest unit of any image (i.e. that are not
+referenced by `HistoryImageCache`), after adding their counts to the
+`num_compacted_*` counters of the run. `HistoryRun` rows are never deleted,
+so that the run list of a workflow task keeps the same runs and counts.
+"""
+
+import asyncio
+from datetime import datetime
+from datetime import timedelta
+
+from sqlalchemy import Select
+from sqlalchemy import Update
+from sqlalchemy import delete
+from sqlalchemy import exists
+from sqlalchemy import func
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from fractal_server.app.db import get_sync_db
+from fractal_server.app.models.v2 import HistoryImageCache
+from fractal_server.app.models.v2 import HistoryRun
+from fractal_server.app.models.v2 import HistoryStatusSummary
+from fractal_server.app.models.v2 import HistoryUnit
+from fractal_server.app.schemas.v2 import HistoryUnitStatus
+from fractal_server.logger import set_logger
+from fractal_server.utils import get_timestamp
+
+_BATCH_SIZE = 100
+# Arbitrary key of the advisory lock held by the ongoing compaction
+_ADVISORY_LOCK_KEY = 7_281_054_913
+
+logger = set_logger(__name__)
+
+
+def _prepare_superseded_runs_statement(
+    *,
+    timestamp_threshold: datetime,
+    min_id: int,
+    batch_size: int,
+) -> Select:
+    """
+    Select the IDs of runs that can be compacted.
+
+    A run can be compacted if it is over, if it started before
+    `timestamp_threshold`, and if it is not the latest run of its
+    dataset/workflow-task pair.
+    """
+    latest_run_ids = select(HistoryStatusSummary.latest_history_run_id).where(
+        HistoryStatusSummary.latest_history_run_id.is_not(None)
+    )
+    return (
+        select(HistoryRun.id)
+        .where(HistoryRun.id > min_id)
+        .where(HistoryRun.status != HistoryUnitStatus.SUBMITTED)
+        .where(HistoryRun.timestamp_started < timestamp_threshold)
+        .where(HistoryRun.id.not_in(latest_run_ids))
+        .order_by(HistoryRun.id)
+        .limit(batch_size)
+    )
+
+
+def _prepare_compaction_statement(history_run_ids: list[int]) -> Update:
+    """
+    Delete the unreferenced units of some runs and add their counts to the
+    runs, within a single statement.
+
+    The statement returns the ID of each compacted run, together with its
+    number of deleted units.
+    """
+    deleted_units = (
+        delete(HistoryUnit)
+        .where(HistoryUnit.history_run_id.in_(history_run_ids))
+        .where(
+            ~exists().where(
+                HistoryImageCache.latest_history_unit_id == HistoryUnit.id
+            )
+        )
+        .returning(
+            HistoryUnit.history_run_id,
+            HistoryUnit.status,
+            HistoryUnit.has_warnings,
+        )
+        .cte("deleted_units")
+    )
+    counters = {
+        **{
+            f"num_compacted_{unit_status}_units": func.count().filter(
+                deleted_units.c.status == unit_status
+            )
+            for unit_status in HistoryUnitStatus
+        },
+        "num_compacted_units_with_warnings": func.count().filter(
+            deleted_units.c.has_warnings.is_(True)
+        ),
+    }
+    counts = (
+        select(
+            deleted_units.c.history_run_id,
+            func.count().label("num_units"),
+            *(value.label(column) for column, value in counters.items()),
+        )
+        .group_by(deleted_units.c.history_run_id)
+        .subquery()
+    )
+    return (
+        update(HistoryRun)
+        .where(HistoryRun.id == counts.c.history_run_id)
+        .values(
+            {
+                column: getattr(HistoryRun, column) + counts.c[column]
+                for column in counters
+            }
+        )
+        .returning(HistoryRun.id, counts.c.num_units)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def compact_history_runs(
+    *,
+    older_than_days: int,
+    db: Session,
+    batch_size: int = _BATCH_SIZE,
+) -> int:
+    """
+    Compact the superseded runs that started more than `older_than_days`
+    days ago.
+
+    Runs are processed in batches of `batch_size`, with a commit per batch.
+    The compaction stops as soon as another one is found to be ongoing
+    (e.g. in a different server process).
+
+    Args:
+        older_than_days: Only compact runs older than this number of days.
+        db: A sync db session
+        batch_size: Number of runs per transaction.
+
+    Returns:
+        The number of deleted history units.
+    """
+    timestamp_threshold = get_timestamp() - timedelta(days=older_than_days)
+    num_runs = 0
+    num_units = 0
+    min_id = 0
+    while True:
+        if not db.execute(
+            select(func.pg_try_advisory_xact_lock(_ADVISORY_LOCK_KEY))
+        ).scalar_one():
+            logger.info("Another history compaction is ongoing, skip.")
+            db.rollback()
+            break
+        history_run_ids = (
+            db.execute(
+                _prepare_superseded_runs_statement(
+                    timestamp_threshold=timestamp_threshold,
+                    min_id=min_id,
+                    batch_size=batch_size,
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not history_run_ids:
+            db.commit()
+            break
+        res = db.execute(_prepare_compaction_statement(history_run_ids)).all()
+        db.commit()
+        num_runs += len(res)
+        num_units += sum(num_run_units for _, num_run_units in res)
+        min_id = history_run_ids[-1]
+    logger.info(
+        f"Compacted {num_runs} history runs "
+        f"(deleted {num_units} history units)."
+    )
+    return num_units
+
+
+async def compact_history_runs_periodically(
+    *,
+    older_than_days: int,
+    interval: float,
+) -> None:
+    """
+    Run `compact_history_runs` every `interval` seconds, in a thread.
+
+    Errors are logged and do not stop the loop, which only ends when the
+    corresponding task is cancelled.
+
+    Args:
+        older_than_days: Only compact runs older than this number of days.
+        interval: Waiting time between compactions, in seconds.
+    """
+
+    def _compact() -> None:
+        with next(get_sync_db()) as db:
+            compact_history_runs(older_than_days=older_than_days, db=db)
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_compact)
+        except Exception as e:
+            logger.error(f"History compaction failed. Original error: {e}")
@@ -6,9 +6,13 @@ from fractal_server.app.models.linkuserproject import LinkUserProjectV2
 
 from .accounting import AccountingRecord
 from .accounting import AccountingRecordSlurm
+from .dataset import DatasetAttributeFacet
+from .dataset import DatasetImage
+from .dataset import DatasetTypeFacet
 from .dataset import DatasetV2
 from .history import HistoryImageCache
 from .history import HistoryRun
+from .history import HistoryStatusSummary
 from .history import HistoryUnit
 from .job import JobV2
 from .profile import Profile
@@ -26,6 +30,9 @@ __all__ = [
     "AccountingRecordSlurm",
     "LinkUserProjectV2",
     "DatasetV2",
+    "DatasetImage",
+    "DatasetAttributeFacet",
+    "DatasetTypeFacet",
     "JobV2",
     "ProjectV2",
     "TaskGroupV2",
@@ -37,6 +44,7 @@ __all__ = [
     "HistoryRun",
     "HistoryUnit",
     "HistoryImageCache",
+    "HistoryStatusSummary",
     "Resource",
     "Profile",
 ]
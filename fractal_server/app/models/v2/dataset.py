@@ -3,6 +3,9 @@ from typing import Any
 
 from pydantic import ConfigDict
 from sqlalchemy import Column
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import DateTime
 from sqlmodel import BOOLEAN
@@ -36,6 +39,14 @@ class DatasetV2(SQLModel, table=True):
             nullable=False,
         ),
     )
+    images_version: int = Field(
+        default=0,
+        sa_column=Column(
+            Integer,
+            server_default="0",
+            nullable=False,
+        ),
+    )
 
     timestamp_created: datetime = Field(
         default_factory=get_timestamp,
@@ -43,10 +54,90 @@ class DatasetV2(SQLModel, table=True):
     )
 
     zarr_dir: str
-    images: list[dict[str, Any]] = Field(
-        sa_column=Column(JSONB, server_default="[]", nullable=False)
+
+
+class DatasetImage(SQLModel, table=True):
+    """
+    DatasetImage table.
+
+    Each row is a single image of a dataset. The image-list order of a dataset
+    corresponds to the order of the `id` column.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    id: int | None = Field(default=None, primary_key=True)
+    dataset_id: int = Field(foreign_key="datasetv2.id", ondelete="CASCADE")
+
+    # The "C" collation sorts `zarr_url`s in code-point order (as in Python),
+    # independently of the database default
+    zarr_url: str = Field(
+        sa_column=Column(String(collation="C"), nullable=False)
+    )
+    origin: str | None = None
+    attributes: dict[str, Any] = Field(
+        sa_column=Column(JSONB, server_default="{}", nullable=False)
+    )
+    types: dict[str, bool] = Field(
+        sa_column=Column(JSONB, server_default="{}", nullable=False)
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_datasetimage_dataset_id_zarr_url_unique_constraint",
+            "dataset_id",
+            "zarr_url",
+            unique=True,
+        ),
+        Index(
+            "ix_datasetimage_attributes",
+            "attributes",
+            postgresql_using="gin",
+            postgresql_ops={"attributes": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_datasetimage_types",
+            "types",
+            postgresql_using="gin",
+            postgresql_ops={"types": "jsonb_path_ops"},
+        ),
+    )
+
+
+class DatasetAttributeFacet(SQLModel, table=True):
+    """
+    DatasetAttributeFacet table.
+
+    Each row counts the images of a dataset which have a given value for a
+    given attribute. Rows are kept up to date together with `DatasetImage`,
+    and removed when their count drops to zero.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    dataset_id: int = Field(
+        primary_key=True,
+        foreign_key="datasetv2.id",
+        ondelete="CASCADE",
     )
+    key: str = Field(primary_key=True)
+    value: Any = Field(sa_column=Column(JSONB, primary_key=True))
+    num_images: int
 
-    @property
-    def image_zarr_urls(self) -> list[str]:
-        return [image["zarr_url"] for image in self.images]
+
+class DatasetTypeFacet(SQLModel, table=True):
+    """
+    DatasetTypeFacet table.
+
+    Each row counts the images of a dataset which have a given type key
+    (with any value). Rows are kept up to date together with `DatasetImage`,
+    and removed when their count drops to zero.
+    """
+
+    dataset_id: int = Field(
+        primary_key=True,
+        foreign_key="datasetv2.id",
+        ondelete="CASCADE",
+    )
+    key: str = Field(primary_key=True)
+    num_images: int
@@ -3,6 +3,7 @@ from typing import Any
 
 from pydantic import ConfigDict
 from sqlalchemy import Column
+from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import JSONB
@@ -16,6 +17,9 @@ from fractal_server.utils import get_timestamp
 class HistoryRun(SQLModel, table=True):
     """
     HistoryRun table.
+
+    The `num_compacted_*` counters hold the counts of the history units of
+    this run which were deleted by `compact_history_runs`.
     """
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -47,6 +51,23 @@ class HistoryRun(SQLModel, table=True):
     status: str
     num_available_images: int
 
+    num_compacted_submitted_units: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+    num_compacted_done_units: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+    num_compacted_failed_units: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+    num_compacted_units_with_warnings: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+
 
 class HistoryUnit(SQLModel, table=True):
     """
@@ -62,6 +83,10 @@ class HistoryUnit(SQLModel, table=True):
 
     logfile: str
     has_warnings: bool = False
+    warning_lines: list[str] = Field(
+        sa_column=Column(ARRAY(String), nullable=False, server_default="{}"),
+        default_factory=list,
+    )
     status: str
     zarr_urls: list[str] = Field(
         sa_column=Column(ARRAY(String)),
@@ -93,3 +118,57 @@ class HistoryImageCache(SQLModel, table=True):
         ondelete="CASCADE",
         index=True,
     )
+
+
+class HistoryStatusSummary(SQLModel, table=True):
+    """
+    HistoryStatusSummary table.
+
+    Status counters for a dataset/workflow-task pair. They are kept up to
+    date together with `HistoryImageCache`, `HistoryUnit` and `HistoryRun`,
+    see `fractal_server.images.status_tools`. The `version` column is
+    incremented at every update of a row, so that readers can detect changes
+    of the image statuses without loading them.
+    """
+
+    dataset_id: int = Field(
+        primary_key=True,
+        foreign_key="datasetv2.id",
+        ondelete="CASCADE",
+    )
+    workflowtask_id: int = Field(
+        primary_key=True,
+        foreign_key="workflowtaskv2.id",
+        ondelete="CASCADE",
+        index=True,
+    )
+    latest_history_run_id: int | None = Field(
+        default=None,
+        foreign_key="historyrun.id",
+        ondelete="SET NULL",
+    )
+
+    num_submitted_images: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+    num_done_images: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+    num_failed_images: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+    num_images_with_warnings: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+    num_units_with_warnings: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
+    version: int = Field(
+        default=0,
+        sa_column=Column(Integer, server_default="0", nullable=False),
+    )
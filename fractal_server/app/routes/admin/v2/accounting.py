@@ -16,8 +16,8 @@ from fractal_server.app.models.v2 import AccountingRecordSlurm
 from fractal_server.app.routes.auth import current_superuser_act
 from fractal_server.app.routes.pagination import PaginationRequest
 from fractal_server.app.routes.pagination import PaginationResponse
+from fractal_server.app.routes.pagination import get_keyset_pagination_params
 from fractal_server.app.routes.pagination import get_paginated_response
-from fractal_server.app.routes.pagination import get_pagination_params
 from fractal_server.app.schemas.v2 import AccountingRecordRead
 
 
@@ -39,7 +39,7 @@ router = APIRouter()
 async def query_accounting(
     query: AccountingQuery,
     # Dependencies
-    pagination: PaginationRequest = Depends(get_pagination_params),
+    pagination: PaginationRequest = Depends(get_keyset_pagination_params),
     superuser: UserOAuth = Depends(current_superuser_act),
     db: AsyncSession = Depends(get_async_db),
 ) -> PaginationResponse[AccountingRecord]:
@@ -64,6 +64,7 @@ async def query_accounting(
         stm_count=stm_count,
         pagination=pagination,
         db=db,
+        id_column=AccountingRecord.id,
     )
     return paginated_response
 
@@ -10,9 +10,12 @@ from pydantic import EmailStr
 from pydantic.types import AwareDatetime
 from sqlalchemy import func
 from sqlmodel import select
+from sqlmodel import update
 
 from fractal_server.app.db import AsyncSession
 from fractal_server.app.db import get_async_db
+from fractal_server.app.events import DatasetEventType
+from fractal_server.app.events import notify_dataset_event_async_no_commit
 from fractal_server.app.models import LinkUserProjectV2
 from fractal_server.app.models import UserOAuth
 from fractal_server.app.models.v2 import HistoryRun
@@ -27,12 +30,18 @@ from fractal_server.app.routes.aux._job import _write_shutdown_file_or_422
 from fractal_server.app.routes.aux._runner import _check_shutdown_is_supported
 from fractal_server.app.routes.pagination import PaginationRequest
 from fractal_server.app.routes.pagination import PaginationResponse
+from fractal_server.app.routes.pagination import get_keyset_pagination_params
 from fractal_server.app.routes.pagination import get_paginated_response
-from fractal_server.app.routes.pagination import get_pagination_params
 from fractal_server.app.schemas.v2 import HistoryUnitStatus
 from fractal_server.app.schemas.v2 import JobRead
 from fractal_server.app.schemas.v2 import JobStatusType
 from fractal_server.app.schemas.v2 import JobUpdate
+from fractal_server.images.status_tools import (
+    add_history_run_to_summary_async_no_commit,
+)
+from fractal_server.images.status_tools import (
+    subtract_history_run_from_summary_async_no_commit,
+)
 from fractal_server.runner.filenames import WORKFLOW_LOG_FILENAME
 from fractal_server.utils import get_timestamp
 from fractal_server.zip_tools import _zip_folder_to_byte_stream_iterator
@@ -55,7 +64,7 @@ async def view_job(
     end_timestamp_min: AwareDatetime | None = None,
     end_timestamp_max: AwareDatetime | None = None,
     log: bool = True,
-    pagination: PaginationRequest = Depends(get_pagination_params),
+    pagination: PaginationRequest = Depends(get_keyset_pagination_params),
     user: UserOAuth = Depends(current_superuser_act),
     db: AsyncSession = Depends(get_async_db),
 ) -> PaginationResponse[JobV2]:
@@ -81,6 +90,9 @@ async def view_job(
             before `end_timestamp_min`.
         log: If `True`, include `job.log`, if `False`
             `job.log` is set to `None`.
+        pagination: With keyset pagination (i.e. if `last_id` is set), jobs
+            are sorted by increasing ID rather than by decreasing
+            `start_timestamp`.
     """
 
     # Prepare statements
@@ -146,7 +158,11 @@ async def view_job(
         stm_count = stm_count.where(JobV2.end_timestamp <= end_timestamp_max)
 
     response = await get_paginated_response(
-        stm=stm, stm_count=stm_count, pagination=pagination, db=db
+        stm=stm,
+        stm_count=stm_count,
+        pagination=pagination,
+        db=db,
+        id_column=JobV2.id,
     )
 
     if not log:
@@ -230,14 +246,34 @@ async def update_job(
     latest_run = res.scalar_one_or_none()
     if latest_run is not None:
         setattr(latest_run, "status", HistoryUnitStatus.FAILED)
-        res = await db.execute(
-            select(HistoryUnit).where(
-                HistoryUnit.history_run_id == latest_run.id
-            )
+        await subtract_history_run_from_summary_async_no_commit(
+            history_run_id=latest_run.id, db=db
+        )
+        await db.execute(
+            update(HistoryUnit)
+            .where(HistoryUnit.history_run_id == latest_run.id)
+            .values(status=HistoryUnitStatus.FAILED)
+        )
+        await add_history_run_to_summary_async_no_commit(
+            history_run_id=latest_run.id, db=db
+        )
+        await notify_dataset_event_async_no_commit(
+            dataset_id=latest_run.dataset_id,
+            event_type=DatasetEventType.HISTORY_RUN,
+            data=dict(
+                workflowtask_id=latest_run.workflowtask_id,
+                history_run_id=latest_run.id,
+                status=latest_run.status,
+            ),
+            db=db,
+        )
+    if job.dataset_id is not None:
+        await notify_dataset_event_async_no_commit(
+            dataset_id=job.dataset_id,
+            event_type=DatasetEventType.JOB,
+            data=dict(job_id=job.id, status=job.status),
+            db=db,
         )
-        history_units = res.scalars().all()
-        for history_unit in history_units:
-            setattr(history_unit, "status", HistoryUnitStatus.FAILED)
 
     await db.commit()
     await db.refresh(job)
@@ -8,6 +8,7 @@ from fractal_server.config import get_settings
 from fractal_server.syringe import Inject
 
 from .dataset import router as dataset_router
+from .events import router as events_router
 from .history import router as history_router
 from .images import router as images_routes
 from .job import router as job_router
@@ -39,6 +40,7 @@ router_api.include_router(sharing_router, tags=["Project Sharing"])
 router_api.include_router(project_router, tags=["Project"])
 router_api.include_router(submit_job_router, tags=["Job"])
 router_api.include_router(history_router, tags=["History"])
+router_api.include_router(events_router, tags=["Events"])
 
 
 settings = Inject(get_settings)
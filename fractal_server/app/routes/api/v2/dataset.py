@@ -3,6 +3,7 @@ from typing import Sequence
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import HTTPException
 from fastapi import Response
 from fastapi import status
@@ -13,11 +14,15 @@ from fractal_server.app.db import AsyncSession
 from fractal_server.app.db import get_async_db
 from fractal_server.app.models import UserOAuth
 from fractal_server.app.models.linkuserproject import LinkUserProjectV2
+from fractal_server.app.models.v2 import DatasetImage
 from fractal_server.app.models.v2 import DatasetV2
 from fractal_server.app.models.v2 import JobV2
 from fractal_server.app.models.v2.project import ProjectV2
 from fractal_server.app.routes.auth import get_api_guest
 from fractal_server.app.routes.auth import get_api_user
+from fractal_server.app.routes.etag import etag_matches
+from fractal_server.app.routes.etag import get_etag
+from fractal_server.app.routes.etag import get_not_modified_response
 from fractal_server.app.routes.pagination import PaginationRequest
 from fractal_server.app.routes.pagination import PaginationResponse
 from fractal_server.app.routes.pagination import get_pagination_data
@@ -29,6 +34,8 @@ from fractal_server.app.schemas.v2 import DatasetUpdate
 from fractal_server.app.schemas.v2.dataset import DatasetExport
 from fractal_server.app.schemas.v2.dataset import DatasetImport
 from fractal_server.app.schemas.v2.sharing import ProjectPermissions
+from fractal_server.images.db_tools import get_dataset_images_async
+from fractal_server.images.db_tools import update_dataset_facets_async_no_commit
 from fractal_server.string_tools import sanitize_string
 from fractal_server.urls import normalize_url
 from fractal_server.urls import url_is_relative_to
@@ -291,9 +298,11 @@ async def delete_dataset(
 async def export_dataset(
     project_id: int,
     dataset_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     user: UserOAuth = Depends(get_api_guest),
     db: AsyncSession = Depends(get_async_db),
-) -> DatasetV2:
+) -> DatasetExport:
     """
     Export an existing dataset
     """
@@ -306,7 +315,24 @@ async def export_dataset(
     )
     dataset = dict_dataset_project["dataset"]
 
-    return dataset
+    etag = get_etag(
+        dataset.id,
+        dataset.timestamp_created,
+        dataset.images_version,
+        dataset.name,
+        dataset.zarr_dir,
+    )
+    if etag_matches(if_none_match=if_none_match, etag=etag):
+        return get_not_modified_response(etag)
+    response.headers["ETag"] = etag
+
+    images = await get_dataset_images_async(dataset_id=dataset_id, db=db)
+
+    return DatasetExport(
+        name=dataset.name,
+        zarr_dir=dataset.zarr_dir,
+        images=images,
+    )
 
 
 @router.post(
@@ -347,9 +373,22 @@ async def import_dataset(
     # Create new Dataset
     db_dataset = DatasetV2(
         project_id=project_id,
-        **dataset.model_dump(exclude_none=True),
+        **dataset.model_dump(exclude_none=True, exclude={"images"}),
     )
     db.add(db_dataset)
+    await db.flush()
+    db.add_all(
+        [
+            DatasetImage(dataset_id=db_dataset.id, **image.model_dump())
+            for image in dataset.images
+        ]
+    )
+    await update_dataset_facets_async_no_commit(
+        dataset_id=db_dataset.id,
+        old_images=[],
+        new_images=[image.model_dump() for image in dataset.images],
+        db=db,
+    )
     await db.commit()
     await db.refresh(db_dataset)
 
@@ -381,7 +420,12 @@ async def get_all_datasets(
                 .scalar_subquery()
                 .correlate(DatasetV2)
             ),
-            func.jsonb_array_length(DatasetV2.images),
+            (
+                select(func.count(DatasetImage.id))
+                .where(DatasetImage.dataset_id == DatasetV2.id)
+                .scalar_subquery()
+                .correlate(DatasetV2)
+            ),
         )
         .join(ProjectV2, DatasetV2.project_id == ProjectV2.id)
         .join(LinkUserProjectV2, LinkUserProjectV2.project_id == ProjectV2.id)
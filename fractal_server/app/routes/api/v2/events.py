@@ -0,0 +1,91 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Request
+from fastapi import status
+from fastapi.responses import StreamingResponse
+
+from fractal_server.app.db import AsyncSession
+from fractal_server.app.db import get_async_db
+from fractal_server.app.events import EventBrokerUnavailableError
+from fractal_server.app.events import event_broker
+from fractal_server.app.models import UserOAuth
+from fractal_server.app.routes.auth import get_api_guest
+from fractal_server.app.schemas.v2.sharing import ProjectPermissions
+
+from ._aux_functions import _get_dataset_check_access
+
+router = APIRouter()
+
+SSE_KEEPALIVE_INTERVAL = 15.0
+
+
+async def _stream_dataset_events(
+    *,
+    dataset_id: int,
+    request: Request,
+) -> AsyncIterator[str]:
+    """
+    Yield the events of a dataset, in the server-sent-events format.
+
+    A `ready` event is sent once the subscription is active (clients should
+    refresh their state upon receiving it), and a comment is sent after
+    `SSE_KEEPALIVE_INTERVAL` seconds without events.
+    """
+    async with event_broker.subscribe(dataset_id) as queue:
+        yield "event: ready\ndata: {}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=SSE_KEEPALIVE_INTERVAL
+                )
+            except TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get(
+    "/project/{project_id}/dataset/{dataset_id}/events/",
+    response_class=StreamingResponse,
+)
+async def stream_dataset_events(
+    project_id: int,
+    dataset_id: int,
+    request: Request,
+    user: UserOAuth = Depends(get_api_guest),
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    Stream job, history-run and history-unit events of a dataset
+    """
+    await _get_dataset_check_access(
+        project_id=project_id,
+        dataset_id=dataset_id,
+        user_id=user.id,
+        required_permissions=ProjectPermissions.READ,
+        db=db,
+    )
+    # The db session is not needed while streaming
+    await db.close()
+
+    # Fail early (rather than within the stream) if events are unavailable
+    try:
+        await event_broker.start()
+    except EventBrokerUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+
+    return StreamingResponse(
+        _stream_dataset_events(dataset_id=dataset_id, request=request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
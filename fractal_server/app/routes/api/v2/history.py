@@ -2,7 +2,9 @@ from typing import Any
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import HTTPException
+from fastapi import Response
 from fastapi import status
 from fastapi.responses import JSONResponse
 from sqlmodel import func
@@ -17,8 +19,12 @@ from fractal_server.app.models.v2 import HistoryUnit
 from fractal_server.app.models.v2 import JobV2
 from fractal_server.app.models.v2 import TaskV2
 from fractal_server.app.routes.auth import get_api_guest
+from fractal_server.app.routes.etag import etag_matches
+from fractal_server.app.routes.etag import get_etag
+from fractal_server.app.routes.etag import get_not_modified_response
 from fractal_server.app.routes.pagination import PaginationRequest
 from fractal_server.app.routes.pagination import PaginationResponse
+from fractal_server.app.routes.pagination import get_keyset_pagination_params
 from fractal_server.app.routes.pagination import get_paginated_response
 from fractal_server.app.routes.pagination import get_pagination_params
 from fractal_server.app.schemas.v2 import HistoryRunReadAggregated
@@ -27,12 +33,13 @@ from fractal_server.app.schemas.v2 import HistoryUnitStatus
 from fractal_server.app.schemas.v2 import HistoryUnitStatusWithUnset
 from fractal_server.app.schemas.v2 import ImageLogsRequest
 from fractal_server.app.schemas.v2.sharing import ProjectPermissions
+from fractal_server.images.db_tools import (
+    get_dataset_attributes_and_types_async,
+)
 from fractal_server.images.status_tools import IMAGE_STATUS_KEY
-from fractal_server.images.status_tools import enrich_images_unsorted_async
-from fractal_server.images.tools import aggregate_attributes
-from fractal_server.images.tools import aggregate_types
-from fractal_server.images.tools import filter_image_list
-from fractal_server.images.warnings_tools import enrich_images_with_warning_flag
+from fractal_server.images.status_tools import get_history_status_version_async
+from fractal_server.images.status_tools import get_images_with_status_page_async
+from fractal_server.images.tools import ImageFilter
 from fractal_server.logger import set_logger
 
 from ._aux_functions_history import _verify_workflow_and_dataset_access
@@ -101,15 +108,16 @@ async def get_history_run_list(
     if not runs:
         return []
 
+    # Start from the counts of compacted units (see `compact_history_runs`)
     run_ids = [run.id for run in runs]
     count_map = {
-        run_id: {
-            "num_done_units": 0,
-            "num_submitted_units": 0,
-            "num_failed_units": 0,
-            "num_units_with_warnings": 0,
+        run.id: {
+            "num_done_units": run.num_compacted_done_units,
+            "num_submitted_units": run.num_compacted_submitted_units,
+            "num_failed_units": run.num_compacted_failed_units,
+            "num_units_with_warnings": run.num_compacted_units_with_warnings,
         }
-        for run_id in run_ids
+        for run in runs
     }
 
     # Add units count by status
@@ -126,7 +134,7 @@ async def get_history_run_list(
     unit_counts = res.all()
 
     for run_id, unit_status, count in unit_counts:
-        count_map[run_id][f"num_{unit_status}_units"] = count
+        count_map[run_id][f"num_{unit_status}_units"] += count
 
     stm = (
         select(HistoryUnit.history_run_id, func.count(HistoryUnit.id))
@@ -138,7 +146,7 @@ async def get_history_run_list(
     warnings_count = res.all()
 
     for run_id, count in warnings_count:
-        count_map[run_id]["num_units_with_warnings"] = count
+        count_map[run_id]["num_units_with_warnings"] += count
 
     res = await db.execute(
         select(
@@ -185,7 +193,7 @@ async def get_history_run_units(
     unit_status: HistoryUnitStatus | None = None,
     user: UserOAuth = Depends(get_api_guest),
     db: AsyncSession = Depends(get_async_db),
-    pagination: PaginationRequest = Depends(get_pagination_params),
+    pagination: PaginationRequest = Depends(get_keyset_pagination_params),
 ) -> PaginationResponse[HistoryUnit]:
     # Access control
     await get_wftask_check_access(
@@ -224,7 +232,11 @@ async def get_history_run_units(
         stm = stm.where(HistoryUnit.status == unit_status)
 
     paginated_response = await get_paginated_response(
-        stm=stm, stm_count=stm_count, pagination=pagination, db=db
+        stm=stm,
+        stm_count=stm_count,
+        pagination=pagination,
+        db=db,
+        id_column=HistoryUnit.id,
     )
     return paginated_response
 
@@ -238,7 +250,9 @@ async def get_history_images(
     dataset_id: int,
     workflowtask_id: int,
     request_body: ImageQuery,
+    response: Response,
     include_warnings: bool = False,
+    if_none_match: str | None = Header(default=None),
     user: UserOAuth = Depends(get_api_guest),
     db: AsyncSession = Depends(get_async_db),
     pagination: PaginationRequest = Depends(get_pagination_params),
@@ -265,9 +279,30 @@ async def get_history_images(
     # Setup prefix for logging
     prefix = f"[DS{dataset.id}-WFT{workflowtask_id}-images]"
 
+    # (0) Compare entity tags, before loading any image
+    history_status_version = await get_history_status_version_async(
+        dataset_id=dataset.id,
+        workflowtask_id=workflowtask_id,
+        db=db,
+    )
+    etag = get_etag(
+        dataset.id,
+        dataset.timestamp_created,
+        dataset.images_version,
+        workflowtask_id,
+        history_status_version,
+        request_body.model_dump(),
+        include_warnings,
+        pagination.model_dump(),
+    )
+    if etag_matches(if_none_match=if_none_match, etag=etag):
+        return get_not_modified_response(etag)
+    response.headers["ETag"] = etag
+
     # (1) Extract valid values for attributes and types
-    types = aggregate_types(dataset.images)
-    attributes = aggregate_attributes(dataset.images)
+    attributes, types = await get_dataset_attributes_and_types_async(
+        dataset_id=dataset.id, db=db
+    )
     attributes[IMAGE_STATUS_KEY] = [
         HistoryUnitStatusWithUnset.DONE,
         HistoryUnitStatusWithUnset.SUBMITTED,
@@ -275,56 +310,30 @@ async def get_history_images(
         HistoryUnitStatusWithUnset.UNSET,
     ]
 
-    # (2) Apply type filters
-    type_filtered_images = filter_image_list(
-        images=dataset.images,
-        type_filters=request_body.type_filters,
-    )
-
-    # (3) Enrich images with status attribute
-    type_filtered_images_with_status = await enrich_images_unsorted_async(
-        dataset_id=dataset_id,
+    # (2) Join images with their status, filter and paginate them
+    (
+        final_images,
+        total_count,
+        page_size,
+    ) = await get_images_with_status_page_async(
+        dataset_id=dataset.id,
         workflowtask_id=workflowtask_id,
-        images=type_filtered_images,
+        image_filter=ImageFilter(
+            type_filters=request_body.type_filters,
+            attribute_filters=request_body.attribute_filters,
+        ),
+        include_warnings=include_warnings,
+        page=pagination.page,
+        page_size=pagination.page_size,
         db=db,
     )
-
-    # (4) Apply attribute filters
-    final_images_with_status = filter_image_list(
-        type_filtered_images_with_status,
-        attribute_filters=request_body.attribute_filters,
-    )
-
-    if include_warnings:
-        # (5) Add `has_warnings`
-        final_images = await enrich_images_with_warning_flag(
-            dataset_id=dataset_id,
-            workflowtask_id=workflowtask_id,
-            images=final_images_with_status,
-            db=db,
-        )
-    else:
-        final_images = final_images_with_status
-
-    logger.debug(f"{prefix} {len(dataset.images)=}")
-    logger.debug(f"{prefix} {len(final_images)=}")
-
-    # (5) Apply pagination logic
-    total_count = len(final_images)
-    page_size = pagination.page_size or total_count
-    sorted_images_list = sorted(
-        final_images,
-        key=lambda image: image["zarr_url"],
-    )
-    paginated_images_list = sorted_images_list[
-        (pagination.page - 1) * page_size : pagination.page * page_size
-    ]
+    logger.debug(f"{prefix} {total_count=}")
 
     return dict(
         current_page=pagination.page,
         page_size=page_size,
         total_count=total_count,
-        items=paginated_images_list,
+        items=final_images,
         attributes=attributes,
         types=types,
     )
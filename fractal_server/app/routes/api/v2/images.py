@@ -1,34 +1,51 @@
+from typing import Annotated
 from typing import Any
+from typing import Literal
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import HTTPException
 from fastapi import Response
 from fastapi import status
 from pydantic import BaseModel
 from pydantic import Field
-from sqlalchemy.orm.attributes import flag_modified
-from sqlmodel import delete
+from sqlmodel import select
 
 from fractal_server.app.db import AsyncSession
 from fractal_server.app.db import get_async_db
-from fractal_server.app.models import HistoryImageCache
 from fractal_server.app.models import UserOAuth
+from fractal_server.app.models.v2 import DatasetImage
 from fractal_server.app.routes.auth import get_api_guest
 from fractal_server.app.routes.auth import get_api_user
+from fractal_server.app.routes.etag import etag_matches
+from fractal_server.app.routes.etag import get_etag
+from fractal_server.app.routes.etag import get_not_modified_response
 from fractal_server.app.routes.pagination import PaginationRequest
 from fractal_server.app.routes.pagination import PaginationResponse
 from fractal_server.app.routes.pagination import get_pagination_params
 from fractal_server.app.schemas.v2.sharing import ProjectPermissions
 from fractal_server.images import SingleImage
 from fractal_server.images import SingleImageUpdate
-from fractal_server.images.tools import aggregate_attributes
-from fractal_server.images.tools import aggregate_types
-from fractal_server.images.tools import find_image_by_zarr_url
-from fractal_server.images.tools import match_filter
+from fractal_server.images.db_tools import bulk_delete_images_async_no_commit
+from fractal_server.images.db_tools import bulk_upsert_images_async_no_commit
+from fractal_server.images.db_tools import bump_images_version_async_no_commit
+from fractal_server.images.db_tools import (
+    get_dataset_attributes_and_types_async,
+)
+from fractal_server.images.db_tools import get_dataset_images_by_zarr_url_async
+from fractal_server.images.db_tools import get_dataset_images_page_async
+from fractal_server.images.db_tools import update_dataset_facets_async_no_commit
+from fractal_server.images.image_list import ImageList
+from fractal_server.images.snapshot import get_dataset_image_snapshot_async
+from fractal_server.images.status_tools import (
+    delete_image_cache_async_no_commit,
+)
+from fractal_server.images.tools import ImageFilter
 from fractal_server.types import AttributeFilters
 from fractal_server.types import ImageAttributeValue
 from fractal_server.types import TypeFilters
+from fractal_server.types import ZarrUrlStr
 
 from ._aux_functions import _get_dataset_check_access
 
@@ -70,6 +87,80 @@ class ImageQueryWithZarrUrl(ImageQuery):
     zarr_url: str | None = None
 
 
+class ImageCreateOperation(BaseModel):
+    action: Literal["create"]
+    image: SingleImage
+
+
+class ImagePatchOperation(BaseModel):
+    action: Literal["patch"]
+    image: SingleImageUpdate
+
+
+class ImageDeleteOperation(BaseModel):
+    action: Literal["delete"]
+    zarr_url: ZarrUrlStr
+
+
+class ImageBatch(BaseModel):
+    """
+    List of image operations, to be applied in order.
+
+    Attributes:
+        operations:
+    """
+
+    operations: list[
+        Annotated[
+            ImageCreateOperation | ImagePatchOperation | ImageDeleteOperation,
+            Field(discriminator="action"),
+        ]
+    ]
+
+
+class ImageBatchResult(BaseModel):
+    """
+    Number of applied operations, per action.
+
+    Attributes:
+        num_created:
+        num_patched:
+        num_deleted:
+    """
+
+    num_created: int
+    num_patched: int
+    num_deleted: int
+
+
+def _get_zarr_url_error(*, zarr_url: str, zarr_dir: str) -> str | None:
+    if not zarr_url.startswith(zarr_dir):
+        return (
+            "Cannot create image with zarr_url which is not relative to "
+            f"{zarr_dir}."
+        )
+    elif zarr_url == zarr_dir:
+        return (
+            "`SingleImage.zarr_url` cannot be equal to `Dataset.zarr_dir`:"
+            f" {zarr_dir}"
+        )
+    return None
+
+
+async def _get_dataset_image_or_none(
+    *,
+    dataset_id: int,
+    zarr_url: str,
+    db: AsyncSession,
+) -> DatasetImage | None:
+    res = await db.execute(
+        select(DatasetImage)
+        .where(DatasetImage.dataset_id == dataset_id)
+        .where(DatasetImage.zarr_url == zarr_url)
+    )
+    return res.scalars().one_or_none()
+
+
 @router.post(
     "/project/{project_id}/dataset/{dataset_id}/images/",
     status_code=status.HTTP_201_CREATED,
@@ -90,24 +181,22 @@ async def post_new_image(
     )
     dataset = output["dataset"]
 
-    if not new_image.zarr_url.startswith(dataset.zarr_dir):
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-            detail=(
-                "Cannot create image with zarr_url which is not relative to "
-                f"{dataset.zarr_dir}."
-            ),
-        )
-    elif new_image.zarr_url == dataset.zarr_dir:
+    error = _get_zarr_url_error(
+        zarr_url=new_image.zarr_url,
+        zarr_dir=dataset.zarr_dir,
+    )
+    if error is not None:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-            detail=(
-                "`SingleImage.zarr_url` cannot be equal to `Dataset.zarr_dir`:"
-                f" {dataset.zarr_dir}"
-            ),
+            detail=error,
         )
 
-    if new_image.zarr_url in dataset.image_zarr_urls:
+    existing_image = await _get_dataset_image_or_none(
+        dataset_id=dataset_id,
+        zarr_url=new_image.zarr_url,
+        db=db,
+    )
+    if existing_image is not None:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
             detail=(
@@ -116,9 +205,14 @@ async def post_new_image(
             ),
         )
 
-    dataset.images.append(new_image.model_dump())
-    flag_modified(dataset, "images")
-
+    db.add(DatasetImage(dataset_id=dataset_id, **new_image.model_dump()))
+    await update_dataset_facets_async_no_commit(
+        dataset_id=dataset_id,
+        old_images=[],
+        new_images=[new_image.model_dump()],
+        db=db,
+    )
+    await bump_images_version_async_no_commit(dataset_id=dataset_id, db=db)
     await db.commit()
 
     return Response(status_code=status.HTTP_201_CREATED)
@@ -132,14 +226,13 @@ async def post_new_image(
 async def query_dataset_images(
     project_id: int,
     dataset_id: int,
+    response: Response,
     query: ImageQueryWithZarrUrl | None = None,
+    if_none_match: str | None = Header(default=None),
     pagination: PaginationRequest = Depends(get_pagination_params),
     user: UserOAuth = Depends(get_api_guest),
     db: AsyncSession = Depends(get_async_db),
 ) -> ImagePage:
-    page = pagination.page
-    page_size = pagination.page_size
-
     output = await _get_dataset_check_access(
         project_id=project_id,
         dataset_id=dataset_id,
@@ -148,48 +241,50 @@ async def query_dataset_images(
         db=db,
     )
     dataset = output["dataset"]
-    images = dataset.images
-
-    attributes = aggregate_attributes(images)
-    types = aggregate_types(images)
-
-    if query is not None:
-        if query.zarr_url is not None:
-            image = next(
-                (
-                    image
-                    for image in images
-                    if image["zarr_url"] == query.zarr_url
-                ),
-                None,
-            )
-            if image is None:
-                images = []
-            else:
-                images = [image]
-
-        if query.attribute_filters or query.type_filters:
-            images = [
-                image
-                for image in images
-                if match_filter(
-                    image=image,
-                    type_filters=query.type_filters,
-                    attribute_filters=query.attribute_filters,
-                )
-            ]
 
-    total_count = len(images)
+    if query is None:
+        query = ImageQueryWithZarrUrl()
 
-    if page_size is None:
-        page_size = total_count
+    etag = get_etag(
+        dataset.id,
+        dataset.timestamp_created,
+        dataset.images_version,
+        query.model_dump(),
+        pagination.model_dump(),
+    )
+    if etag_matches(if_none_match=if_none_match, etag=etag):
+        return get_not_modified_response(etag)
+    response.headers["ETag"] = etag
 
-    if total_count > 0:
-        last_page = (total_count // page_size) + (total_count % page_size > 0)
-        if page > last_page:
-            page = last_page
-        offset = (page - 1) * page_size
-        images = images[offset : offset + page_size]
+    attributes, types = await get_dataset_attributes_and_types_async(
+        dataset_id=dataset_id, db=db
+    )
+    image_filter = ImageFilter(
+        type_filters=query.type_filters,
+        attribute_filters=query.attribute_filters,
+    )
+    snapshot = await get_dataset_image_snapshot_async(dataset=dataset, db=db)
+    if snapshot is not None:
+        images, total_count, page, page_size = snapshot.get_page(
+            image_filter,
+            zarr_url=query.zarr_url,
+            page=pagination.page,
+            page_size=pagination.page_size,
+        )
+    else:
+        (
+            images,
+            total_count,
+            page,
+            page_size,
+        ) = await get_dataset_images_page_async(
+            dataset_id=dataset_id,
+            image_filter=image_filter,
+            zarr_url=query.zarr_url,
+            page=pagination.page,
+            page_size=pagination.page_size,
+            db=db,
+        )
 
     return ImagePage(
         total_count=total_count,
@@ -212,19 +307,18 @@ async def delete_dataset_images(
     user: UserOAuth = Depends(get_api_user),
     db: AsyncSession = Depends(get_async_db),
 ) -> Response:
-    output = await _get_dataset_check_access(
+    await _get_dataset_check_access(
         project_id=project_id,
         dataset_id=dataset_id,
         user_id=user.id,
         required_permissions=ProjectPermissions.WRITE,
         db=db,
     )
-    dataset = output["dataset"]
-
-    image_to_remove = find_image_by_zarr_url(
-        images=dataset.images, zarr_url=zarr_url
+    image_to_remove = await _get_dataset_image_or_none(
+        dataset_id=dataset_id,
+        zarr_url=zarr_url,
+        db=db,
     )
-
     if image_to_remove is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -234,13 +328,19 @@ async def delete_dataset_images(
             ),
         )
 
-    dataset.images.remove(image_to_remove["image"])
-    flag_modified(dataset, "images")
+    await update_dataset_facets_async_no_commit(
+        dataset_id=dataset_id,
+        old_images=[image_to_remove.model_dump()],
+        new_images=[],
+        db=db,
+    )
+    await bump_images_version_async_no_commit(dataset_id=dataset_id, db=db)
+    await db.delete(image_to_remove)
 
-    await db.execute(
-        delete(HistoryImageCache)
-        .where(HistoryImageCache.dataset_id == dataset_id)
-        .where(HistoryImageCache.zarr_url == zarr_url)
+    await delete_image_cache_async_no_commit(
+        dataset_id=dataset_id,
+        zarr_urls=[zarr_url],
+        db=db,
     )
 
     await db.commit()
@@ -260,19 +360,19 @@ async def patch_dataset_image(
     user: UserOAuth = Depends(get_api_user),
     db: AsyncSession = Depends(get_async_db),
 ) -> dict[str, Any]:
-    output = await _get_dataset_check_access(
+    await _get_dataset_check_access(
         project_id=project_id,
         dataset_id=dataset_id,
         user_id=user.id,
         required_permissions=ProjectPermissions.WRITE,
         db=db,
     )
-    db_dataset = output["dataset"]
-
-    ret = find_image_by_zarr_url(
-        images=db_dataset.images, zarr_url=image_update.zarr_url
+    db_image = await _get_dataset_image_or_none(
+        dataset_id=dataset_id,
+        zarr_url=image_update.zarr_url,
+        db=db,
     )
-    if ret is None:
+    if db_image is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=(
@@ -280,14 +380,151 @@ async def patch_dataset_image(
                 f"DatasetV2 {dataset_id}."
             ),
         )
-    index = ret["index"]
 
+    old_image = db_image.model_dump()
     for key, value in image_update.model_dump(
         exclude_none=True, exclude={"zarr_url"}
     ).items():
-        db_dataset.images[index][key] = value
+        setattr(db_image, key, value)
+    await update_dataset_facets_async_no_commit(
+        dataset_id=dataset_id,
+        old_images=[old_image],
+        new_images=[db_image.model_dump()],
+        db=db,
+    )
+    await bump_images_version_async_no_commit(dataset_id=dataset_id, db=db)
+
+    await db.commit()
+    await db.refresh(db_image)
+    return db_image.model_dump(exclude={"id", "dataset_id"})
+
 
-    flag_modified(db_dataset, "images")
+@router.post(
+    "/project/{project_id}/dataset/{dataset_id}/images/batch/",
+    response_model=ImageBatchResult,
+    status_code=status.HTTP_200_OK,
+)
+async def apply_image_batch(
+    project_id: int,
+    dataset_id: int,
+    batch: ImageBatch,
+    user: UserOAuth = Depends(get_api_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> ImageBatchResult:
+    """
+    Create, patch and delete many images of a dataset, in a single
+    transaction.
+
+    Operations are validated in order, as if they were sent one by one to the
+    single-image endpoints; if any of them is invalid, none is applied.
+    """
+    output = await _get_dataset_check_access(
+        project_id=project_id,
+        dataset_id=dataset_id,
+        user_id=user.id,
+        required_permissions=ProjectPermissions.WRITE,
+        db=db,
+    )
+    dataset = output["dataset"]
 
+    # Load the images which are affected by some operation
+    touched_zarr_urls = list(
+        dict.fromkeys(
+            (
+                operation.zarr_url
+                if isinstance(operation, ImageDeleteOperation)
+                else operation.image.zarr_url
+            )
+            for operation in batch.operations
+        )
+    )
+    original_images = await get_dataset_images_by_zarr_url_async(
+        dataset_id=dataset_id,
+        zarr_urls=touched_zarr_urls,
+        db=db,
+    )
+    images = ImageList(original_images)
+    original_zarr_urls = set(img["zarr_url"] for img in original_images)
+
+    # Apply operations to the in-memory image list
+    deleted_zarr_urls = set()
+    num_actions = dict(create=0, patch=0, delete=0)
+    for ind, operation in enumerate(batch.operations):
+        error = None
+        if isinstance(operation, ImageCreateOperation):
+            zarr_url = operation.image.zarr_url
+            error = _get_zarr_url_error(
+                zarr_url=zarr_url,
+                zarr_dir=dataset.zarr_dir,
+            )
+            if error is None and zarr_url in images:
+                error = (
+                    f"Image with zarr_url '{zarr_url}' "
+                    f"already in DatasetV2 {dataset_id}"
+                )
+            if error is None:
+                images.append(operation.image.model_dump())
+        else:
+            zarr_url = (
+                operation.zarr_url
+                if isinstance(operation, ImageDeleteOperation)
+                else operation.image.zarr_url
+            )
+            if zarr_url not in images:
+                error = (
+                    f"No image with zarr_url '{zarr_url}' in "
+                    f"DatasetV2 {dataset_id}."
+                )
+            elif isinstance(operation, ImagePatchOperation):
+                images.replace(
+                    images.get(zarr_url)
+                    | operation.image.model_dump(
+                        exclude_none=True, exclude={"zarr_url"}
+                    )
+                )
+            else:
+                images.remove(zarr_url)
+                if zarr_url in original_zarr_urls:
+                    deleted_zarr_urls.add(zarr_url)
+        if error is not None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=f"Invalid operation {ind} ({operation.action}): {error}",
+            )
+        num_actions[operation.action] += 1
+
+    # Write changes. Images that were deleted and then re-created are first
+    # removed, so that they are moved to the end of the image list (as for
+    # single-image operations).
+    new_images = images.to_list()
+    deleted_zarr_urls = list(deleted_zarr_urls)
+    await bulk_delete_images_async_no_commit(
+        dataset_id=dataset_id,
+        zarr_urls=deleted_zarr_urls,
+        db=db,
+    )
+    await bulk_upsert_images_async_no_commit(
+        dataset_id=dataset_id,
+        images=new_images,
+        db=db,
+    )
+    await update_dataset_facets_async_no_commit(
+        dataset_id=dataset_id,
+        old_images=original_images,
+        new_images=new_images,
+        db=db,
+    )
+    await delete_image_cache_async_no_commit(
+        dataset_id=dataset_id,
+        zarr_urls=deleted_zarr_urls,
+        db=db,
+    )
+    if batch.operations:
+        await bump_images_version_async_no_commit(dataset_id=dataset_id, db=db)
     await db.commit()
-    return db_dataset.images[index]
+
+    return ImageBatchResult(
+        num_created=num_actions["create"],
+        num_patched=num_actions["patch"],
+        num_deleted=num_actions["delete"],
+    )
@@ -2,15 +2,12 @@ from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import status
-from sqlalchemy import func
 from sqlmodel import select
 
 from fractal_server.app.db import AsyncSession
 from fractal_server.app.db import get_async_db
-from fractal_server.app.models import HistoryImageCache
 from fractal_server.app.models import HistoryRun
-from fractal_server.app.models import HistoryUnit
-from fractal_server.app.models import TaskV2
+from fractal_server.app.models import HistoryStatusSummary
 from fractal_server.app.models import UserOAuth
 from fractal_server.app.models.v2 import JobV2
 from fractal_server.app.models.v2.workflowtask import WorkflowTaskV2
@@ -91,17 +88,40 @@ async def get_latest_job(
     statuses: dict[int, TaskStatusSimple | TaskStatusImages | None] = {}
     ids_to_skip = []
 
-    for wftask in workflow.task_list:
-        res = await db.execute(
-            select(HistoryRun)
-            .where(HistoryRun.dataset_id == dataset_id)
-            .where(HistoryRun.workflowtask_id == wftask.id)
-            .order_by(HistoryRun.timestamp_started.desc())
-            .limit(1)
+    # Read latest runs and status counters of all workflow tasks at once
+    res = await db.execute(
+        select(
+            WorkflowTaskV2.id,
+            WorkflowTaskV2.task_type,
+            HistoryRun.job_id,
+            HistoryRun.status,
+            HistoryRun.num_available_images,
+            HistoryStatusSummary,
+        )
+        .outerjoin(
+            HistoryStatusSummary,
+            (HistoryStatusSummary.workflowtask_id == WorkflowTaskV2.id)
+            & (HistoryStatusSummary.dataset_id == dataset_id),
+        )
+        .outerjoin(
+            HistoryRun,
+            HistoryRun.id == HistoryStatusSummary.latest_history_run_id,
         )
-        latest_run = res.scalar_one_or_none()
+        .where(WorkflowTaskV2.workflow_id == workflow_id)
+    )
+    rows = {row[0]: row for row in res.all()}
 
-        if latest_run is None:
+    for wftask in workflow.task_list:
+        (
+            _,
+            task_type,
+            latest_run_job_id,
+            latest_run_status,
+            num_available_images,
+            summary,
+        ) = rows[wftask.id]
+
+        if latest_run_status is None:
             if wftask.id in running_wftask_ids:
                 logger.debug(f"A1: No HistoryRun for {wftask.id=}.")
                 statuses[wftask.id] = TaskStatusSimple(
@@ -114,85 +134,35 @@ async def get_latest_job(
             continue
         else:
             if wftask.id in running_wftask_ids:
-                if latest_run.job_id == running_job.id:
+                if latest_run_job_id == running_job.id:
                     logger.debug(
-                        f"B1 for {wftask.id} and {latest_run.job_id=}."
+                        f"B1 for {wftask.id} and {latest_run_job_id=}."
                     )
                     statuses[wftask.id] = TaskStatusImages(
-                        status=latest_run.status
+                        status=latest_run_status
                     )
                 else:
                     logger.debug(
-                        f"B2 for {wftask.id} and {latest_run.job_id=}."
+                        f"B2 for {wftask.id} and {latest_run_job_id=}."
                     )
                     statuses[wftask.id] = TaskStatusImages(
                         status=HistoryUnitStatus.SUBMITTED
                     )
             else:
                 logger.debug(f"C1: {wftask.id=} not in {running_wftask_ids=}.")
-                statuses[wftask.id] = TaskStatusImages(status=latest_run.status)
-
-        statuses[
-            wftask.id
-        ].num_available_images = latest_run.num_available_images
-
-        stm = (
-            select(HistoryUnit.status, func.count(HistoryImageCache.zarr_url))
-            .join(
-                HistoryUnit,
-                HistoryImageCache.latest_history_unit_id == HistoryUnit.id,
-            )
-            .where(HistoryImageCache.dataset_id == dataset_id)
-            .where(HistoryImageCache.workflowtask_id == wftask.id)
-            .group_by(HistoryUnit.status)
-        )
+                statuses[wftask.id] = TaskStatusImages(status=latest_run_status)
 
-        res = await db.execute(stm)
-        rows = res.all()  # list of (status, num_images)
+        statuses[wftask.id].num_available_images = num_available_images
 
-        # initialize zeros for all statuses
         for target_status in HistoryUnitStatus:
-            setattr(statuses[wftask.id], f"num_{target_status}_images", 0)
-
-        for target_status, num_images in rows:
-            setattr(
-                statuses[wftask.id], f"num_{target_status}_images", num_images
-            )
-
-        res = await db.execute(
-            select(TaskV2.type)
-            .join(WorkflowTaskV2, WorkflowTaskV2.task_id == TaskV2.id)
-            .where(WorkflowTaskV2.id == wftask.id)
-        )
-        task_type: TaskType = res.scalar_one()
+            attribute = f"num_{target_status}_images"
+            setattr(statuses[wftask.id], attribute, getattr(summary, attribute))
 
         match task_type:
             case TaskType.COMPOUND | TaskType.CONVERTER_COMPOUND:
-                stm = (
-                    select(HistoryUnit)
-                    .where(HistoryUnit.has_warnings.is_(True))
-                    .join(
-                        HistoryRun, HistoryRun.id == HistoryUnit.history_run_id
-                    )
-                    .where(HistoryRun.dataset_id == dataset_id)
-                    .where(HistoryRun.workflowtask_id == wftask.id)
-                    .limit(1)
-                )
+                has_warnings = summary.num_units_with_warnings > 0
             case _:
-                stm = (
-                    select(HistoryImageCache)
-                    .join(
-                        HistoryUnit,
-                        HistoryImageCache.latest_history_unit_id
-                        == HistoryUnit.id,
-                    )
-                    .where(HistoryImageCache.dataset_id == dataset_id)
-                    .where(HistoryImageCache.workflowtask_id == wftask.id)
-                    .where(HistoryUnit.has_warnings.is_(True))
-                    .limit(1)
-                )
-        res = await db.execute(stm)
-        has_warnings = res.one_or_none() is not None
+                has_warnings = summary.num_images_with_warnings > 0
         setattr(statuses[wftask.id], "has_warnings", has_warnings)
 
     # Set `num_available_images=None` for cases where it would be
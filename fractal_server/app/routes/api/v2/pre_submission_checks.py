@@ -12,8 +12,11 @@ from fractal_server.app.routes.auth import get_api_guest
 from fractal_server.app.schemas.v2 import HistoryUnitStatus
 from fractal_server.app.schemas.v2 import TaskType
 from fractal_server.app.schemas.v2.sharing import ProjectPermissions
+from fractal_server.images.db_tools import get_dataset_images_async
+from fractal_server.images.snapshot import get_dataset_image_snapshot_async
 from fractal_server.images.status_tools import IMAGE_STATUS_KEY
 from fractal_server.images.status_tools import enrich_images_unsorted_async
+from fractal_server.images.tools import ImageFilter
 from fractal_server.images.tools import aggregate_types
 from fractal_server.images.tools import filter_image_list
 from fractal_server.types import AttributeFilters
@@ -37,7 +40,7 @@ async def verify_unique_types(
     user: UserOAuth = Depends(get_api_guest),
     db: AsyncSession = Depends(get_async_db),
 ) -> list[str]:
-    # Get dataset
+    # Get dataset images
     output = await _get_dataset_check_access(
         project_id=project_id,
         dataset_id=dataset_id,
@@ -45,21 +48,36 @@ async def verify_unique_types(
         required_permissions=ProjectPermissions.READ,
         db=db,
     )
-    dataset = output["dataset"]
+
+    # Status-independent queries can be answered through the dataset snapshot
+    if query is None or IMAGE_STATUS_KEY not in query.attribute_filters.keys():
+        snapshot = await get_dataset_image_snapshot_async(
+            dataset=output["dataset"], db=db
+        )
+        if snapshot is not None:
+            if query is None:
+                query = ImageQuery()
+            bitset = snapshot.get_bitset(
+                ImageFilter(
+                    type_filters=query.type_filters,
+                    attribute_filters=query.attribute_filters,
+                )
+            )
+            return snapshot.get_non_unique_types(bitset)
+
+    images = await get_dataset_images_async(dataset_id=dataset_id, db=db)
 
     # Filter images
     if query is None:
-        filtered_images = dataset.images
+        filtered_images = images
     else:
         if IMAGE_STATUS_KEY in query.attribute_filters.keys():
             images = await enrich_images_unsorted_async(
                 dataset_id=dataset_id,
                 workflowtask_id=workflowtask_id,
-                images=dataset.images,
+                images=images,
                 db=db,
             )
-        else:
-            images = dataset.images
         filtered_images = filter_image_list(
             images=images,
             attribute_filters=query.attribute_filters,
@@ -127,16 +145,16 @@ async def check_non_processed_images(
         # Skip check if previous task is converter
         return JSONResponse(status_code=200, content=[])
 
-    res = await _get_dataset_check_access(
+    await _get_dataset_check_access(
         project_id=project_id,
         dataset_id=dataset_id,
         user_id=user.id,
         required_permissions=ProjectPermissions.READ,
         db=db,
     )
-    dataset = res["dataset"]
+    images = await get_dataset_images_async(dataset_id=dataset_id, db=db)
     filtered_images = filter_image_list(
-        images=dataset.images,
+        images=images,
         type_filters=filters.type_filters,
         attribute_filters=filters.attribute_filters,
     )
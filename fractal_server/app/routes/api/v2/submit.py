@@ -14,6 +14,8 @@ from sqlmodel import update
 from fractal_server import __VERSION__
 from fractal_server.app.db import AsyncSession
 from fractal_server.app.db import get_async_db
+from fractal_server.app.events import DatasetEventType
+from fractal_server.app.events import notify_dataset_event_async_no_commit
 from fractal_server.app.models import Profile
 from fractal_server.app.models import TaskGroupV2
 from fractal_server.app.models import UserOAuth
@@ -214,7 +216,7 @@ async def submit_job(
         workflow_id=workflow_id,
         user_email=user.email,
         dataset_dump=json.loads(
-            dataset.model_dump_json(exclude={"images", "history", "is_starred"})
+            dataset.model_dump_json(exclude={"history", "is_starred"})
         ),
         workflow_dump=json.loads(
             workflow.model_dump_json(
@@ -240,6 +242,13 @@ async def submit_job(
     )
 
     db.add(job)
+    await db.flush()
+    await notify_dataset_event_async_no_commit(
+        dataset_id=dataset_id,
+        event_type=DatasetEventType.JOB,
+        data=dict(job_id=job.id, status=job.status),
+        db=db,
+    )
     await db.commit()
     await db.refresh(job)
 
@@ -0,0 +1,52 @@
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Response
+from fastapi import status
+
+
+def get_etag(*parts: Any) -> str:
+    """
+    Compute a (strong) entity tag from JSON-serializable parts.
+
+    The parts must include everything the response depends on, e.g. object
+    versions and request parameters.
+
+    Args:
+        parts:
+
+    Returns:
+        The quoted entity tag.
+    """
+    data = json.dumps(parts, sort_keys=True, default=str)
+    digest = hashlib.sha256(data.encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(*, if_none_match: str | None, etag: str) -> bool:
+    """
+    Find whether an `If-None-Match` header matches an entity tag (with weak
+    comparison, as per RFC 9110).
+
+    Args:
+        if_none_match: The value of the `If-None-Match` header, if any.
+        etag: The current entity tag.
+
+    Returns:
+        Whether the client copy is up to date.
+    """
+    if if_none_match is None:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag in ("*", etag):
+            return True
+    return False
+
+
+def get_not_modified_response(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag},
+    )
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from pydantic import Field
 from pydantic import ValidationError
 from pydantic import model_validator
+from sqlalchemy.orm import InstrumentedAttribute
 from sqlmodel.sql.expression import Select
 from sqlmodel.sql.expression import SelectOfScalar
 
@@ -16,8 +17,26 @@ T = TypeVar("T")
 
 
 class PaginationRequest(BaseModel):
+    """
+    Pagination parameters.
+
+    If `last_id` is set, keyset pagination is used: the page includes the
+    `page_size` items that follow the item with ID `last_id`, and the total
+    count is only computed if `with_count` is `True`. Otherwise, the
+    `page`-th page is selected through OFFSET/LIMIT, and the total count is
+    always computed.
+
+    Attributes:
+        page:
+        page_size:
+        last_id:
+        with_count:
+    """
+
     page: int = Field(ge=1)
     page_size: int | None = Field(ge=1)
+    last_id: int | None = Field(default=None, ge=0)
+    with_count: bool = False
 
     @model_validator(mode="after")
     def valid_pagination_parameters(self) -> Self:
@@ -25,6 +44,13 @@ class PaginationRequest(BaseModel):
             raise ValueError(
                 f"page_size is None but page={self.page} is greater than 1."
             )
+        if self.last_id is not None:
+            if self.page_size is None:
+                raise ValueError("page_size is required when last_id is set.")
+            if self.page > 1:
+                raise ValueError(
+                    f"page={self.page} cannot be used together with last_id."
+                )
         return self
 
 
@@ -41,6 +67,31 @@ def get_pagination_params(
     return pagination
 
 
+def get_keyset_pagination_params(
+    page: int = 1,
+    page_size: int | None = None,
+    last_id: int | None = None,
+    with_count: bool = False,
+) -> PaginationRequest:
+    """
+    Same as `get_pagination_params`, for endpoints that also support keyset
+    pagination.
+    """
+    try:
+        pagination = PaginationRequest(
+            page=page,
+            page_size=page_size,
+            last_id=last_id,
+            with_count=with_count,
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid pagination parameters. Original error: '{e}'.",
+        )
+    return pagination
+
+
 class PaginationData(BaseModel):
     """
     Metadata describing the state of a paginated query.
@@ -48,12 +99,12 @@ class PaginationData(BaseModel):
     Attributes:
         current_page:
         page_size:
-        total_count:
+        total_count: `None` for keyset pagination without `with_count`.
     """
 
     current_page: int = Field(ge=1)
     page_size: int = Field(ge=0)
-    total_count: int = Field(ge=0)
+    total_count: int | None = Field(ge=0)
 
 
 class PaginationResponse(PaginationData, Generic[T]):
@@ -71,12 +122,32 @@ class PaginationResponse(PaginationData, Generic[T]):
     items: list[T]
 
 
+def _apply_keyset_pagination(
+    *,
+    stm: Select[T] | SelectOfScalar[T],
+    last_id: int,
+    page_size: int,
+    id_column: InstrumentedAttribute[int],
+) -> Select[T] | SelectOfScalar[T]:
+    """
+    Replace the ordering of a statement with the `id_column` one, and select
+    the first `page_size` rows with `id_column > last_id`.
+    """
+    return (
+        stm.order_by(None)
+        .where(id_column > last_id)
+        .order_by(id_column)
+        .limit(page_size)
+    )
+
+
 async def get_pagination_data(
     *,
     stm: Select[T] | SelectOfScalar[T],
     stm_count: SelectOfScalar[int],
     pagination: PaginationRequest,
     db: AsyncSession,
+    id_column: InstrumentedAttribute[int] | None = None,
 ) -> tuple[Select[T] | SelectOfScalar[T], PaginationData]:
     """
     Apply pagination to a SQLAlchemy statement and compute pagination metadata.
@@ -85,11 +156,18 @@ async def get_pagination_data(
     of available items, then applies the appropriate OFFSET and LIMIT to the
     provided statement based on the requested pagination parameters.
 
+    For keyset pagination (i.e. if `pagination.last_id` is set), the
+    statement is instead ordered by `id_column` and filtered by
+    `id_column > last_id`, so that the cost of a page does not depend on its
+    depth. In this case, the count query is only executed if
+    `pagination.with_count` is set.
+
     Args:
         stm:
         stm_count:
         pagination:
         db:
+        id_column: The column for keyset pagination (e.g. `JobV2.id`).
     Returns:
         A tuple containing:
             - The modified SQLAlchemy statement with proper OFFSET and LIMIT.
@@ -99,6 +177,31 @@ async def get_pagination_data(
                 * total_count: the total number of available items.
     """
 
+    if pagination.last_id is not None:
+        if id_column is None:
+            raise HTTPException(
+                status_code=422,
+                detail="Keyset pagination is not supported by this endpoint.",
+            )
+        total_count = None
+        if pagination.with_count:
+            res_total_count = await db.execute(stm_count)
+            total_count = res_total_count.scalar()
+        stm = _apply_keyset_pagination(
+            stm=stm,
+            last_id=pagination.last_id,
+            page_size=pagination.page_size,
+            id_column=id_column,
+        )
+        return (
+            stm,
+            PaginationData(
+                current_page=pagination.page,
+                page_size=pagination.page_size,
+                total_count=total_count,
+            ),
+        )
+
     res_total_count = await db.execute(stm_count)
     total_count = res_total_count.scalar()
 
@@ -124,6 +227,7 @@ async def get_paginated_response(
     stm_count: SelectOfScalar[int],
     pagination: PaginationRequest,
     db: AsyncSession,
+    id_column: InstrumentedAttribute[int] | None = None,
 ) -> PaginationResponse[T]:
     """
     Execute a paginated query and return a structured response.
@@ -136,12 +240,14 @@ async def get_paginated_response(
         stm_count:
         pagination:
         db:
+        id_column: See `get_pagination_data`.
     """
     stm, pagination_data = await get_pagination_data(
         stm=stm,
         stm_count=stm_count,
         pagination=pagination,
         db=db,
+        id_column=id_column,
     )
 
     res = await db.execute(stm)
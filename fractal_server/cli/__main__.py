@@ -1,6 +1,7 @@
 import sys
 from argparse import Namespace
 
+from ._compact_history import compact_history
 from ._init_db_data import init_db_data
 from ._openapi import save_openapi
 from ._parser import parse_args
@@ -36,6 +37,8 @@ def run() -> None:
             )
         case "recent":
             recent(minutes=args.minutes)
+        case "compact-history":
+            compact_history(older_than_days=args.older_than_days)
         case "sync-core-tasks":
             sync_core_tasks(
                 resources_and_groups=args.resources_and_groups,
@@ -0,0 +1,14 @@
+def compact_history(*, older_than_days: int) -> None:
+    """
+    Compact the history runs that started more than `older_than_days` days
+    ago, see `fractal_server.app.history_compaction`.
+    """
+    from fractal_server.app.db import get_sync_db
+    from fractal_server.app.history_compaction import compact_history_runs
+
+    with next(get_sync_db()) as db:
+        num_units = compact_history_runs(
+            older_than_days=older_than_days,
+            db=db,
+        )
+    print(f"Deleted {num_units} history units.")
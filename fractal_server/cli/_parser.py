@@ -107,6 +107,21 @@ def get_parser() -> ap.ArgumentParser:
         default=20,
     )
 
+    # fractalctl compact-history
+    compact_history_parser = subparsers.add_parser(
+        "compact-history",
+        description=(
+            "Delete the history units of superseded runs, apart from the "
+            "latest unit of each image."
+        ),
+    )
+    compact_history_parser.add_argument(
+        "--older-than-days",
+        type=int,
+        required=True,
+        help="Only compact runs which started more than this many days ago.",
+    )
+
     # fractalctl sync-core-tasks
     sync_core_tasks_parser = subparsers.add_parser(  # noqa: F841
         "sync-core-tasks",
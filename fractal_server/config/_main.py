@@ -2,6 +2,9 @@ import logging
 from typing import Literal
 
 from pydantic import HttpUrl
+from pydantic import NonNegativeInt
+from pydantic import PositiveFloat
+from pydantic import PositiveInt
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
@@ -53,6 +56,20 @@ class Settings(BaseSettings):
             Remove endpoints starting with `/token/login`.
         FRACTAL_ENABLE_TASK_GROUP_RESET:
             Enable admin-only endpoint to reset task groups.
+        FRACTAL_IMAGE_SNAPSHOT_CACHE_MB:
+            Memory budget (in MB) of the per-process cache of columnar image
+            lists, used by read-only image endpoints. If set to `0` (the
+            default value), the cache is disabled and images are always read
+            from the database.
+        FRACTAL_HISTORY_RETENTION_DAYS:
+            If set, the history units of superseded runs are deleted once
+            the runs are older than this number of days (apart from the
+            latest unit of each image), see `fractalctl compact-history`.
+            If set to `None` (the default value), no periodic compaction
+            takes place.
+        FRACTAL_HISTORY_COMPACTION_INTERVAL:
+            Waiting time between periodic compactions of history units, in
+            seconds.
     """
 
     model_config = SettingsConfigDict(**SETTINGS_CONFIG_DICT)
@@ -73,3 +90,6 @@ class Settings(BaseSettings):
     FRACTAL_LONG_REQUEST_TIME: float = 30.0
     FRACTAL_DISABLE_BASIC_AUTH: Literal["true", "false"] = "false"
     FRACTAL_ENABLE_TASK_GROUP_RESET: Literal["true", "false"] = "false"
+    FRACTAL_IMAGE_SNAPSHOT_CACHE_MB: NonNegativeInt = 0
+    FRACTAL_HISTORY_RETENTION_DAYS: PositiveInt | None = None
+    FRACTAL_HISTORY_COMPACTION_INTERVAL: PositiveFloat = 86400.0
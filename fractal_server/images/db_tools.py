@@ -0,0 +1,598 @@
+import json
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import Executable
+from sqlalchemy import Select
+from sqlalchemy import bindparam
+from sqlalchemy import column
+from sqlalchemy import literal
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlmodel import delete
+from sqlmodel import func
+from sqlmodel import not_
+from sqlmodel import or_
+from sqlmodel import select
+from sqlmodel import update
+
+from fractal_server.app.models.v2 import DatasetAttributeFacet
+from fractal_server.app.models.v2 import DatasetImage
+from fractal_server.app.models.v2 import DatasetTypeFacet
+from fractal_server.app.models.v2 import DatasetV2
+from fractal_server.images.tools import ImageFilter
+from fractal_server.images.tools import _sort_with_fallback
+from fractal_server.logger import set_logger
+
+_CHUNK_SIZE = 2_000
+
+logger = set_logger(__name__)
+
+
+def _prepare_images_query(*, dataset_id: int) -> Select:
+    """
+    Note: images are sorted by `id`, which reflects their insertion order.
+    """
+    stm = (
+        select(
+            DatasetImage.zarr_url,
+            DatasetImage.origin,
+            DatasetImage.attributes,
+            DatasetImage.types,
+        )
+        .where(DatasetImage.dataset_id == dataset_id)
+        .order_by(DatasetImage.id)
+    )
+    return stm
+
+
+def _python_equal_values(value: Any) -> list[Any]:
+    """
+    Values that JSONB containment must check, so that attribute values are
+    compared with Python equality (as in `ImageFilter`).
+
+    JSONB already considers `1` and `1.0` as equal, but not `True` and `1`
+    (or `False` and `0`).
+    """
+    if isinstance(value, bool):
+        return [value, int(value)]
+    if isinstance(value, int | float) and value in (0, 1):
+        return [value, bool(value)]
+    return [value]
+
+
+def _apply_image_filters(stm: Select, *, image_filter: ImageFilter) -> Select:
+    """
+    Translate a filter set into JSONB-containment `WHERE` clauses.
+
+    This is the SQL counterpart of `fractal_server.images.tools.ImageFilter`:
+    a missing type counts as `False`, and an image matches an attribute filter
+    if its value is equal to any of the filter values (with Python equality,
+    see `_python_equal_values`).
+    """
+    type_filters = image_filter.type_filters
+    true_types = {key: True for key, value in type_filters.items() if value}
+    if true_types:
+        stm = stm.where(DatasetImage.types.contains(true_types))
+    for key, value in type_filters.items():
+        if not value:
+            stm = stm.where(not_(DatasetImage.types.contains({key: True})))
+    for key, values in image_filter.attribute_filters.items():
+        stm = stm.where(
+            or_(
+                *(
+                    DatasetImage.attributes.contains({key: equal_value})
+                    for value in values
+                    for equal_value in _python_equal_values(value)
+                )
+            )
+        )
+    return stm
+
+
+def _row_to_image(row: Any) -> dict[str, Any]:
+    return dict(
+        zarr_url=row.zarr_url,
+        origin=row.origin,
+        attributes=row.attributes,
+        types=row.types,
+    )
+
+
+async def get_dataset_images_async(
+    *,
+    dataset_id: int,
+    db: AsyncSession,
+) -> list[dict[str, Any]]:
+    """
+    Get the image list of a dataset.
+
+    Args:
+        dataset_id: The dataset ID
+        db: An async db session
+
+    Returns:
+        The list of images, as dictionaries.
+    """
+    res = await db.execute(_prepare_images_query(dataset_id=dataset_id))
+    return [_row_to_image(row) for row in res.all()]
+
+
+def get_dataset_images_sync(
+    *,
+    dataset_id: int,
+    db: Session,
+) -> list[dict[str, Any]]:
+    """
+    Get the image list of a dataset.
+
+    Args:
+        dataset_id: The dataset ID
+        db: A sync db session
+
+    Returns:
+        The list of images, as dictionaries.
+    """
+    res = db.execute(_prepare_images_query(dataset_id=dataset_id))
+    return [_row_to_image(row) for row in res.all()]
+
+
+async def get_dataset_images_by_zarr_url_async(
+    *,
+    dataset_id: int,
+    zarr_urls: list[str],
+    db: AsyncSession,
+) -> list[dict[str, Any]]:
+    """
+    Get the images of a dataset with given `zarr_url`s.
+
+    Args:
+        dataset_id: The dataset ID
+        zarr_urls: The `zarr_url`s of the requested images (missing ones are
+            ignored).
+        db: An async db session
+
+    Returns:
+        The list of images, as dictionaries (in image-list order within each
+        chunk of `zarr_urls`).
+    """
+    images = []
+    for ind in range(0, len(zarr_urls), _CHUNK_SIZE):
+        res = await db.execute(
+            _prepare_images_query(dataset_id=dataset_id).where(
+                DatasetImage.zarr_url.in_(zarr_urls[ind : ind + _CHUNK_SIZE])
+            )
+        )
+        images.extend(_row_to_image(row) for row in res.all())
+    return images
+
+
+async def get_dataset_images_page_async(
+    *,
+    dataset_id: int,
+    image_filter: ImageFilter,
+    zarr_url: str | None = None,
+    page: int,
+    page_size: int | None,
+    db: AsyncSession,
+) -> tuple[list[dict[str, Any]], int, int, int]:
+    """
+    Get a single page of the filtered image list of a dataset.
+
+    Filtering, counting and pagination all take place in the database, so
+    that only the requested page of images is loaded.
+
+    Args:
+        dataset_id: The dataset ID
+        image_filter: The filter set that images must match.
+        zarr_url: If set, only include the image with this `zarr_url`.
+        page: The requested page (larger values are set to the last page).
+        page_size: The page size (if `None`, include all matching images).
+        db: An async db session
+
+    Returns:
+        Tuple with the images of the requested page, the total number of
+        matching images, the actual page and the actual page size.
+    """
+    stm_count = select(func.count(DatasetImage.id)).where(
+        DatasetImage.dataset_id == dataset_id
+    )
+    stm = _prepare_images_query(dataset_id=dataset_id)
+    if zarr_url is not None:
+        stm_count = stm_count.where(DatasetImage.zarr_url == zarr_url)
+        stm = stm.where(DatasetImage.zarr_url == zarr_url)
+    stm_count = _apply_image_filters(stm_count, image_filter=image_filter)
+    stm = _apply_image_filters(stm, image_filter=image_filter)
+
+    res = await db.execute(stm_count)
+    total_count = res.scalar_one()
+    if page_size is None:
+        page_size = total_count
+    if total_count == 0:
+        return [], total_count, page, page_size
+
+    last_page = (total_count // page_size) + (total_count % page_size > 0)
+    page = min(page, last_page)
+    stm = stm.offset((page - 1) * page_size).limit(page_size)
+    res = await db.execute(stm)
+    images = [_row_to_image(row) for row in res.all()]
+    return images, total_count, page, page_size
+
+
+async def get_dataset_attributes_and_types_async(
+    *,
+    dataset_id: int,
+    db: AsyncSession,
+) -> tuple[dict[str, list[Any]], list[str]]:
+    """
+    Get all attribute values and type keys of the images of a dataset.
+
+    This is the database counterpart of `aggregate_attributes` and
+    `aggregate_types`, based on the `DatasetAttributeFacet` and
+    `DatasetTypeFacet` tables (so that its cost scales with the number of
+    facets, rather than with the number of images).
+
+    Args:
+        dataset_id: The dataset ID
+        db: An async db session
+
+    Returns:
+        Tuple with the sorted values of each attribute and the type keys.
+    """
+    res = await db.execute(
+        select(DatasetAttributeFacet.key, DatasetAttributeFacet.value)
+        .where(DatasetAttributeFacet.dataset_id == dataset_id)
+        .where(DatasetAttributeFacet.num_images > 0)
+    )
+    attributes = {}
+    for key, value in res.all():
+        attributes.setdefault(key, []).append(value)
+    sorted_attributes = {
+        key: _sort_with_fallback(values) for key, values in attributes.items()
+    }
+
+    res = await db.execute(
+        select(DatasetTypeFacet.key)
+        .where(DatasetTypeFacet.dataset_id == dataset_id)
+        .where(DatasetTypeFacet.num_images > 0)
+        .order_by(DatasetTypeFacet.key)
+    )
+    types = list(res.scalars().all())
+
+    return sorted_attributes, types
+
+
+def _hashable_attribute_value(value: Any) -> tuple[bool, Any]:
+    """
+    Map an attribute value to a hashable key which follows JSONB equality
+    (e.g. `1` and `1.0` are the same value, while `True` and `1` are not).
+    """
+    if isinstance(value, dict | list):
+        return (False, json.dumps(value, sort_keys=True))
+    return (isinstance(value, bool), value)
+
+
+def _prepare_facet_statements(
+    *,
+    dataset_id: int,
+    old_images: list[dict[str, Any]],
+    new_images: list[dict[str, Any]],
+) -> list[Executable]:
+    """
+    Prepare the statements that bring the facet tables from `old_images` to
+    `new_images`.
+
+    Only the difference between the two image lists is written: for each
+    attribute value and type key, the number of images is incremented or
+    decremented, and facets which are left with no images are removed.
+    """
+    attribute_deltas = Counter()
+    attribute_values = {}
+    type_deltas = Counter()
+    for sign, images in ((-1, old_images), (1, new_images)):
+        for image in images:
+            for key, value in image["attributes"].items():
+                hashable_key = (key, _hashable_attribute_value(value))
+                attribute_deltas[hashable_key] += sign
+                attribute_values.setdefault(hashable_key, value)
+            for key in image["types"].keys():
+                type_deltas[key] += sign
+
+    attribute_rows = [
+        dict(
+            dataset_id=dataset_id,
+            key=hashable_key[0],
+            value=attribute_values[hashable_key],
+            num_images=delta,
+        )
+        for hashable_key, delta in attribute_deltas.items()
+        if delta != 0
+    ]
+    type_rows = [
+        dict(dataset_id=dataset_id, key=key, num_images=delta)
+        for key, delta in type_deltas.items()
+        if delta != 0
+    ]
+
+    statements = []
+    for table, rows, index_elements in (
+        (DatasetAttributeFacet, attribute_rows, ["dataset_id", "key", "value"]),
+        (DatasetTypeFacet, type_rows, ["dataset_id", "key"]),
+    ):
+        if not rows:
+            continue
+        for ind in range(0, len(rows), _CHUNK_SIZE):
+            stmt = pg_insert(table).values(rows[ind : ind + _CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_=dict(
+                    num_images=table.num_images + stmt.excluded.num_images
+                ),
+            )
+            statements.append(stmt)
+        statements.append(
+            delete(table)
+            .where(table.dataset_id == dataset_id)
+            .where(table.num_images <= 0)
+        )
+    return statements
+
+
+def update_dataset_facets_no_commit(
+    *,
+    dataset_id: int,
+    old_images: list[dict[str, Any]],
+    new_images: list[dict[str, Any]],
+    db: Session,
+) -> None:
+    """
+    Update the facets of a dataset after a change of its image list, without
+    committing.
+
+    Args:
+        dataset_id: The dataset ID
+        old_images: Images which were modified or removed, in their previous
+            version.
+        new_images: Images which were modified or added, in their new
+            version.
+        db: A sync database session
+    """
+    for stmt in _prepare_facet_statements(
+        dataset_id=dataset_id,
+        old_images=old_images,
+        new_images=new_images,
+    ):
+        db.execute(stmt)
+
+
+async def update_dataset_facets_async_no_commit(
+    *,
+    dataset_id: int,
+    old_images: list[dict[str, Any]],
+    new_images: list[dict[str, Any]],
+    db: AsyncSession,
+) -> None:
+    """
+    Update the facets of a dataset after a change of its image list, without
+    committing.
+
+    Args:
+        dataset_id: The dataset ID
+        old_images: Images which were modified or removed, in their previous
+            version.
+        new_images: Images which were modified or added, in their new
+            version.
+        db: An async database session
+    """
+    for stmt in _prepare_facet_statements(
+        dataset_id=dataset_id,
+        old_images=old_images,
+        new_images=new_images,
+    ):
+        await db.execute(stmt)
+
+
+def _prepare_images_version_statement(*, dataset_id: int) -> Executable:
+    return (
+        update(DatasetV2)
+        .where(DatasetV2.id == dataset_id)
+        .values(images_version=DatasetV2.images_version + 1)
+    )
+
+
+def bump_images_version_no_commit(*, dataset_id: int, db: Session) -> None:
+    """
+    Increment the image-list version of a dataset, without committing.
+
+    This must take place in the same transaction as any change to the image
+    list, so that readers can rely on `DatasetV2.images_version` to detect
+    changes (e.g. to invalidate cached image lists).
+
+    Args:
+        dataset_id: The dataset ID
+        db: A sync database session
+    """
+    db.execute(_prepare_images_version_statement(dataset_id=dataset_id))
+
+
+async def bump_images_version_async_no_commit(
+    *,
+    dataset_id: int,
+    db: AsyncSession,
+) -> None:
+    """
+    Increment the image-list version of a dataset, without committing.
+
+    This must take place in the same transaction as any change to the image
+    list, so that readers can rely on `DatasetV2.images_version` to detect
+    changes (e.g. to invalidate cached image lists).
+
+    Args:
+        dataset_id: The dataset ID
+        db: An async database session
+    """
+    await db.execute(_prepare_images_version_statement(dataset_id=dataset_id))
+
+
+def _prepare_upsert_images_statement(
+    *,
+    dataset_id: int,
+    images: list[dict[str, Any]],
+) -> Executable:
+    """
+    Prepare a single statement that upserts all images.
+
+    NOTE: images are sent as a single JSONB array (rather than as one set of
+    parameters per image), which is expanded into rows in the database.
+    Rows are inserted in the order of `images`, so that new images are
+    appended to the image list in this order.
+    """
+    new_images = (
+        func.jsonb_array_elements(
+            bindparam(
+                "images",
+                value=[
+                    dict(
+                        zarr_url=image["zarr_url"],
+                        origin=image.get("origin"),
+                        attributes=image["attributes"],
+                        types=image["types"],
+                    )
+                    for image in images
+                ],
+                type_=JSONB,
+            )
+        )
+        .table_valued(column("image", JSONB), with_ordinality="position")
+        .render_derived(name="new_images")
+    )
+    stmt = pg_insert(DatasetImage).from_select(
+        ["dataset_id", "zarr_url", "origin", "attributes", "types"],
+        select(
+            literal(dataset_id),
+            new_images.c.image["zarr_url"].astext,
+            new_images.c.image["origin"].astext,
+            new_images.c.image["attributes"],
+            new_images.c.image["types"],
+        ).order_by(new_images.c.position),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DatasetImage.dataset_id, DatasetImage.zarr_url],
+        set_=dict(
+            origin=stmt.excluded.origin,
+            attributes=stmt.excluded.attributes,
+            types=stmt.excluded.types,
+        ),
+    )
+    return stmt
+
+
+def bulk_upsert_images_no_commit(
+    *,
+    dataset_id: int,
+    images: list[dict[str, Any]],
+    db: Session,
+) -> None:
+    """
+    Insert or update many images of a dataset, without committing.
+
+    Existing images (identified by `zarr_url`) keep their position in the
+    image list, while new images are appended at its end.
+
+    Args:
+        dataset_id: The dataset ID
+        images: List of images to be upsert-ed.
+        db: A sync database session
+    """
+    len_images = len(images)
+    logger.debug(f"[bulk_upsert_images_no_commit] {len_images=}.")
+    if len_images == 0:
+        return None
+    db.execute(
+        _prepare_upsert_images_statement(dataset_id=dataset_id, images=images)
+    )
+
+
+async def bulk_upsert_images_async_no_commit(
+    *,
+    dataset_id: int,
+    images: list[dict[str, Any]],
+    db: AsyncSession,
+) -> None:
+    """
+    Insert or update many images of a dataset, without committing.
+
+    Existing images (identified by `zarr_url`) keep their position in the
+    image list, while new images are appended at its end.
+
+    Args:
+        dataset_id: The dataset ID
+        images: List of images to be upsert-ed.
+        db: An async database session
+    """
+    len_images = len(images)
+    logger.debug(f"[bulk_upsert_images_async_no_commit] {len_images=}.")
+    if len_images == 0:
+        return None
+    await db.execute(
+        _prepare_upsert_images_statement(dataset_id=dataset_id, images=images)
+    )
+
+
+def _prepare_delete_images_statements(
+    *,
+    dataset_id: int,
+    zarr_urls: list[str],
+) -> list[Executable]:
+    return [
+        delete(DatasetImage)
+        .where(DatasetImage.dataset_id == dataset_id)
+        .where(DatasetImage.zarr_url.in_(zarr_urls[ind : ind + _CHUNK_SIZE]))
+        for ind in range(0, len(zarr_urls), _CHUNK_SIZE)
+    ]
+
+
+def bulk_delete_images_no_commit(
+    *,
+    dataset_id: int,
+    zarr_urls: list[str],
+    db: Session,
+) -> None:
+    """
+    Remove many images of a dataset, without committing.
+
+    Args:
+        dataset_id: The dataset ID
+        zarr_urls: The `zarr_url`s of the images to be removed.
+        db: A sync database session
+    """
+    len_zarr_urls = len(zarr_urls)
+    logger.debug(f"[bulk_delete_images_no_commit] {len_zarr_urls=}.")
+    for stmt in _prepare_delete_images_statements(
+        dataset_id=dataset_id, zarr_urls=zarr_urls
+    ):
+        db.execute(stmt)
+
+
+async def bulk_delete_images_async_no_commit(
+    *,
+    dataset_id: int,
+    zarr_urls: list[str],
+    db: AsyncSession,
+) -> None:
+    """
+    Remove many images of a dataset, without committing.
+
+    Args:
+        dataset_id: The dataset ID
+        zarr_urls: The `zarr_url`s of the images to be removed.
+        db: An async database session
+    """
+    len_zarr_urls = len(zarr_urls)
+    logger.debug(f"[bulk_delete_images_async_no_commit] {len_zarr_urls=}.")
+    for stmt in _prepare_delete_images_statements(
+        dataset_id=dataset_id, zarr_urls=zarr_urls
+    ):
+        await db.execute(stmt)
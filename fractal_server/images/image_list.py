@@ -0,0 +1,92 @@
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+
+
+class ImageList:
+    """
+    Ordered list of images, indexed by `zarr_url`.
+
+    Lookups, appends, in-place replacements and removals all run in
+    (amortized) constant time. A removed image leaves an empty slot behind,
+    so that the positions of the other images are unchanged; empty slots are
+    dropped once they outnumber the images.
+    """
+
+    _images: list[dict[str, Any] | None]
+    _positions: dict[str, int]
+
+    def __init__(self, images: Iterable[dict[str, Any]] = ()) -> None:
+        self._images = []
+        self._positions = {}
+        for image in images:
+            self.append(image)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return (image for image in self._images if image is not None)
+
+    def __contains__(self, zarr_url: object) -> bool:
+        return zarr_url in self._positions
+
+    def get(self, zarr_url: str) -> dict[str, Any] | None:
+        """
+        Return the image with a given `zarr_url`, or `None` if missing.
+        """
+        position = self._positions.get(zarr_url)
+        if position is None:
+            return None
+        return self._images[position]
+
+    def append(self, image: dict[str, Any]) -> None:
+        """
+        Append a new image at the end of the list.
+
+        Raises:
+            ValueError: If an image with the same `zarr_url` is present.
+        """
+        zarr_url = image["zarr_url"]
+        if zarr_url in self._positions:
+            raise ValueError(f"Image with {zarr_url=} is already present.")
+        self._positions[zarr_url] = len(self._images)
+        self._images.append(image)
+
+    def replace(self, image: dict[str, Any]) -> dict[str, Any]:
+        """
+        Replace the image with the same `zarr_url`, keeping its position.
+
+        Returns:
+            The previous version of the image.
+
+        Raises:
+            KeyError: If no image with this `zarr_url` is present.
+        """
+        position = self._positions[image["zarr_url"]]
+        old_image = self._images[position]
+        self._images[position] = image
+        return old_image
+
+    def remove(self, zarr_url: str) -> dict[str, Any]:
+        """
+        Remove the image with a given `zarr_url`.
+
+        Returns:
+            The removed image.
+
+        Raises:
+            KeyError: If no image with this `zarr_url` is present.
+        """
+        position = self._positions.pop(zarr_url)
+        image = self._images[position]
+        self._images[position] = None
+        if len(self._images) > 2 * len(self._positions):
+            self._images = [img for img in self._images if img is not None]
+            self._positions = {
+                img["zarr_url"]: ind for ind, img in enumerate(self._images)
+            }
+        return image
+
+    def to_list(self) -> list[dict[str, Any]]:
+        return list(self)
@@ -0,0 +1,507 @@
+"""
+Columnar in-memory snapshots of dataset image lists.
+
+Read-only endpoints which filter the image list of a dataset (e.g. image
+queries and status/type checks) can use a snapshot instead of loading and
+parsing all images from the database at every request. Snapshots are kept in
+a per-process LRU cache, together with the `DatasetV2.images_version` they
+were built from, so that any write to the image list makes the cached snapshot
+obsolete.
+"""
+
+import asyncio
+import sys
+from array import array
+from collections import OrderedDict
+from typing import Any
+from typing import Hashable
+from weakref import WeakValueDictionary
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fractal_server.app.models.v2 import DatasetV2
+from fractal_server.config import get_settings
+from fractal_server.images.db_tools import get_dataset_images_async
+from fractal_server.images.tools import ImageFilter
+from fractal_server.logger import set_logger
+from fractal_server.syringe import Inject
+
+logger = set_logger(__name__)
+
+# Values of type columns
+_MISSING = 0
+_FALSE = 1
+_TRUE = 2
+
+# A value which is set for at least one image out of `_DENSE_RATIO` is stored
+# as a bitset (with one bit per image), otherwise as an array of positions
+# (with 32 bits per matching image).
+_DENSE_RATIO = 32
+
+
+def _value_key(value: Any) -> tuple[type, Any]:
+    """
+    Hashable key of an attribute value, which does not merge values of
+    different types (e.g. `1`, `1.0` and `True`).
+    """
+    return (type(value), value)
+
+
+def _lookup_keys(value: Any) -> tuple[tuple, ...]:
+    """
+    Keys of all stored values which are equal to a filter value, following
+    Python rules (as in `ImageFilter` and in the database queries), where
+    `True`, `1` and `1.0` are all equal.
+    """
+    if isinstance(value, str):
+        return ((str, value),)
+    return ((bool, value), (int, value), (float, value))
+
+
+def _positions_to_bitset(positions: list[int], size: int) -> int:
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+def _bitset_to_positions(
+    bitset: int,
+    *,
+    offset: int = 0,
+    limit: int | None = None,
+) -> list[int]:
+    """
+    Positions of the bits set in `bitset`, in increasing order, after
+    skipping the first `offset` ones and up to `limit` of them.
+    """
+    data = bitset.to_bytes((bitset.bit_length() + 7) // 8, "little")
+    positions = []
+    for byte_index, byte in enumerate(data):
+        if not byte:
+            continue
+        if offset > 0:
+            count = byte.bit_count()
+            if offset >= count:
+                offset -= count
+                continue
+        for bit in range(8):
+            if byte >> bit & 1:
+                if offset > 0:
+                    offset -= 1
+                    continue
+                if limit is not None and len(positions) == limit:
+                    return positions
+                positions.append(byte_index * 8 + bit)
+    return positions
+
+
+class _AttributeColumn:
+    """
+    Dictionary-encoded attribute column.
+
+    Attributes:
+        values: Distinct values of the attribute.
+        codes: For each image, the index of its value in `values` (or `-1`).
+        lookup: Map from value keys to indices in `values`.
+        matches: For each value, the images having that value (either as a
+            bitset or as an array of positions).
+    """
+
+    values: list[Any]
+    codes: array
+    lookup: dict[tuple, int]
+    matches: list[int | array]
+
+    def __init__(self, *, groups: dict[tuple, list[int]], size: int) -> None:
+        self.values = []
+        self.codes = array("i", [-1]) * size
+        self.lookup = {}
+        self.matches = []
+        for code, (value_key, positions) in enumerate(groups.items()):
+            self.values.append(value_key[1])
+            self.lookup[value_key] = code
+            for position in positions:
+                self.codes[position] = code
+            if len(positions) * _DENSE_RATIO >= size:
+                self.matches.append(_positions_to_bitset(positions, size))
+            else:
+                self.matches.append(array("I", positions))
+
+    def get_bitset(self, code: int, size: int) -> int:
+        match = self.matches[code]
+        if isinstance(match, int):
+            return match
+        return _positions_to_bitset(match, size)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.codes)
+            + sum(sys.getsizeof(value) for value in self.values)
+            + sum(sys.getsizeof(match) for match in self.matches)
+        )
+
+
+class _TypeColumn:
+    """
+    Type column, with one `_MISSING`/`_FALSE`/`_TRUE` byte per image and the
+    bitset of images for which the type is `True`.
+    """
+
+    values: bytearray
+    true: int
+
+    def __init__(self, *, values: bytearray) -> None:
+        self.values = values
+        self.true = _positions_to_bitset(
+            [ind for ind, value in enumerate(values) if value == _TRUE],
+            len(values),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values) + sys.getsizeof(self.true)
+
+
+class DatasetImageSnapshot:
+    """
+    Columnar, read-only copy of the image list of a dataset.
+
+    Images are identified by their position in the image list. The snapshot
+    holds a list of `zarr_url`s and one of `origin`s, a dictionary-encoded
+    column for each attribute and a column for each type. Filter sets are
+    evaluated as bitwise operations between bitsets (i.e. integers where bit
+    `i` refers to the image at position `i`), and only the matching images
+    are turned back into dictionaries.
+
+    Attributes:
+        size: Number of images.
+        nbytes: Approximate memory footprint.
+    """
+
+    size: int
+    nbytes: int
+    _zarr_urls: list[str]
+    _origins: list[str | None]
+    _positions: dict[str, int]
+    _attributes: dict[str, _AttributeColumn]
+    _types: dict[str, _TypeColumn]
+
+    def __init__(self, images: list[dict[str, Any]]) -> None:
+        self.size = len(images)
+        self._zarr_urls = [image["zarr_url"] for image in images]
+        self._origins = [image.get("origin") for image in images]
+        self._positions = {
+            zarr_url: position
+            for position, zarr_url in enumerate(self._zarr_urls)
+        }
+
+        attribute_groups: dict[str, dict[tuple, list[int]]] = {}
+        type_values: dict[str, bytearray] = {}
+        for position, image in enumerate(images):
+            for key, value in image["attributes"].items():
+                attribute_groups.setdefault(key, {}).setdefault(
+                    _value_key(value), []
+                ).append(position)
+            for key, value in image["types"].items():
+                if key not in type_values:
+                    type_values[key] = bytearray(self.size)
+                type_values[key][position] = _TRUE if value else _FALSE
+
+        self._attributes = {
+            key: _AttributeColumn(groups=groups, size=self.size)
+            for key, groups in attribute_groups.items()
+        }
+        self._types = {
+            key: _TypeColumn(values=values)
+            for key, values in type_values.items()
+        }
+
+        self.nbytes = (
+            sys.getsizeof(self._zarr_urls)
+            + sys.getsizeof(self._origins)
+            + sys.getsizeof(self._positions)
+            + sum(sys.getsizeof(zarr_url) for zarr_url in self._zarr_urls)
+            + sum(
+                sys.getsizeof(origin)
+                for origin in self._origins
+                if origin is not None
+            )
+            + sum(column.nbytes for column in self._attributes.values())
+            + sum(column.nbytes for column in self._types.values())
+        )
+
+    def get_bitset(
+        self,
+        image_filter: ImageFilter,
+        *,
+        zarr_url: str | None = None,
+    ) -> int:
+        """
+        Find the images which match a filter set.
+
+        Args:
+            image_filter: The filter set that images must match.
+            zarr_url: If set, only include the image with this `zarr_url`.
+
+        Returns:
+            Bitset of the matching images.
+        """
+        bitset = (1 << self.size) - 1
+
+        if zarr_url is not None:
+            position = self._positions.get(zarr_url)
+            if position is None:
+                return 0
+            bitset = 1 << position
+
+        # Missing types count as `False`
+        for key, value in image_filter.type_filters.items():
+            column = self._types.get(key)
+            if value:
+                bitset &= column.true if column is not None else 0
+            elif column is not None:
+                bitset &= ~column.true
+
+        for key, values in image_filter.attribute_filters.items():
+            if not bitset:
+                break
+            column = self._attributes.get(key)
+            if column is None:
+                return 0
+            key_bitset = 0
+            for value in values:
+                for value_key in _lookup_keys(value):
+                    code = column.lookup.get(value_key)
+                    if code is not None:
+                        key_bitset |= column.get_bitset(code, self.size)
+            bitset &= key_bitset
+
+        return bitset
+
+    def _get_image(self, position: int) -> dict[str, Any]:
+        attributes = {}
+        for key, column in self._attributes.items():
+            code = column.codes[position]
+            if code >= 0:
+                attributes[key] = column.values[code]
+        types = {}
+        for key, column in self._types.items():
+            value = column.values[position]
+            if value != _MISSING:
+                types[key] = value == _TRUE
+        return dict(
+            zarr_url=self._zarr_urls[position],
+            origin=self._origins[position],
+            attributes=attributes,
+            types=types,
+        )
+
+    def get_images(
+        self,
+        bitset: int,
+        *,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Build the images of a bitset, in image-list order.
+
+        Args:
+            bitset: Bitset of images, as returned by `get_bitset`.
+            offset: Number of images to skip.
+            limit: Maximum number of images (if `None`, include all of them).
+
+        Returns:
+            The list of images, as dictionaries.
+        """
+        return [
+            self._get_image(position)
+            for position in _bitset_to_positions(
+                bitset, offset=offset, limit=limit
+            )
+        ]
+
+    def get_page(
+        self,
+        image_filter: ImageFilter,
+        *,
+        zarr_url: str | None = None,
+        page: int,
+        page_size: int | None,
+    ) -> tuple[list[dict[str, Any]], int, int, int]:
+        """
+        Get a single page of the filtered image list.
+
+        This is the in-memory counterpart of `get_dataset_images_page_async`,
+        with the same arguments and output.
+        """
+        bitset = self.get_bitset(image_filter, zarr_url=zarr_url)
+        total_count = bitset.bit_count()
+        if page_size is None:
+            page_size = total_count
+        if total_count == 0:
+            return [], total_count, page, page_size
+
+        last_page = (total_count // page_size) + (total_count % page_size > 0)
+        page = min(page, last_page)
+        images = self.get_images(
+            bitset, offset=(page - 1) * page_size, limit=page_size
+        )
+        return images, total_count, page, page_size
+
+    def get_non_unique_types(self, bitset: int) -> list[str]:
+        """
+        Find the types which are `True` for some and `False` (or missing) for
+        other images of a bitset.
+
+        Args:
+            bitset: Bitset of images, as returned by `get_bitset`.
+
+        Returns:
+            Sorted list of type keys.
+        """
+        non_unique_types = []
+        for key, column in self._types.items():
+            true_bitset = bitset & column.true
+            if true_bitset and true_bitset != bitset:
+                non_unique_types.append(key)
+        return sorted(non_unique_types)
+
+
+class DatasetImageSnapshotCache:
+    """
+    LRU cache of dataset snapshots, within a memory budget.
+
+    Attributes:
+        max_bytes: Memory budget (snapshots larger than this are not cached).
+    """
+
+    max_bytes: int
+    _current_bytes: int
+    _snapshots: OrderedDict[int, tuple[Hashable, DatasetImageSnapshot]]
+
+    def __init__(self, *, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._current_bytes = 0
+        self._snapshots = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def get(
+        self,
+        *,
+        dataset_id: int,
+        version: Hashable,
+    ) -> DatasetImageSnapshot | None:
+        """
+        Return the snapshot of a given dataset version, if cached.
+        """
+        item = self._snapshots.get(dataset_id)
+        if item is None:
+            return None
+        cached_version, snapshot = item
+        if cached_version != version:
+            self._pop(dataset_id)
+            return None
+        self._snapshots.move_to_end(dataset_id)
+        return snapshot
+
+    def set(
+        self,
+        *,
+        dataset_id: int,
+        version: Hashable,
+        snapshot: DatasetImageSnapshot,
+    ) -> None:
+        """
+        Store the snapshot of a given dataset version, evicting the least
+        recently used snapshots when needed.
+        """
+        self._pop(dataset_id)
+        if snapshot.nbytes > self.max_bytes:
+            return None
+        while self._current_bytes + snapshot.nbytes > self.max_bytes:
+            self._pop(next(iter(self._snapshots)))
+        self._snapshots[dataset_id] = (version, snapshot)
+        self._current_bytes += snapshot.nbytes
+
+    def _pop(self, dataset_id: int) -> None:
+        item = self._snapshots.pop(dataset_id, None)
+        if item is not None:
+            self._current_bytes -= item[1].nbytes
+
+
+_snapshot_cache: DatasetImageSnapshotCache | None = None
+# Locks of the ongoing snapshot builds, by dataset ID and version (entries are
+# dropped as soon as no request holds a reference to their lock)
+_build_locks: WeakValueDictionary[tuple[int, Hashable], asyncio.Lock] = (
+    WeakValueDictionary()
+)
+
+
+def get_snapshot_cache() -> DatasetImageSnapshotCache | None:
+    """
+    Return the snapshot cache of the current process, or `None` if disabled
+    via `FRACTAL_IMAGE_SNAPSHOT_CACHE_MB`.
+    """
+    global _snapshot_cache
+    settings = Inject(get_settings)
+    max_bytes = settings.FRACTAL_IMAGE_SNAPSHOT_CACHE_MB * 1024**2
+    if max_bytes == 0:
+        _snapshot_cache = None
+    elif _snapshot_cache is None or _snapshot_cache.max_bytes != max_bytes:
+        _snapshot_cache = DatasetImageSnapshotCache(max_bytes=max_bytes)
+    return _snapshot_cache
+
+
+async def get_dataset_image_snapshot_async(
+    *,
+    dataset: DatasetV2,
+    db: AsyncSession,
+) -> DatasetImageSnapshot | None:
+    """
+    Get the snapshot of the current image list of a dataset.
+
+    Args:
+        dataset: The dataset, as loaded in the current request.
+        db: An async db session
+
+    Returns:
+        The snapshot, or `None` if snapshots are disabled.
+    """
+    cache = get_snapshot_cache()
+    if cache is None:
+        return None
+    # NOTE: the creation timestamp protects against IDs being re-used (e.g.
+    # after a database reset)
+    version = (dataset.timestamp_created, dataset.images_version)
+    snapshot = cache.get(dataset_id=dataset.id, version=version)
+    if snapshot is not None:
+        return snapshot
+
+    # Concurrent requests for the same dataset version wait for a single
+    # build, rather than building the same snapshot in parallel
+    lock = _build_locks.get((dataset.id, version))
+    if lock is None:
+        lock = asyncio.Lock()
+        _build_locks[(dataset.id, version)] = lock
+    async with lock:
+        snapshot = cache.get(dataset_id=dataset.id, version=version)
+        if snapshot is not None:
+            return snapshot
+        # NOTE: images are loaded after `dataset.images_version`, so that a
+        # concurrent write can only make the snapshot newer than its version
+        # (which leads to a rebuild at the next request).
+        images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+        # NOTE: the build is CPU-bound, and it would block the event loop
+        snapshot = await asyncio.to_thread(DatasetImageSnapshot, images)
+        logger.debug(
+            f"[get_dataset_image_snapshot_async] Built snapshot for "
+            f"dataset {dataset.id} (version {dataset.images_version}), with "
+            f"{snapshot.size} images and {snapshot.nbytes} bytes."
+        )
+        cache.set(dataset_id=dataset.id, version=version, snapshot=snapshot)
+    return snapshot
@@ -1,20 +1,40 @@
 import time
 from typing import Any
 
+from sqlalchemy import ColumnElement
+from sqlalchemy import Executable
 from sqlalchemy import Select
+from sqlalchemy import String
+from sqlalchemy import any_
+from sqlalchemy import bindparam
+from sqlalchemy import true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlmodel import delete
+from sqlmodel import false
+from sqlmodel import func
 from sqlmodel import select
 
 from fractal_server.app.db import get_sync_db
+from fractal_server.app.models.v2 import DatasetImage
 from fractal_server.app.models.v2 import HistoryImageCache
+from fractal_server.app.models.v2 import HistoryRun
+from fractal_server.app.models.v2 import HistoryStatusSummary
 from fractal_server.app.models.v2 import HistoryUnit
+from fractal_server.app.schemas.v2 import HistoryUnitStatus
 from fractal_server.app.schemas.v2 import HistoryUnitStatusWithUnset
+from fractal_server.images.db_tools import _apply_image_filters
+from fractal_server.images.tools import ImageFilter
 from fractal_server.logger import set_logger
 
 logger = set_logger(__name__)
 
 
 IMAGE_STATUS_KEY = "__wftask_dataset_image_status__"
+IMAGE_HAS_WARNINGS_KEY = "has_warnings"
 
 
 def _enriched_image(
@@ -179,3 +199,501 @@ def enrich_images_unsorted_sync(
     )
 
     return output
+
+
+async def get_history_status_version_async(
+    *,
+    dataset_id: int,
+    workflowtask_id: int,
+    db: AsyncSession,
+) -> int | None:
+    """
+    Get the `HistoryStatusSummary.version` of a dataset/workflow-task pair.
+
+    The version changes whenever an image is linked to a new history unit,
+    or when it is unlinked, or when the status or warning flag of a linked
+    unit is updated. It can thus be used (together with
+    `DatasetV2.images_version`) to detect changes of status-enriched image
+    lists, through a single primary-key lookup.
+
+    Args:
+        dataset_id: The dataset ID
+        workflowtask_id: The workflow-task ID
+        db: An async db session
+
+    Returns:
+        The version, or `None` if the pair has no status summary yet.
+    """
+    res = await db.execute(
+        select(HistoryStatusSummary.version)
+        .where(HistoryStatusSummary.dataset_id == dataset_id)
+        .where(HistoryStatusSummary.workflowtask_id == workflowtask_id)
+    )
+    return res.scalar_one_or_none()
+
+
+def _prepare_images_with_status_query(
+    *,
+    dataset_id: int,
+    workflowtask_id: int,
+    image_filter: ImageFilter,
+    count: bool = False,
+) -> Select:
+    """
+    Join images with their latest history units, and filter them.
+
+    The latest history unit of each image is found through a `LATERAL`
+    subquery, so that each image costs a single primary-key lookup in
+    `HistoryImageCache` (independently of table statistics). Images which
+    were never processed by the workflow task have no history unit (and an
+    `unset` status), due to the outer join.
+
+    Note: the query does not include `.order_by`.
+
+    Args:
+        dataset_id: The dataset ID
+        workflowtask_id: The workflow-task ID
+        image_filter: The filter set that images must match (the
+            `IMAGE_STATUS_KEY` attribute filter applies to the status).
+        count: Whether to only select the number of matching images.
+    """
+    attribute_filters = dict(image_filter.attribute_filters)
+    status_values = attribute_filters.pop(IMAGE_STATUS_KEY, None)
+
+    latest_unit = (
+        select(HistoryUnit.status, HistoryUnit.has_warnings)
+        .join(
+            HistoryImageCache,
+            HistoryImageCache.latest_history_unit_id == HistoryUnit.id,
+        )
+        # Compare with the collation of the primary-key index
+        .where(
+            HistoryImageCache.zarr_url
+            == DatasetImage.zarr_url.collate("default")
+        )
+        .where(HistoryImageCache.dataset_id == dataset_id)
+        .where(HistoryImageCache.workflowtask_id == workflowtask_id)
+        # Prevent Postgres from turning the subquery into a plain join
+        .limit(1)
+        .lateral("latest_unit")
+    )
+    if count:
+        stm = select(func.count(DatasetImage.id)).select_from(DatasetImage)
+    else:
+        stm = select(
+            DatasetImage.zarr_url,
+            DatasetImage.origin,
+            DatasetImage.attributes,
+            DatasetImage.types,
+            latest_unit.c.status,
+            latest_unit.c.has_warnings,
+        ).select_from(DatasetImage)
+    if not count or status_values is not None:
+        stm = stm.outerjoin(latest_unit, true())
+    stm = stm.where(DatasetImage.dataset_id == dataset_id)
+    stm = _apply_image_filters(
+        stm,
+        image_filter=ImageFilter(
+            type_filters=image_filter.type_filters,
+            attribute_filters=attribute_filters,
+        ),
+    )
+    if status_values is not None:
+        statuses = [value for value in status_values if isinstance(value, str)]
+        if statuses:
+            stm = stm.where(
+                func.coalesce(
+                    latest_unit.c.status, HistoryUnitStatusWithUnset.UNSET
+                ).in_(statuses)
+            )
+        else:
+            stm = stm.where(false())
+    return stm
+
+
+async def get_images_with_status_page_async(
+    *,
+    dataset_id: int,
+    workflowtask_id: int,
+    image_filter: ImageFilter,
+    include_warnings: bool,
+    page: int,
+    page_size: int | None,
+    db: AsyncSession,
+) -> tuple[list[dict[str, Any]], int, int]:
+    """
+    Get a single page of the status-enriched and filtered image list.
+
+    Joining, filtering, sorting (by `zarr_url`) and pagination all take place
+    in the database, so that only the requested page of images is loaded.
+
+    Args:
+        dataset_id: The dataset ID
+        workflowtask_id: The workflow-task ID
+        image_filter: The filter set that images must match (the
+            `IMAGE_STATUS_KEY` attribute filter applies to the status).
+        include_warnings: Whether to add the `has_warnings` flag to images.
+        page: The requested page.
+        page_size: The page size (if `None`, include all matching images).
+        db: An async db session
+
+    Returns:
+        Tuple with the images of the requested page, the total number of
+        matching images and the actual page size.
+    """
+    t_0 = time.perf_counter()
+    stm_count = _prepare_images_with_status_query(
+        dataset_id=dataset_id,
+        workflowtask_id=workflowtask_id,
+        image_filter=image_filter,
+        count=True,
+    )
+    res = await db.execute(stm_count)
+    total_count = res.scalar_one()
+    if page_size is None:
+        page_size = total_count
+    if page_size == 0:
+        return [], total_count, page_size
+
+    stm = (
+        _prepare_images_with_status_query(
+            dataset_id=dataset_id,
+            workflowtask_id=workflowtask_id,
+            image_filter=image_filter,
+        )
+        .order_by(DatasetImage.zarr_url)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    res = await db.execute(stm)
+    images = []
+    for row in res.all():
+        status = row.status or HistoryUnitStatusWithUnset.UNSET
+        image = dict(
+            zarr_url=row.zarr_url,
+            origin=row.origin,
+            attributes=row.attributes | {IMAGE_STATUS_KEY: status},
+            types=row.types,
+        )
+        if include_warnings:
+            image[IMAGE_HAS_WARNINGS_KEY] = bool(row.has_warnings)
+        images.append(image)
+    t_1 = time.perf_counter()
+    logger.debug(
+        f"[get_images_with_status_page_async] {dataset_id=}, "
+        f"{workflowtask_id=}, {total_count=}, elapsed={t_1 - t_0:.5f} s"
+    )
+    return images, total_count, page_size
+
+
+def _prepare_summary_upsert_statement(
+    select_stm: Select,
+    *,
+    columns: list[str],
+) -> Insert:
+    """
+    Add the counters selected by `select_stm` to `HistoryStatusSummary`.
+
+    Args:
+        select_stm: Statement selecting `dataset_id`, `workflowtask_id` and
+            the values to be added to `columns`.
+        columns: Names of the counter columns.
+    """
+    stm = pg_insert(HistoryStatusSummary).from_select(
+        ["dataset_id", "workflowtask_id", *columns],
+        select_stm,
+    )
+    return stm.on_conflict_do_update(
+        index_elements=[
+            HistoryStatusSummary.dataset_id,
+            HistoryStatusSummary.workflowtask_id,
+        ],
+        set_={
+            **{
+                column: getattr(HistoryStatusSummary, column)
+                + getattr(stm.excluded, column)
+                for column in columns
+            },
+            "version": HistoryStatusSummary.version + 1,
+        },
+    )
+
+
+def _prepare_image_counters_statement(
+    *,
+    where: list[ColumnElement[bool]],
+    sign: int,
+) -> Insert:
+    """
+    Add (`sign=1`) or subtract (`sign=-1`) the contribution of some
+    `HistoryImageCache` rows to the image counters of `HistoryStatusSummary`.
+
+    A change of `HistoryImageCache` rows (or of the status or warning flag of
+    their latest history units) is reflected in the counters by subtracting
+    the contribution of the affected rows before the change and adding it
+    back after the change, within the same transaction.
+
+    Args:
+        where:
+            Conditions selecting the `HistoryImageCache` rows (which may
+            refer to their latest `HistoryUnit`).
+        sign:
+    """
+    select_stm = (
+        select(
+            HistoryImageCache.dataset_id,
+            HistoryImageCache.workflowtask_id,
+            *(
+                sign * func.count().filter(HistoryUnit.status == unit_status)
+                for unit_status in HistoryUnitStatus
+            ),
+            sign * func.count().filter(HistoryUnit.has_warnings.is_(True)),
+        )
+        .join(
+            HistoryUnit,
+            HistoryImageCache.latest_history_unit_id == HistoryUnit.id,
+        )
+        .where(*where)
+        .group_by(
+            HistoryImageCache.dataset_id,
+            HistoryImageCache.workflowtask_id,
+        )
+    )
+    return _prepare_summary_upsert_statement(
+        select_stm,
+        columns=[
+            *(f"num_{unit_status}_images" for unit_status in HistoryUnitStatus),
+            "num_images_with_warnings",
+        ],
+    )
+
+
+def _prepare_unit_counters_statement(
+    *,
+    where: ColumnElement[bool],
+    sign: int,
+) -> Insert:
+    """
+    Add (`sign=1`) or subtract (`sign=-1`) the contribution of some history
+    units to the `num_units_with_warnings` counters of `HistoryStatusSummary`.
+
+    Args:
+        where: Condition selecting the `HistoryUnit` rows.
+        sign:
+    """
+    select_stm = (
+        select(
+            HistoryRun.dataset_id,
+            HistoryRun.workflowtask_id,
+            sign * func.count().filter(HistoryUnit.has_warnings.is_(True)),
+        )
+        .join(HistoryRun, HistoryUnit.history_run_id == HistoryRun.id)
+        .where(where)
+        .where(HistoryRun.workflowtask_id.is_not(None))
+        .group_by(HistoryRun.dataset_id, HistoryRun.workflowtask_id)
+    )
+    return _prepare_summary_upsert_statement(
+        select_stm,
+        columns=["num_units_with_warnings"],
+    )
+
+
+def _prepare_unit_statements(
+    *,
+    where: ColumnElement[bool],
+    sign: int,
+) -> list[Insert]:
+    return [
+        _prepare_image_counters_statement(where=[where], sign=sign),
+        _prepare_unit_counters_statement(where=where, sign=sign),
+    ]
+
+
+def subtract_history_units_from_summary_no_commit(
+    *,
+    history_unit_ids: list[int],
+    db: Session,
+) -> None:
+    """
+    Subtract the contribution of some history units (and of the images that
+    they are the latest unit of) from `HistoryStatusSummary`.
+
+    To be called before updating the status or warning flag of the units,
+    and followed by `add_history_units_to_summary_no_commit`. Callers are
+    responsible for chunking `history_unit_ids`.
+
+    Args:
+        history_unit_ids:
+        db: A sync db session
+    """
+    for stm in _prepare_unit_statements(
+        where=HistoryUnit.id.in_(history_unit_ids), sign=-1
+    ):
+        db.execute(stm)
+
+
+def add_history_units_to_summary_no_commit(
+    *,
+    history_unit_ids: list[int],
+    db: Session,
+) -> None:
+    """
+    Add the contribution of some history units (and of the images that they
+    are the latest unit of) to `HistoryStatusSummary`.
+
+    Args:
+        history_unit_ids:
+        db: A sync db session
+    """
+    for stm in _prepare_unit_statements(
+        where=HistoryUnit.id.in_(history_unit_ids), sign=1
+    ):
+        db.execute(stm)
+
+
+async def subtract_history_run_from_summary_async_no_commit(
+    *,
+    history_run_id: int,
+    db: AsyncSession,
+) -> None:
+    """
+    Subtract the contribution of all units of a history run (and of the
+    images that they are the latest unit of) from `HistoryStatusSummary`.
+
+    To be called before updating the status of the units, and followed by
+    `add_history_run_to_summary_async_no_commit`.
+
+    Args:
+        history_run_id:
+        db: An async db session
+    """
+    for stm in _prepare_unit_statements(
+        where=HistoryUnit.history_run_id == history_run_id, sign=-1
+    ):
+        await db.execute(stm)
+
+
+async def add_history_run_to_summary_async_no_commit(
+    *,
+    history_run_id: int,
+    db: AsyncSession,
+) -> None:
+    """
+    Add the contribution of all units of a history run (and of the images
+    that they are the latest unit of) to `HistoryStatusSummary`.
+
+    Args:
+        history_run_id:
+        db: An async db session
+    """
+    for stm in _prepare_unit_statements(
+        where=HistoryUnit.history_run_id == history_run_id, sign=1
+    ):
+        await db.execute(stm)
+
+
+def set_latest_history_run_no_commit(
+    *,
+    dataset_id: int,
+    workflowtask_id: int,
+    history_run_id: int,
+    db: Session,
+) -> None:
+    """
+    Set the latest `HistoryRun` of a dataset/workflow-task pair.
+
+    Args:
+        dataset_id: The dataset ID
+        workflowtask_id: The workflow-task ID
+        history_run_id: The ID of the newly created `HistoryRun`.
+        db: A sync db session
+    """
+    stm = pg_insert(HistoryStatusSummary).values(
+        dataset_id=dataset_id,
+        workflowtask_id=workflowtask_id,
+        latest_history_run_id=history_run_id,
+    )
+    stm = stm.on_conflict_do_update(
+        index_elements=[
+            HistoryStatusSummary.dataset_id,
+            HistoryStatusSummary.workflowtask_id,
+        ],
+        set_=dict(
+            latest_history_run_id=stm.excluded.latest_history_run_id,
+            version=HistoryStatusSummary.version + 1,
+        ),
+    )
+    db.execute(stm)
+
+
+def _prepare_delete_image_cache_statements(
+    *,
+    dataset_id: int,
+    zarr_urls: list[str],
+    workflowtask_id: int | None,
+) -> list[Executable]:
+    where = [
+        HistoryImageCache.dataset_id == dataset_id,
+        HistoryImageCache.zarr_url
+        == any_(bindparam("zarr_urls", value=zarr_urls, type_=ARRAY(String))),
+    ]
+    if workflowtask_id is not None:
+        where.append(HistoryImageCache.workflowtask_id == workflowtask_id)
+    return [
+        _prepare_image_counters_statement(where=where, sign=-1),
+        delete(HistoryImageCache).where(*where),
+    ]
+
+
+def delete_image_cache_no_commit(
+    *,
+    dataset_id: int,
+    zarr_urls: list[str],
+    workflowtask_id: int | None = None,
+    db: Session,
+) -> None:
+    """
+    Delete the `HistoryImageCache` rows of some images, and update
+    `HistoryStatusSummary` accordingly.
+
+    Args:
+        dataset_id: The dataset ID
+        zarr_urls: The `zarr_url`s of the images.
+        workflowtask_id: If set, only delete rows of this workflow task.
+        db: A sync db session
+    """
+    if not zarr_urls:
+        return
+    for stm in _prepare_delete_image_cache_statements(
+        dataset_id=dataset_id,
+        zarr_urls=zarr_urls,
+        workflowtask_id=workflowtask_id,
+    ):
+        db.execute(stm)
+
+
+async def delete_image_cache_async_no_commit(
+    *,
+    dataset_id: int,
+    zarr_urls: list[str],
+    workflowtask_id: int | None = None,
+    db: AsyncSession,
+) -> None:
+    """
+    Delete the `HistoryImageCache` rows of some images, and update
+    `HistoryStatusSummary` accordingly.
+
+    Args:
+        dataset_id: The dataset ID
+        zarr_urls: The `zarr_url`s of the images.
+        workflowtask_id: If set, only delete rows of this workflow task.
+        db: An async db session
+    """
+    if not zarr_urls:
+        return
+    for stm in _prepare_delete_image_cache_statements(
+        dataset_id=dataset_id,
+        zarr_urls=zarr_urls,
+        workflowtask_id=workflowtask_id,
+    ):
+        await db.execute(stm)
@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from copy import copy
 from typing import Any
 from typing import TypedDict
@@ -29,12 +30,88 @@ def find_image_by_zarr_url(
     Returns:
         The first image from `images` which has zarr_url equal to `zarr_url`.
     """
-    image_urls = [img["zarr_url"] for img in images]
-    try:
-        ind = image_urls.index(zarr_url)
-    except ValueError:
-        return None
-    return dict(image=copy(images[ind]), index=ind)
+    for ind, image in enumerate(images):
+        if image["zarr_url"] == zarr_url:
+            return dict(image=copy(image), index=ind)
+    return None
+
+
+class ImageFilter:
+    """
+    Predicate for a filter set, to be built once and applied to many images.
+
+    Compared to checking the filter dictionaries for each image, `match`
+    relies on pre-computed type checks and sets of accepted attribute values,
+    it checks attributes with fewer accepted values first (as they are more
+    likely to reject an image), and it skips empty parts of the filter set.
+
+    Attributes:
+        type_filters:
+        attribute_filters:
+        is_empty:
+            Whether the filter set has no type or attribute filters, and
+            then matches every image.
+        match: Function that finds whether an image matches the filter set.
+    """
+
+    type_filters: dict[str, bool]
+    attribute_filters: AttributeFilters
+    is_empty: bool
+    match: Callable[[dict[str, Any]], bool]
+
+    def __init__(
+        self,
+        *,
+        type_filters: dict[str, bool] | None = None,
+        attribute_filters: AttributeFilters | None = None,
+    ) -> None:
+        self.type_filters = type_filters or {}
+        self.attribute_filters = attribute_filters or {}
+        self.is_empty = not self.type_filters and not self.attribute_filters
+        self.match = self._compile()
+
+    def _compile(self) -> Callable[[dict[str, Any]], bool]:
+        type_checks = tuple(self.type_filters.items())
+        attribute_checks = tuple(
+            sorted(
+                (
+                    (key, frozenset(values))
+                    for key, values in self.attribute_filters.items()
+                ),
+                key=lambda item: len(item[1]),
+            )
+        )
+
+        def _match_types(image: dict[str, Any]) -> bool:
+            # Missing types count as `False`
+            types = image["types"]
+            for key, value in type_checks:
+                if types.get(key, False) != value:
+                    return False
+            return True
+
+        def _match_attributes(image: dict[str, Any]) -> bool:
+            attributes = image["attributes"]
+            for key, values in attribute_checks:
+                try:
+                    if attributes.get(key) not in values:
+                        return False
+                except TypeError:
+                    # Non-hashable values cannot match any filter value
+                    return False
+            return True
+
+        def _match(image: dict[str, Any]) -> bool:
+            return _match_types(image) and _match_attributes(image)
+
+        if not attribute_checks and not type_checks:
+            return lambda image: True
+        elif not attribute_checks:
+            return _match_types
+        elif not type_checks:
+            return _match_attributes
+        else:
+            return _match
 
 
 def match_filter(
@@ -46,6 +123,9 @@ def match_filter(
     """
     Find whether an image matches a filter set.
 
+    Note: when checking many images against the same filter set, use
+    `ImageFilter` directly.
+
     Args:
         image: A single image.
         type_filters:
@@ -54,18 +134,11 @@ def match_filter(
     Returns:
         Whether the image matches the filter set.
     """
-
-    # Verify match with types (using a False default)
-    for key, value in type_filters.items():
-        if image["types"].get(key, False) != value:
-            return False
-
-    # Verify match with attributes (only for not-None filters)
-    for key, values in attribute_filters.items():
-        if image["attributes"].get(key) not in values:
-            return False
-
-    return True
+    image_filter = ImageFilter(
+        type_filters=type_filters,
+        attribute_filters=attribute_filters,
+    )
+    return image_filter.match(image)
 
 
 def filter_image_list(
@@ -76,6 +149,9 @@ def filter_image_list(
     """
     Compute a sublist with images that match a filter set.
 
+    Note: the output list holds references to the `images` elements (and not
+    copies), which must therefore not be modified in place.
+
     Args:
         images: A list of images.
         type_filters:
@@ -88,18 +164,13 @@ def filter_image_list(
     # When no filter is provided, return all images
     if type_filters is None and attribute_filters is None:
         return images
-    actual_type_filters = type_filters or {}
-    actual_attribute_filters = attribute_filters or {}
-
-    filtered_images = [
-        copy(this_image)
-        for this_image in images
-        if match_filter(
-            image=this_image,
-            type_filters=actual_type_filters,
-            attribute_filters=actual_attribute_filters,
-        )
-    ]
+    image_filter = ImageFilter(
+        type_filters=type_filters,
+        attribute_filters=attribute_filters,
+    )
+    if image_filter.is_empty:
+        return list(images)
+    filtered_images = list(filter(image_filter.match, images))
     return filtered_images
 
 
@@ -1,6 +1,8 @@
+import asyncio
 import os
 import time
 from contextlib import asynccontextmanager
+from contextlib import suppress
 from datetime import datetime
 from itertools import chain
 from typing import AsyncIterator
@@ -17,6 +19,8 @@ from fractal_server import __VERSION__
 from fractal_server.app.schemas.v2 import ResourceType
 from fractal_server.exceptions import HTTPExceptionWithData
 
+from .app.events import event_broker
+from .app.history_compaction import compact_history_runs_periodically
 from .app.routes.aux._runner import _backend_supports_shutdown
 from .app.shutdown import cleanup_after_shutdown
 from .config import get_db_settings
@@ -96,6 +100,20 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
     else:
         app.state.fractal_ssh_list = None
 
+    if settings.FRACTAL_HISTORY_RETENTION_DAYS is not None:
+        app.state.history_compaction_task = asyncio.create_task(
+            compact_history_runs_periodically(
+                older_than_days=settings.FRACTAL_HISTORY_RETENTION_DAYS,
+                interval=settings.FRACTAL_HISTORY_COMPACTION_INTERVAL,
+            )
+        )
+        logger_startup.info(
+            "Started periodic compaction of history units "
+            f"(retention: {settings.FRACTAL_HISTORY_RETENTION_DAYS} days)."
+        )
+    else:
+        app.state.history_compaction_task = None
+
     config_uvicorn_loggers()
     logger_startup.info("END")
     reset_logger_handlers(logger_startup)
@@ -113,6 +131,13 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
 
         app.state.fractal_ssh_list.close_all()
 
+    if app.state.history_compaction_task is not None:
+        app.state.history_compaction_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await app.state.history_compaction_task
+
+    await event_broker.close()
+
     logger_teardown.info(
         f"Current worker with pid {os.getpid()} is shutting down. "
         f"Current jobs: {app.state.jobs=}"
@@ -148,6 +173,10 @@ def _endpoint_has_background_task(method: str, path: str) -> bool:
     return has_background_task
 
 
+def _endpoint_is_event_stream(method: str, path: str) -> bool:
+    return method == "GET" and path.endswith("/events/")
+
+
 class SlowResponseMiddleware:
     def __init__(self, app: FastAPI, time_threshold: float) -> None:
         self.app = app
@@ -159,6 +188,7 @@ class SlowResponseMiddleware:
         if (
             scope["type"] != "http"  # e.g. `scope["type"] == "lifespan"`
             or _endpoint_has_background_task(scope["method"], scope["path"])
+            or _endpoint_is_event_stream(scope["method"], scope["path"])
         ):
             await self.app(scope, receive, send)
             return
@@ -0,0 +1,37 @@
+"""Set C collation for datasetimage zarr_url
+
+Revision ID: 3c508f958bb6
+Revises: 63623ab1defe
+Create Date: 2026-10-17 08:43:51.003420
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c508f958bb6"
+down_revision = "63623ab1defe"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NOTE: collation changes are not detected by autogenerate
+    with op.batch_alter_table("datasetimage", schema=None) as batch_op:
+        batch_op.alter_column(
+            "zarr_url",
+            existing_type=sa.VARCHAR(),
+            type_=sa.String(collation="C"),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("datasetimage", schema=None) as batch_op:
+        batch_op.alter_column(
+            "zarr_url",
+            existing_type=sa.String(collation="C"),
+            type_=sa.VARCHAR(),
+            existing_nullable=False,
+        )
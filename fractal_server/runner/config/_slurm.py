@@ -81,6 +81,48 @@ class BatchingConfigSet(BaseModel):
     max_mem_per_job: MemMBType
 
 
+class JobArrayConfigSet(BaseModel):
+    """
+    Options to configure the submission of several SLURM jobs as the elements
+    of a SLURM job array (see https://slurm.schedmd.com/job_array.html).
+
+    Attributes:
+        max_array_size:
+            Maximum number of elements of a single job array (it must not
+            exceed the `MaxArraySize` option of the SLURM cluster).
+        max_running_elements:
+            Maximum number of elements of a job array which may run
+            simultaneously (corresponding to the `%` separator of the
+            `--array` option).
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    max_array_size: PositiveInt = 1000
+    max_running_elements: PositiveInt | None = None
+
+
+class ArtifactStreamingConfigSet(BaseModel):
+    """
+    Options to configure the streaming of the artifacts of finished SLURM
+    jobs (only for `slurm_ssh` resources).
+
+    Attributes:
+        max_jobs_per_stream:
+            Maximum number of SLURM jobs whose artifacts are fetched through
+            a single SSH channel.
+        max_concurrent_streams:
+            Maximum number of SSH channels which are open simultaneously, for
+            a single runner (it should stay well below the `MaxSessions`
+            option of the SSH server).
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    max_jobs_per_stream: PositiveInt = 100
+    max_concurrent_streams: PositiveInt = 4
+
+
 class JobRunnerConfigSLURM(BaseModel):
     """
     Runner-configuration specifications, for a `slurm_sudo` or
@@ -129,6 +171,14 @@ class JobRunnerConfigSLURM(BaseModel):
             Key-value pairs to be included as `export`-ed variables in SLURM
             submission script, after prepending values with the user's cache
             directory.
+        job_array_config:
+            If set, submit the SLURM jobs of a parallel or compound task as
+            the elements of job arrays, with a single `sbatch` command per
+            array.
+        artifact_streaming_config:
+            If set, the artifacts of finished SLURM jobs of a `slurm_ssh`
+            resource are streamed over SSH and extracted locally on the fly,
+            rather than being archived remotely and then transferred.
     """
 
     model_config = ConfigDict(extra="forbid")
@@ -137,3 +187,5 @@ class JobRunnerConfigSLURM(BaseModel):
     gpu_slurm_config: SlurmConfigSet | None = None
     batching_config: BatchingConfigSet
     user_local_exports: DictStrStr = Field(default_factory=dict)
+    job_array_config: JobArrayConfigSet | None = None
+    artifact_streaming_config: ArtifactStreamingConfigSet | None = None
@@ -0,0 +1,130 @@
+import time
+from typing import Self
+
+# Shortest waiting time between two completion checks, in seconds
+MIN_CHECK_INTERVAL = 0.5
+# Growth factor of waiting times, after checks that find no finished job
+BACKOFF_FACTOR = 2.0
+# Longest `squeue` interval, as a multiple of the runner poll interval
+MAX_SQUEUE_INTERVAL_FACTOR = 8
+
+
+class PollSchedule:
+    """
+    Schedule of completion checks for the SLURM jobs of a single submission.
+
+    Two kinds of checks are scheduled:
+
+    1. Output-file checks, which look for the output files written by
+       `slurm_common/remote.py` at the end of each task. The interval
+       between two checks starts from `min_check_interval`, it grows by
+       `BACKOFF_FACTOR` after each check which finds no finished job (up to
+       `poll_interval`), and it is reset after each check which finds some.
+       Jobs which could not start right away (e.g. because of the
+       `%max_running_elements` limit of a job array) are expected to finish
+       in waves, where each wave lasts as long as the first finished job.
+       The interval is then also shortened so that a check takes place when
+       the next wave is expected to finish.
+    2. `squeue` checks, which are only needed for jobs that end without
+       writing their output files (e.g. because they were cancelled or they
+       reached their time limit). The interval between two checks starts
+       from `poll_interval` and it grows by `BACKOFF_FACTOR` after each
+       check which finds no finished job (up to
+       `MAX_SQUEUE_INTERVAL_FACTOR * poll_interval`).
+
+    Attributes:
+        start_time: Submission time, from `time.perf_counter`.
+        poll_interval: The poll interval of the runner, in seconds.
+        min_check_interval:
+            Shortest waiting time between two output-file checks.
+    """
+
+    start_time: float
+    poll_interval: float
+    min_check_interval: float
+    _check_interval: float
+    _squeue_interval: float
+    _last_squeue_time: float
+    _job_duration: float | None
+    _last_finished_time: float | None
+
+    def __init__(
+        self: Self,
+        *,
+        poll_interval: float,
+        start_time: float | None = None,
+    ) -> None:
+        self.start_time = (
+            time.perf_counter() if start_time is None else start_time
+        )
+        self.poll_interval = poll_interval
+        self.min_check_interval = min(MIN_CHECK_INTERVAL, poll_interval)
+        self._check_interval = self.min_check_interval
+        self._squeue_interval = poll_interval
+        self._last_squeue_time = self.start_time
+        self._job_duration = None
+        self._last_finished_time = None
+
+    def record_output_check(
+        self: Self, *, now: float, num_finished: int
+    ) -> None:
+        """
+        Update the schedule after an output-file check.
+
+        Args:
+            now: Time of the check, from `time.perf_counter`.
+            num_finished: Number of finished jobs found by the check.
+        """
+        if num_finished > 0:
+            if self._job_duration is None:
+                self._job_duration = now - self.start_time
+            self._last_finished_time = now
+            self._check_interval = self.min_check_interval
+        else:
+            self._check_interval = min(
+                self._check_interval * BACKOFF_FACTOR,
+                self.poll_interval,
+            )
+
+    def record_squeue(self: Self, *, now: float, num_finished: int) -> None:
+        """
+        Update the schedule after a `squeue` check.
+
+        Args:
+            now: Time of the check, from `time.perf_counter`.
+            num_finished: Number of finished jobs found by the check.
+        """
+        self._last_squeue_time = now
+        if num_finished > 0:
+            self._squeue_interval = self.poll_interval
+        else:
+            self._squeue_interval = min(
+                max(self._squeue_interval, self.poll_interval) * BACKOFF_FACTOR,
+                MAX_SQUEUE_INTERVAL_FACTOR * self.poll_interval,
+            )
+
+    def request_squeue(self: Self) -> None:
+        """
+        Make the next `squeue` check due right away (e.g. after `scancel`).
+        """
+        self._squeue_interval = 0.0
+
+    def is_squeue_due(self: Self, now: float) -> bool:
+        return now - self._last_squeue_time >= self._squeue_interval
+
+    def next_check_interval(self: Self, now: float) -> float:
+        """
+        Waiting time before the next output-file check.
+
+        Args:
+            now: Current time, from `time.perf_counter`.
+        """
+        interval = self._check_interval
+        if self._last_finished_time is not None:
+            expected_time = self._last_finished_time + self._job_duration
+            time_left = expected_time - now
+            if time_left > 0:
+                interval = min(
+                    interval, max(time_left, self.min_check_interval)
+                )
+        return interval
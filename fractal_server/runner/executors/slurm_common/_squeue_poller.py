@@ -0,0 +1,150 @@
+"""
+Process-wide `squeue` polling, shared by concurrent SLURM runners.
+
+Each running job has its own runner, and without this module each runner
+would run its own `squeue` command at every poll. Runners which query the
+same SLURM cluster with the same credentials rather share a `SqueuePoller`,
+which runs a single `squeue` command for the jobs of all runners and reuses
+its output for all requests received within `max_age` seconds.
+"""
+
+import math
+import time
+from collections.abc import Callable
+from collections.abc import Hashable
+from threading import Lock
+from typing import Self
+
+from fractal_server.logger import set_logger
+
+from ._job_states import STATES_FINISHED
+from .slurm_job_task_models import get_array_job_id
+
+logger = set_logger(__name__)
+
+
+class SqueuePoller:
+    """
+    Shared `squeue` poller for the runners of a SLURM cluster.
+
+    Attributes:
+        max_age:
+            Maximum age (in seconds) of a `squeue` output, for it to be used
+            for a new request.
+    """
+
+    max_age: float
+    _lock: Lock
+    _job_ids: dict[Hashable, set[str]]
+    _queried_job_ids: set[str]
+    _statuses: dict[str, str]
+    _timestamp: float
+
+    def __init__(self: Self, *, max_age: float) -> None:
+        self.max_age = max_age
+        self._lock = Lock()
+        self._job_ids = {}
+        self._queried_job_ids = set()
+        self._statuses = {}
+        self._timestamp = -math.inf
+
+    def get_statuses(
+        self: Self,
+        *,
+        requester: Hashable,
+        job_ids: list[str],
+        run_squeue: Callable[..., str],
+    ) -> dict[str, str]:
+        """
+        Get the SLURM statuses of some jobs.
+
+        If the latest `squeue` output includes all `job_ids` and it is more
+        recent than `self.max_age`, it is used right away. Otherwise, a new
+        `squeue` command is run for `job_ids` and for the jobs of all other
+        requesters.
+
+        Args:
+            requester: Identifier of the runner which makes the request.
+            job_ids:
+                SLURM job IDs (or job-array IDs), which replace the previous
+                ones of the same requester.
+            run_squeue: The `run_squeue` method of the requesting runner.
+
+        Returns:
+            A mapping from SLURM job ID (or job-array element ID) to status,
+            for the jobs listed in the `squeue` output.
+        """
+        requested_job_ids = set(job_ids)
+        with self._lock:
+            self._job_ids[requester] = requested_job_ids
+            now = time.perf_counter()
+            if (
+                not requested_job_ids <= self._queried_job_ids
+                or now - self._timestamp >= self.max_age
+            ):
+                all_job_ids = sorted(set().union(*self._job_ids.values()))
+                try:
+                    stdout = run_squeue(job_ids=all_job_ids)
+                    self._statuses = {
+                        out.split()[0]: out.split()[1]
+                        for out in stdout.splitlines()
+                    }
+                except Exception as e:
+                    # Discard jobs of other requesters, which will be
+                    # included again in their next requests, so that a
+                    # single invalid job ID does not affect all requesters
+                    self._job_ids = {requester: requested_job_ids}
+                    self._queried_job_ids = set()
+                    raise e
+                logger.debug(
+                    f"[SqueuePoller] `squeue` run for {len(all_job_ids)} jobs "
+                    f"of {len(self._job_ids)} requesters."
+                )
+                self._queried_job_ids = set(all_job_ids)
+                self._timestamp = now
+                self._forget_finished_jobs()
+            return {
+                job_id: status
+                for job_id, status in self._statuses.items()
+                if get_array_job_id(job_id) in requested_job_ids
+            }
+
+    def _forget_finished_jobs(self: Self) -> None:
+        """
+        Stop polling jobs which are missing from the `squeue` output, or
+        which (or all elements of which) are in a finished state.
+        """
+        active_job_ids = {
+            get_array_job_id(job_id)
+            for job_id, status in self._statuses.items()
+            if status not in STATES_FINISHED
+        }
+        for requester, job_ids in self._job_ids.items():
+            self._job_ids[requester] = job_ids & active_job_ids
+
+    def forget(self: Self, requester: Hashable) -> None:
+        """
+        Stop polling the jobs of a requester.
+        """
+        with self._lock:
+            self._job_ids.pop(requester, None)
+
+
+_SQUEUE_POLLERS: dict[Hashable, SqueuePoller] = {}
+_SQUEUE_POLLERS_LOCK = Lock()
+
+
+def get_squeue_poller(*, key: Hashable, max_age: float) -> SqueuePoller:
+    """
+    Get the process-wide `SqueuePoller` for a given key, or create one.
+
+    Args:
+        key:
+            Identifier of the SLURM cluster and of the credentials used to
+            run `squeue`.
+        max_age: The `max_age` attribute of a new `SqueuePoller`.
+    """
+    with _SQUEUE_POLLERS_LOCK:
+        if key not in _SQUEUE_POLLERS:
+            _SQUEUE_POLLERS[key] = SqueuePoller(max_age=max_age)
+        return _SQUEUE_POLLERS[key]
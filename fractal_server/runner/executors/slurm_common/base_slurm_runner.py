@@ -27,14 +27,23 @@ from fractal_server.runner.executors.slurm_common.slurm_job_task_models import (
 from fractal_server.runner.executors.slurm_common.slurm_job_task_models import (
     SlurmTask,
 )
+from fractal_server.runner.executors.slurm_common.slurm_job_task_models import (
+    get_array_job_id,
+)
 from fractal_server.runner.filenames import SHUTDOWN_FILENAME
 from fractal_server.runner.task_files import TaskFiles
+from fractal_server.runner.v2.db_tools import (
+    bulk_update_history_units_no_commit,
+)
 from fractal_server.runner.v2.db_tools import bulk_update_status_of_history_unit
 from fractal_server.runner.v2.db_tools import update_history_unit_no_commit
 from fractal_server.types import JSONType
 
 from ._batching import _verify_batch_sizes
 from ._job_states import STATES_FINISHED
+from ._poll_schedule import PollSchedule
+from ._squeue_poller import SqueuePoller
+from ._squeue_poller import get_squeue_poller
 from .slurm_config import SlurmConfig
 
 SHUTDOWN_ERROR_MESSAGE = "Failed due to job-execution shutdown."
@@ -118,6 +127,7 @@ class BaseSlurmRunner(BaseRunner):
     slurm_runner_type: Literal["ssh", "sudo"]
     slurm_account: str | None = None
     shared_config: JobRunnerConfigSLURM
+    squeue_poller: SqueuePoller
 
     def __init__(
         self,
@@ -166,13 +176,26 @@ class BaseSlurmRunner(BaseRunner):
 
         self.shutdown_file = self.root_dir_local / SHUTDOWN_FILENAME
         self.jobs = {}
+        self.squeue_poller = get_squeue_poller(
+            key=self._get_squeue_poller_key(),
+            max_age=self.poll_interval,
+        )
 
     def __enter__(self) -> Self:
         return self
 
     def __exit__(self: Self, exc_type, exc_val, exc_tb) -> bool:
+        self.squeue_poller.forget(requester=id(self))
         return False
 
+    def _get_squeue_poller_key(self: Self) -> tuple[str | int | None, ...]:
+        """
+        Key of the process-wide `SqueuePoller` of this runner, which is
+        shared with the runners that query the same SLURM cluster with the
+        same credentials.
+        """
+        return (self.slurm_runner_type, self.resource_id)
+
     def _run_local_cmd(self: Self, cmd: str) -> str:
         raise NotImplementedError("Implement in child class.")
 
@@ -217,11 +240,15 @@ class BaseSlurmRunner(BaseRunner):
         if not job_ids:
             return set()
 
+        # Query job arrays as a whole, rather than element by element
+        squeue_job_ids = list(dict.fromkeys(map(get_array_job_id, job_ids)))
+
         try:
-            stdout = self.run_squeue(job_ids=job_ids)
-            slurm_statuses = {
-                out.split()[0]: out.split()[1] for out in stdout.splitlines()
-            }
+            slurm_statuses = self.squeue_poller.get_statuses(
+                requester=id(self),
+                job_ids=squeue_job_ids,
+                run_squeue=self.run_squeue,
+            )
         except Exception as e:
             logger.warning(
                 "[_get_finished_jobs] `squeue` failed, "
@@ -229,7 +256,7 @@ class BaseSlurmRunner(BaseRunner):
                 f"Original error: {str(e)}."
             )
             slurm_statuses = dict()
-            for job_id in job_ids:
+            for job_id in squeue_job_ids:
                 try:
                     stdout = self.run_squeue(job_ids=[job_id])
                     slurm_statuses.update(
@@ -257,14 +284,94 @@ class BaseSlurmRunner(BaseRunner):
                         )
                         slurm_statuses.update({str(job_id): "COMPLETED"})
 
-        # If a job is not in `squeue` output, mark it as completed.
+        # If a job is not in `squeue` output, mark it as completed. Array
+        # elements which are not listed take the status assigned to their
+        # whole array (if any), e.g. when `squeue` failed.
         finished_jobs = {
             job_id
             for job_id in job_ids
-            if slurm_statuses.get(job_id, "COMPLETED") in STATES_FINISHED
+            if slurm_statuses.get(
+                job_id,
+                slurm_statuses.get(get_array_job_id(job_id), "COMPLETED"),
+            )
+            in STATES_FINISHED
         }
         return finished_jobs
 
+    def _get_jobs_with_outputs(self: Self, job_ids: list[str]) -> set[str]:
+        """
+        Find the jobs whose tasks have all written their output files.
+
+        The output file of each task is written (atomically) by
+        `slurm_common/remote.py` as the last step of the task, so that these
+        jobs can be considered as finished without waiting for `squeue`. A
+        single `find` command is run for each working directory.
+
+        Args:
+            job_ids: IDs of jobs in `self.jobs`.
+
+        Returns:
+            The IDs of the jobs whose output files all exist. Errors are
+            logged and result in an empty set.
+        """
+        jobs_by_workdir: dict[Path, list[str]] = {}
+        for job_id in job_ids:
+            workdir_remote = self.jobs[job_id].workdir_remote
+            jobs_by_workdir.setdefault(workdir_remote, []).append(job_id)
+
+        jobs_with_outputs = set()
+        for workdir_remote, workdir_job_ids in jobs_by_workdir.items():
+            cmd = (
+                f"find {workdir_remote.as_posix()} -maxdepth 1 "
+                "-regex '.+-output.json'"
+            )
+            try:
+                stdout = self._run_remote_cmd(cmd)
+            except Exception as e:
+                logger.warning(
+                    "[_get_jobs_with_outputs] `find` failed for "
+                    f"{workdir_remote=}. Original error: {str(e)}."
+                )
+                continue
+            output_files = {Path(line).name for line in stdout.splitlines()}
+            jobs_with_outputs.update(
+                job_id
+                for job_id in workdir_job_ids
+                if all(
+                    task.output_file_remote_path.name in output_files
+                    for task in self.jobs[job_id].tasks
+                )
+            )
+        return jobs_with_outputs
+
+    def _detect_finished_jobs(
+        self: Self,
+        poll_schedule: PollSchedule,
+    ) -> set[str]:
+        """
+        Find finished jobs, through output files and (when due) `squeue`.
+
+        Args:
+            poll_schedule: The `PollSchedule` of the current submission.
+        """
+        now = time.perf_counter()
+        finished_job_ids = self._get_jobs_with_outputs(job_ids=self.job_ids)
+        poll_schedule.record_output_check(
+            now=now, num_finished=len(finished_job_ids)
+        )
+        other_job_ids = [
+            job_id for job_id in self.job_ids if job_id not in finished_job_ids
+        ]
+        if other_job_ids and poll_schedule.is_squeue_due(now):
+            squeue_finished_job_ids = self._get_finished_jobs(
+                job_ids=other_job_ids
+            )
+            poll_schedule.record_squeue(
+                now=now, num_finished=len(squeue_finished_job_ids)
+            )
+            finished_job_ids.update(squeue_finished_job_ids)
+        return finished_job_ids
+
     def _mkdir_local_folder(self: Self, folder: str) -> None:
         raise NotImplementedError("Implement in child class.")
 
@@ -309,26 +416,19 @@ class BaseSlurmRunner(BaseRunner):
 
         return new_slurm_config
 
-    def _prepare_single_slurm_job(
+    def _write_slurm_job_inputs(
         self,
         *,
         base_command: str,
         slurm_job: SlurmJob,
-        slurm_config: SlurmConfig,
-    ) -> str:
+    ) -> None:
         """
-        Prepare submission script locally.
+        Write input and args files of all tasks of a SLURM job, locally.
 
         Args:
             base_command: Base of task executable command.
             slurm_job: `SlurmJob` object
-            slurm_config: Configuration for SLURM job
-
-        Returns:
-            Command to submit the SLURM job.
         """
-        logger.debug("[_prepare_single_slurm_job] START")
-
         for task in slurm_job.tasks:
             # Write input file
             if self.slurm_runner_type == "ssh":
@@ -358,30 +458,61 @@ class BaseSlurmRunner(BaseRunner):
                 json.dump(task.parameters, f, indent=2)
 
             logger.debug(
-                f"[_prepare_single_slurm_job] Written {task.input_file_local=}"
+                f"[_write_slurm_job_inputs] Written {task.input_file_local=}"
             )
 
-        # Prepare commands to be included in SLURM submission script
-        cmdlines = []
+    def _get_srun_lines(
+        self,
+        *,
+        slurm_job: SlurmJob,
+        slurm_config: SlurmConfig,
+    ) -> list[str]:
+        """
+        Prepare the `srun` lines of all tasks of a SLURM job.
+
+        Args:
+            slurm_job: `SlurmJob` object
+            slurm_config: Configuration for SLURM job
+        """
+        if slurm_config.use_mem_per_cpu:
+            mem_specific = f"--mem-per-cpu={slurm_config.mem_per_cpu_MB}MB"
+        else:
+            mem_specific = f"--mem={slurm_config.mem_per_task_MB}MB"
+        srun_lines = []
         for task in slurm_job.tasks:
             if self.slurm_runner_type == "ssh":
                 input_file = task.input_file_remote
             else:
                 input_file = task.input_file_local
             output_file = task.output_file_remote
-            cmdlines.append(
+            srun_lines.append(
+                "srun --ntasks=1 --cpus-per-task=$SLURM_CPUS_PER_TASK "
+                f"{mem_specific} "
                 f"{self.python_worker_interpreter}"
                 " -m fractal_server.runner."
                 "executors.slurm_common.remote "
                 f"--input-file {input_file} "
-                f"--output-file {output_file}"
+                f"--output-file {output_file} &"
             )
+        return srun_lines
 
-        # Set ntasks
-        num_tasks_max_running = slurm_config.parallel_tasks_per_job
-        ntasks = min(len(cmdlines), num_tasks_max_running)
-        slurm_config.parallel_tasks_per_job = ntasks
+    def _get_script_preamble(
+        self,
+        *,
+        slurm_job: SlurmJob,
+        slurm_config: SlurmConfig,
+        extra_sbatch_lines: list[str] | None = None,
+    ) -> list[str]:
+        """
+        Prepare the preamble of a SLURM submission script.
 
+        Args:
+            slurm_job:
+                `SlurmJob` object, used for the stdout/stderr paths and for
+                the working directory.
+            slurm_config: Configuration for SLURM job
+            extra_sbatch_lines: Additional `#SBATCH` lines.
+        """
         # Prepare SLURM preamble based on SlurmConfig object
         script_lines = slurm_config.to_sbatch_preamble(
             remote_export_dir=self.user_cache_dir,
@@ -395,10 +526,11 @@ class BaseSlurmRunner(BaseRunner):
                 f"#SBATCH --err={slurm_job.slurm_stderr_remote}",
                 f"#SBATCH --out={slurm_job.slurm_stdout_remote}",
                 f"#SBATCH -D {slurm_job.workdir_remote}",
+                *(extra_sbatch_lines or []),
             ]
         )
         script_lines = slurm_config.sort_script_lines(script_lines)
-        logger.debug(f"[_prepare_single_slurm_job] {script_lines=}")
+        logger.debug(f"[_get_script_preamble] {script_lines=}")
 
         # Always print output of `uname -n` and `pwd`
         script_lines.append('\necho "Hostname: $(uname -n)"')
@@ -407,18 +539,57 @@ class BaseSlurmRunner(BaseRunner):
 
         # Complete script preamble
         script_lines.append("\n")
+        return script_lines
 
-        # Include command lines
-        for cmd in cmdlines:
-            if slurm_config.use_mem_per_cpu:
-                mem_specific = f"--mem-per-cpu={slurm_config.mem_per_cpu_MB}MB"
-            else:
-                mem_specific = f"--mem={slurm_config.mem_per_task_MB}MB"
-            script_lines.append(
-                "srun --ntasks=1 --cpus-per-task=$SLURM_CPUS_PER_TASK "
-                f"{mem_specific} "
-                f"{cmd} &"
+    def _get_submit_command(self, slurm_job: SlurmJob) -> str:
+        if self.slurm_runner_type == "ssh":
+            return (
+                f"sbatch --parsable {slurm_job.slurm_submission_script_remote}"
+            )
+        else:
+            return (
+                f"sbatch --parsable {slurm_job.slurm_submission_script_local}"
             )
+
+    def _prepare_single_slurm_job(
+        self,
+        *,
+        base_command: str,
+        slurm_job: SlurmJob,
+        slurm_config: SlurmConfig,
+    ) -> str:
+        """
+        Prepare submission script locally.
+
+        Args:
+            base_command: Base of task executable command.
+            slurm_job: `SlurmJob` object
+            slurm_config: Configuration for SLURM job
+
+        Returns:
+            Command to submit the SLURM job.
+        """
+        logger.debug("[_prepare_single_slurm_job] START")
+
+        self._write_slurm_job_inputs(
+            base_command=base_command,
+            slurm_job=slurm_job,
+        )
+
+        # Set ntasks
+        num_tasks_max_running = slurm_config.parallel_tasks_per_job
+        ntasks = min(len(slurm_job.tasks), num_tasks_max_running)
+        slurm_config.parallel_tasks_per_job = ntasks
+
+        script_lines = self._get_script_preamble(
+            slurm_job=slurm_job,
+            slurm_config=slurm_config,
+        )
+
+        # Include command lines
+        script_lines.extend(
+            self._get_srun_lines(slurm_job=slurm_job, slurm_config=slurm_config)
+        )
         script_lines.append("wait\n\n")
         script_lines.append('echo "End time:   $(date +"%Y-%m-%dT%H:%M:%S%z")"')
         script = "\n".join(script_lines)
@@ -431,15 +602,93 @@ class BaseSlurmRunner(BaseRunner):
             f"{slurm_job.slurm_submission_script_local=}"
         )
 
-        if self.slurm_runner_type == "ssh":
-            submit_command = (
-                f"sbatch --parsable {slurm_job.slurm_submission_script_remote}"
+        submit_command = self._get_submit_command(slurm_job)
+        logger.debug("[_prepare_single_slurm_job] END")
+        return submit_command
+
+    def _prepare_slurm_job_array(
+        self,
+        *,
+        base_command: str,
+        slurm_jobs: list[SlurmJob],
+        slurm_config: SlurmConfig,
+    ) -> str:
+        """
+        Prepare the submission script of a SLURM job array locally.
+
+        The `srun` lines of each array element are written to a separate
+        script, which the submission script sources based on the
+        `SLURM_ARRAY_TASK_ID` variable.
+
+        Args:
+            base_command: Base of task executable command.
+            slurm_jobs:
+                `SlurmJob` objects, which must share the same `prefix` and
+                have `array_index` values from `0` to `len(slurm_jobs) - 1`.
+            slurm_config: Configuration for SLURM job
+
+        Returns:
+            Command to submit the SLURM job array.
+        """
+        logger.debug(f"[_prepare_slurm_job_array] START {len(slurm_jobs)=}")
+
+        # Set ntasks, based on the largest array element
+        num_tasks_max_running = slurm_config.parallel_tasks_per_job
+        ntasks = min(
+            max(len(slurm_job.tasks) for slurm_job in slurm_jobs),
+            num_tasks_max_running,
+        )
+        slurm_config.parallel_tasks_per_job = ntasks
+
+        for slurm_job in slurm_jobs:
+            self._write_slurm_job_inputs(
+                base_command=base_command,
+                slurm_job=slurm_job,
             )
-        else:
-            submit_command = (
-                f"sbatch --parsable {slurm_job.slurm_submission_script_local}"
+            srun_lines = self._get_srun_lines(
+                slurm_job=slurm_job,
+                slurm_config=slurm_config,
             )
-        logger.debug("[_prepare_single_slurm_job] END")
+            with open(slurm_job.slurm_array_element_script_local, "w") as f:
+                f.write("\n".join(srun_lines) + "\n")
+
+        array_range = f"0-{len(slurm_jobs) - 1}"
+        job_array_config = self.shared_config.job_array_config
+        if job_array_config.max_running_elements is not None:
+            array_range = (
+                f"{array_range}%{job_array_config.max_running_elements}"
+            )
+        first_job = slurm_jobs[0]
+        script_lines = self._get_script_preamble(
+            slurm_job=first_job,
+            slurm_config=slurm_config,
+            extra_sbatch_lines=[f"#SBATCH --array={array_range}"],
+        )
+
+        # Source the script of the current array element
+        if self.slurm_runner_type == "ssh":
+            workdir = first_job.workdir_remote
+        else:
+            workdir = first_job.workdir_local
+        element_script = first_job.get_slurm_array_element_script(
+            workdir=workdir,
+            array_index="$SLURM_ARRAY_TASK_ID",
+        )
+        script_lines.append(f". {element_script.as_posix()}")
+        script_lines.append("wait\n\n")
+        script_lines.append('echo "End time:   $(date +"%Y-%m-%dT%H:%M:%S%z")"')
+        script = "\n".join(script_lines)
+
+        # Write submission script
+        with open(first_job.slurm_submission_script_local, "w") as f:
+            f.write(script)
+        logger.debug(
+            "[_prepare_slurm_job_array] Written "
+            f"{first_job.slurm_submission_script_local=}"
+        )
+
+        submit_command = self._get_submit_command(first_job)
+        logger.debug("[_prepare_slurm_job_array] END")
         return submit_command
 
     def _send_many_job_inputs(
@@ -488,6 +737,64 @@ class BaseSlurmRunner(BaseRunner):
         )
         logger.debug("[_submit_single_sbatch] END")
 
+    def _submit_slurm_job_array(
+        self,
+        *,
+        submit_command: str,
+        slurm_jobs: list[SlurmJob],
+    ) -> None:
+        """
+        Run `sbatch` for a job array and add its elements to `self.jobs`.
+
+        Args:
+            submit_command:
+                The SLURM submission command prepared in
+                `self._prepare_slurm_job_array`.
+            slurm_jobs: The `SlurmJob` objects of the array elements.
+        """
+        logger.debug("[_submit_slurm_job_array] START")
+
+        # Submit SLURM job array and retrieve its ID
+        logger.debug(f"[_submit_slurm_job_array] Now run {submit_command=}")
+        sbatch_stdout = self._run_remote_cmd(submit_command)
+        logger.info(f"[_submit_slurm_job_array] {sbatch_stdout=}")
+        stdout = sbatch_stdout.strip("\n")
+        array_job_id = int(stdout)
+
+        # Add array elements to self.jobs
+        for slurm_job in slurm_jobs:
+            slurm_job.slurm_job_id = f"{array_job_id}_{slurm_job.array_index}"
+            self.jobs[slurm_job.slurm_job_id] = slurm_job
+        logger.debug(
+            f"[_submit_slurm_job_array] Added {len(slurm_jobs)} elements of "
+            f"job array {array_job_id} to self.jobs."
+        )
+        logger.debug("[_submit_slurm_job_array] END")
+
+    @staticmethod
+    def _get_artifact_filelist(slurm_jobs: list[SlurmJob]) -> list[str]:
+        """
+        List the names of the artifacts of some SLURM jobs, relative to their
+        remote working directory.
+        """
+        # NOTE: see issue 2483
+        filelist = []
+        for _slurm_job in slurm_jobs:
+            _single_job_filelist = [
+                _slurm_job.slurm_stdout_remote_path.name,
+                _slurm_job.slurm_stderr_remote_path.name,
+            ]
+            for task in _slurm_job.tasks:
+                _single_job_filelist.extend(
+                    [
+                        task.output_file_remote_path.name,
+                        task.task_files.log_file_remote_path.name,
+                        task.task_files.metadiff_file_remote_path.name,
+                    ]
+                )
+            filelist.extend(_single_job_filelist)
+        return filelist
+
     def _fetch_artifacts(
         self,
         finished_slurm_jobs: list[SlurmJob],
@@ -643,21 +950,35 @@ class BaseSlurmRunner(BaseRunner):
 
     @property
     def job_ids_int(self) -> list[int]:
-        return list(map(int, self.jobs.keys()))
+        """
+        Integer IDs of `self.jobs`, where array elements are replaced by the
+        ID of their job array.
+        """
+        return list(
+            dict.fromkeys(int(get_array_job_id(job_id)) for job_id in self.jobs)
+        )
 
-    def wait_and_check_shutdown(self) -> list[str]:
+    def wait_and_check_shutdown(
+        self,
+        interval: float | None = None,
+    ) -> list[str]:
         """
-        Wait at most `self.poll_interval`, while also checking for shutdown.
+        Wait at most `interval`, while also checking for shutdown.
+
+        Args:
+            interval: Waiting time, which defaults to `self.poll_interval`.
         """
-        # Sleep for `self.poll_interval`, but keep checking for shutdowns
+        if interval is None:
+            interval = self.poll_interval
+        # Sleep for `interval`, but keep checking for shutdowns
         start_time = time.perf_counter()
         # Always wait at least 0.2 (note: this is for cases where
         # `poll_interval=0`).
-        waiting_time = max(self.poll_interval, 0.2)
+        waiting_time = max(interval, 0.2)
         max_time = start_time + waiting_time
         logger.debug(
             "[wait_and_check_shutdown] "
-            f"I will wait at most {self.poll_interval} s, "
+            f"I will wait at most {waiting_time:.3f} s, "
             f"in blocks of {self.poll_interval_internal} s."
         )
 
@@ -790,10 +1111,11 @@ class BaseSlurmRunner(BaseRunner):
 
             # Retrieval phase
             logger.debug("[submit] START retrieval phase")
+            poll_schedule = PollSchedule(poll_interval=self.poll_interval)
             scancelled_job_ids = []
             while len(self.jobs) > 0:
                 # Look for finished jobs
-                finished_job_ids = self._get_finished_jobs(job_ids=self.job_ids)
+                finished_job_ids = self._detect_finished_jobs(poll_schedule)
                 logger.debug(f"[submit] {finished_job_ids=}")
                 finished_jobs = [
                     self.jobs[_slurm_job_id]
@@ -834,7 +1156,11 @@ class BaseSlurmRunner(BaseRunner):
                         db.commit()
 
                 if len(self.jobs) > 0:
-                    scancelled_job_ids = self.wait_and_check_shutdown()
+                    scancelled_job_ids = self.wait_and_check_shutdown(
+                        poll_schedule.next_check_interval(time.perf_counter())
+                    )
+                    if scancelled_job_ids:
+                        poll_schedule.request_squeue()
 
             logger.debug("[submit] END")
             return result, exception
@@ -981,26 +1307,62 @@ class BaseSlurmRunner(BaseRunner):
                     )
                 )
 
-            submit_commands = []
-            for slurm_job in jobs_to_submit:
-                submit_commands.append(
-                    self._prepare_single_slurm_job(
-                        base_command=base_command,
-                        slurm_job=slurm_job,
-                        slurm_config=config,
+            job_array_config = self.shared_config.job_array_config
+            if job_array_config is not None and len(jobs_to_submit) > 1:
+                # Group jobs into arrays, where all elements of an array share
+                # the prefix of its first element
+                arrays_to_submit = []
+                array_size = job_array_config.max_array_size
+                for ind_array in range(0, len(jobs_to_submit), array_size):
+                    array_jobs = jobs_to_submit[
+                        ind_array : ind_array
+                        + array_size  # noqa
+                    ]
+                    for array_index, slurm_job in enumerate(array_jobs):
+                        slurm_job.prefix = array_jobs[0].prefix
+                        slurm_job.array_index = array_index
+                    arrays_to_submit.append(array_jobs)
+                submit_commands = []
+                for array_jobs in arrays_to_submit:
+                    submit_commands.append(
+                        self._prepare_slurm_job_array(
+                            base_command=base_command,
+                            slurm_jobs=array_jobs,
+                            slurm_config=config,
+                        )
                     )
+                self._send_many_job_inputs(
+                    workdir_local=workdir_local,
+                    workdir_remote=workdir_remote,
                 )
-            self._send_many_job_inputs(
-                workdir_local=workdir_local,
-                workdir_remote=workdir_remote,
-            )
-            for slurm_job, submit_command in zip(
-                jobs_to_submit, submit_commands
-            ):
-                self._submit_single_sbatch(
-                    submit_command=submit_command,
-                    slurm_job=slurm_job,
+                for array_jobs, submit_command in zip(
+                    arrays_to_submit, submit_commands
+                ):
+                    self._submit_slurm_job_array(
+                        submit_command=submit_command,
+                        slurm_jobs=array_jobs,
+                    )
+            else:
+                submit_commands = []
+                for slurm_job in jobs_to_submit:
+                    submit_commands.append(
+                        self._prepare_single_slurm_job(
+                            base_command=base_command,
+                            slurm_job=slurm_job,
+                            slurm_config=config,
+                        )
+                    )
+                self._send_many_job_inputs(
+                    workdir_local=workdir_local,
+                    workdir_remote=workdir_remote,
                 )
+                for slurm_job, submit_command in zip(
+                    jobs_to_submit, submit_commands
+                ):
+                    self._submit_single_sbatch(
+                        submit_command=submit_command,
+                        slurm_job=slurm_job,
+                    )
             logger.info(f"[multisubmit] END submission phase, {self.job_ids=}")
 
         except Exception as e:
@@ -1034,10 +1396,11 @@ class BaseSlurmRunner(BaseRunner):
 
         # Retrieval phase
         logger.debug("[multisubmit] START retrieval phase")
+        poll_schedule = PollSchedule(poll_interval=self.poll_interval)
         scancelled_job_ids = []
         while len(self.jobs) > 0:
             # Look for finished jobs
-            finished_job_ids = self._get_finished_jobs(job_ids=self.job_ids)
+            finished_job_ids = self._detect_finished_jobs(poll_schedule)
             logger.debug(f"[multisubmit] {finished_job_ids=}")
             finished_jobs = [
                 self.jobs[_slurm_job_id] for _slurm_job_id in finished_job_ids
@@ -1057,59 +1420,60 @@ class BaseSlurmRunner(BaseRunner):
             # Extract SLURM errors
             self._set_executor_error_log(finished_jobs)
 
-            with next(get_sync_db()) as db:
-                for slurm_job_id in finished_job_ids:
-                    logger.debug(f"[multisubmit] Now process {slurm_job_id=}")
-                    slurm_job = self.jobs.pop(slurm_job_id)
-                    for task in slurm_job.tasks:
-                        logger.debug(f"[multisubmit] Now process {task.index=}")
-                        was_job_scancelled = slurm_job_id in scancelled_job_ids
-                        if fetch_artifacts_exception is not None:
+            history_unit_statuses: dict[int, HistoryUnitStatus] = {}
+            for slurm_job_id in finished_job_ids:
+                logger.debug(f"[multisubmit] Now process {slurm_job_id=}")
+                slurm_job = self.jobs.pop(slurm_job_id)
+                for task in slurm_job.tasks:
+                    logger.debug(f"[multisubmit] Now process {task.index=}")
+                    was_job_scancelled = slurm_job_id in scancelled_job_ids
+                    if fetch_artifacts_exception is not None:
+                        result = None
+                        exception = fetch_artifacts_exception
+                    else:
+                        try:
+                            (
+                                result,
+                                exception,
+                            ) = self._postprocess_single_task(
+                                task=task,
+                                was_job_scancelled=was_job_scancelled,
+                            )
+                        except Exception as e:
+                            logger.error(
+                                "[multisubmit] Unexpected exception in "
+                                "`_postprocess_single_task`. "
+                                f"Original error: {str(e)}"
+                            )
                             result = None
-                            exception = fetch_artifacts_exception
-                        else:
-                            try:
-                                (
-                                    result,
-                                    exception,
-                                ) = self._postprocess_single_task(
-                                    task=task,
-                                    was_job_scancelled=was_job_scancelled,
-                                )
-                            except Exception as e:
-                                logger.error(
-                                    "[multisubmit] Unexpected exception in "
-                                    "`_postprocess_single_task`. "
-                                    f"Original error: {str(e)}"
-                                )
-                                result = None
-                                exception = e
-                        # Note: the relevant done/failed check is based on
-                        # whether `exception is None`. The fact that
-                        # `result is None` is not relevant for this purpose.
-                        if exception is not None:
-                            exceptions[task.index] = exception
-                            if task_type == TaskType.PARALLEL:
-                                update_history_unit_no_commit(
-                                    history_unit_id=history_unit_ids[
-                                        task.index
-                                    ],
-                                    status=HistoryUnitStatus.FAILED,
-                                    db_sync=db,
-                                )
-                        else:
-                            results[task.index] = result
-                            if task_type == TaskType.PARALLEL:
-                                update_history_unit_no_commit(
-                                    history_unit_id=history_unit_ids[
-                                        task.index
-                                    ],
-                                    status=HistoryUnitStatus.DONE,
-                                    db_sync=db,
-                                )
+                            exception = e
+                    # Note: the relevant done/failed check is based on
+                    # whether `exception is None`. The fact that
+                    # `result is None` is not relevant for this purpose.
+                    if exception is not None:
+                        exceptions[task.index] = exception
+                        if task_type == TaskType.PARALLEL:
+                            history_unit_statuses[
+                                history_unit_ids[task.index]
+                            ] = HistoryUnitStatus.FAILED
+                    else:
+                        results[task.index] = result
+                        if task_type == TaskType.PARALLEL:
+                            history_unit_statuses[
+                                history_unit_ids[task.index]
+                            ] = HistoryUnitStatus.DONE
+            with next(get_sync_db()) as db:
+                bulk_update_history_units_no_commit(
+                    history_unit_statuses=history_unit_statuses,
+                    db_sync=db,
+                )
                 db.commit()
             if len(self.jobs) > 0:
-                scancelled_job_ids = self.wait_and_check_shutdown()
+                scancelled_job_ids = self.wait_and_check_shutdown(
+                    poll_schedule.next_check_interval(time.perf_counter())
+                )
+                if scancelled_job_ids:
+                    poll_schedule.request_squeue()
 
         logger.debug("[multisubmit] END")
         return results, exceptions
@@ -1153,7 +1517,10 @@ class BaseSlurmRunner(BaseRunner):
         scancelled_job_ids = self.job_ids
         logger.info(f"[scancel_jobs] {len(scancelled_job_ids)=}")
         if self.jobs:
-            scancel_string = " ".join(scancelled_job_ids)
+            # Cancel job arrays as a whole, rather than element by element
+            scancel_string = " ".join(
+                dict.fromkeys(map(get_array_job_id, scancelled_job_ids))
+            )
             scancel_cmd = f"scancel {scancel_string}"
             logger.warning(f"[scancel_jobs] {scancel_string}")
             try:
@@ -104,9 +104,12 @@ def worker(
         )
         result = (False, exc_proxy)
 
-    # Write output file
-    with open(out_fname, "w") as f:
+    # Write output file atomically, since its existence marks the end of the
+    # task for the runner
+    tmp_out_fname = f"{out_fname}.tmp"
+    with open(tmp_out_fname, "w") as f:
         json.dump(result, f, indent=2)
+    os.replace(tmp_out_fname, out_fname)
 
 
 if __name__ == "__main__":
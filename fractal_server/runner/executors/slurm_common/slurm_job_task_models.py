@@ -7,6 +7,19 @@ from pydantic import ConfigDict
 from fractal_server.runner.task_files import TaskFiles
 
 
+def get_array_job_id(slurm_job_id: str) -> str:
+    """
+    Return the ID of the job array that a SLURM job belongs to.
+
+    The ID of an array element has the `{array_job_id}_{array_index}` form,
+    while the ID of a job which is not part of an array is returned as is.
+
+    Args:
+        slurm_job_id: The SLURM job ID.
+    """
+    return slurm_job_id.split("_")[0]
+
+
 class SlurmTask(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     component: str
@@ -62,11 +75,21 @@ class SlurmTask(BaseModel):
 
 
 class SlurmJob(BaseModel):
+    """
+    A SLURM job, or an element of a SLURM job array.
+
+    For the elements of a job array, `array_index` is the value of the
+    `SLURM_ARRAY_TASK_ID` variable, `prefix` is the same for all elements
+    of the array and `slurm_job_id` has the `{array_job_id}_{array_index}`
+    form.
+    """
+
     slurm_job_id: str | None = None
     prefix: str
     workdir_local: Path
     workdir_remote: Path
     tasks: list[SlurmTask]
+    array_index: int | None = None
 
     @property
     def slurm_submission_script_local(self) -> str:
@@ -80,10 +103,33 @@ class SlurmJob(BaseModel):
             self.workdir_remote / f"{self.prefix}-slurm-submit.sh"
         ).as_posix()
 
+    def get_slurm_array_element_script(
+        self,
+        *,
+        workdir: Path,
+        array_index: int | str,
+    ) -> Path:
+        """
+        Path of the script of a job-array element, within `workdir`.
+
+        Note that `array_index` may also be a shell expression, e.g.
+        `$SLURM_ARRAY_TASK_ID` in the array submission script.
+        """
+        return workdir / f"{self.prefix}-slurm-array-{array_index}.sh"
+
+    @property
+    def slurm_array_element_script_local(self) -> str:
+        return self.get_slurm_array_element_script(
+            workdir=self.workdir_local,
+            array_index=self.array_index,
+        ).as_posix()
+
     @property
     def slurm_job_id_placeholder(self) -> str:
         if self.slurm_job_id:
             return self.slurm_job_id
+        elif self.array_index is not None:
+            return "%A_%a"
         else:
             return "%j"
 
@@ -2,7 +2,9 @@
 Prepare tar commands for task-subfolder compression/extraction.
 """
 
+import tarfile
 from pathlib import Path
+from typing import BinaryIO
 
 
 def get_tar_compression_cmd(
@@ -40,6 +42,50 @@ def get_tar_compression_cmd(
     return cmd_tar
 
 
+def get_tar_streaming_cmd(
+    subfolder_path: Path,
+    compress: bool = True,
+) -> str:
+    """
+    Prepare command to write an archive of some files of e.g. `/path/dir` to
+    standard output.
+
+    The list of files is read from standard input, and missing files are
+    ignored.
+
+    Args:
+        subfolder_path: Absolute path to the folder of the files.
+        compress:
+            Whether to compress the archive (which is only useful when it is
+            transferred over the network).
+
+    Returns:
+        tar command
+    """
+    compression_flag = "-z " if compress else ""
+    cmd_tar = (
+        f"tar -c {compression_flag}-f - "
+        f"--directory={subfolder_path.as_posix()} "
+        "--files-from=- --ignore-failed-read"
+    )
+    return cmd_tar
+
+
+def extract_tar_stream(fileobj: BinaryIO, *, subfolder_path: Path) -> None:
+    """
+    Extract a (possibly compressed) archive into a folder, while it is
+    being read.
+
+    Args:
+        fileobj:
+            Binary file-like object with the archive contents (e.g. the
+            output of the command from `get_tar_streaming_cmd`).
+        subfolder_path: Absolute path to the target extraction folder.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        tar.extractall(path=subfolder_path, filter="data")
+
+
 def get_tar_extraction_cmd(archive_path: Path) -> tuple[Path, str]:
     """
     Prepare command to extract e.g. `/path/dir.tar.gz` into `/path/dir`.
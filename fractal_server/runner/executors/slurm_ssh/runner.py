@@ -1,4 +1,6 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Self
 from typing import override
@@ -13,13 +15,23 @@ from fractal_server.runner.executors.slurm_common.base_slurm_runner import (
 from fractal_server.runner.executors.slurm_common.slurm_job_task_models import (
     SlurmJob,
 )
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    extract_tar_stream,
+)
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    get_tar_compression_cmd,
+)
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    get_tar_extraction_cmd,
+)
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    get_tar_streaming_cmd,
+)
 from fractal_server.ssh._fabric import FractalSSH
 from fractal_server.ssh._fabric import FractalSSHCommandError
 from fractal_server.ssh._fabric import FractalSSHTimeoutError
 
 from .run_subprocess import run_subprocess
-from .tar_commands import get_tar_compression_cmd
-from .tar_commands import get_tar_extraction_cmd
 
 logger = set_logger(__name__)
 
@@ -30,6 +42,8 @@ class SlurmSSHRunner(BaseSlurmRunner):
     """
 
     fractal_ssh: FractalSSH
+    ssh_host: str
+    ssh_user: str
 
     def __init__(
         self,
@@ -52,6 +66,8 @@ class SlurmSSHRunner(BaseSlurmRunner):
         different SLURM jobs/tasks.
         """
         self.fractal_ssh = fractal_ssh
+        self.ssh_host = resource.host
+        self.ssh_user = profile.username
         self.shared_config = JobRunnerConfigSLURM(**resource.jobs_runner_config)
         logger.warning(self.fractal_ssh)
 
@@ -70,6 +86,10 @@ class SlurmSSHRunner(BaseSlurmRunner):
             resource_id=resource_id,
         )
 
+    @override
+    def _get_squeue_poller_key(self: Self) -> tuple[str | int | None, ...]:
+        return ("ssh", self.resource_id, self.ssh_host, self.ssh_user)
+
     @override
     def _mkdir_local_folder(self: Self, folder: str) -> None:
         Path(folder).mkdir(parents=True)
@@ -94,6 +114,10 @@ class SlurmSSHRunner(BaseSlurmRunner):
             logger.debug(f"[_fetch_artifacts] EXIT ({finished_slurm_jobs=}).")
             return None
 
+        if self.shared_config.artifact_streaming_config is not None:
+            self._stream_artifacts(finished_slurm_jobs)
+            return None
+
         t_0 = time.perf_counter()
         logger.debug(f"[_fetch_artifacts] START ({len(finished_slurm_jobs)=}).")
 
@@ -107,22 +131,7 @@ class SlurmSSHRunner(BaseSlurmRunner):
         tarfile_path_remote = workdir_remote.with_suffix(".tar.gz").as_posix()
 
         # Create file list
-        # NOTE: see issue 2483
-        filelist = []
-        for _slurm_job in finished_slurm_jobs:
-            _single_job_filelist = [
-                _slurm_job.slurm_stdout_remote_path.name,
-                _slurm_job.slurm_stderr_remote_path.name,
-            ]
-            for task in _slurm_job.tasks:
-                _single_job_filelist.extend(
-                    [
-                        task.output_file_remote_path.name,
-                        task.task_files.log_file_remote_path.name,
-                        task.task_files.metadiff_file_remote_path.name,
-                    ]
-                )
-            filelist.extend(_single_job_filelist)
+        filelist = self._get_artifact_filelist(finished_slurm_jobs)
         filelist_string = "\n".join(filelist)
         elapsed = time.perf_counter() - t_0
         logger.debug(
@@ -177,6 +186,59 @@ class SlurmSSHRunner(BaseSlurmRunner):
         t_1 = time.perf_counter()
         logger.info(f"[_fetch_artifacts] End - elapsed={t_1 - t_0:.3f} s")
 
+    def _stream_artifacts(self, finished_slurm_jobs: list[SlurmJob]) -> None:
+        """
+        Stream the artifacts of a list of SLURM jobs into their local working
+        directory.
+
+        The jobs are split into chunks of `max_jobs_per_stream` jobs, and the
+        artifacts of each chunk are archived remotely by a `tar` command whose
+        output is extracted locally as it arrives, without any intermediate
+        file. Up to `max_concurrent_streams` chunks are processed
+        simultaneously, over different channels of the same SSH connection.
+        """
+        t_0 = time.perf_counter()
+        logger.debug(
+            f"[_stream_artifacts] START ({len(finished_slurm_jobs)=})."
+        )
+
+        self.validate_slurm_jobs_workdirs(finished_slurm_jobs)
+        workdir_local = finished_slurm_jobs[0].workdir_local
+        workdir_remote = finished_slurm_jobs[0].workdir_remote
+        workdir_local.mkdir(exist_ok=True)
+
+        streaming_config = self.shared_config.artifact_streaming_config
+        chunk_size = streaming_config.max_jobs_per_stream
+        chunks = [
+            finished_slurm_jobs[ind : ind + chunk_size]
+            for ind in range(0, len(finished_slurm_jobs), chunk_size)
+        ]
+        tar_command = get_tar_streaming_cmd(subfolder_path=workdir_remote)
+
+        def _stream_chunk(slurm_jobs: list[SlurmJob]) -> None:
+            filelist = self._get_artifact_filelist(slurm_jobs)
+            self.fractal_ssh.stream_command_output(
+                cmd=tar_command,
+                stdin="\n".join(filelist) + "\n",
+                process_stdout=partial(
+                    extract_tar_stream, subfolder_path=workdir_local
+                ),
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=min(
+                len(chunks), streaming_config.max_concurrent_streams
+            )
+        ) as executor:
+            # Note: `list` is needed to re-raise exceptions from threads
+            list(executor.map(_stream_chunk, chunks))
+
+        t_1 = time.perf_counter()
+        logger.info(
+            f"[_stream_artifacts] End ({len(chunks)} streams) - "
+            f"elapsed={t_1 - t_0:.3f} s"
+        )
+
     @override
     def _run_remote_cmd(self: Self, cmd: str) -> str:
         stdout = self.fractal_ssh.run_command(cmd=cmd)
@@ -268,7 +330,7 @@ class SlurmSSHRunner(BaseSlurmRunner):
 
         job_id_single_str = ",".join([str(j) for j in job_ids])
         cmd = (
-            "squeue --noheader --format='%i %T' --states=all "
+            "squeue --noheader --format='%i %T' --states=all --array "
             f"--jobs={job_id_single_str}"
         )
 
@@ -18,6 +18,10 @@ another user. Note that this requires appropriate sudo permissions.
 
 import shlex
 import subprocess  # nosec
+from collections.abc import Callable
+from contextlib import suppress
+from threading import Thread
+from typing import BinaryIO
 
 from fractal_server.logger import set_logger
 from fractal_server.string_tools import validate_cmd
@@ -68,6 +72,79 @@ def _run_command_as_user(
     return res
 
 
+def _stream_command_output_as_user(
+    *,
+    cmd: str,
+    user: str | None = None,
+    stdin: str,
+    process_stdout: Callable[[BinaryIO], None],
+) -> None:
+    """
+    Use `sudo -u` to impersonate another user and run a command, while
+    processing its standard output as a stream
+
+    Args:
+        cmd: Command to be run
+        user: User to be impersonated
+        stdin: Standard input of the command
+        process_stdout: Function which reads the standard output of the
+                        command, as a binary file-like object.
+
+    Raises:
+        RuntimeError: if subprocess returncode is not 0.
+    """
+    validate_cmd(cmd)
+    logger.debug(f'[_stream_command_output_as_user] {user=}, cmd="{cmd}"')
+    if user:
+        new_cmd = f"sudo --set-home --non-interactive -u {user} {cmd}"
+    else:
+        new_cmd = cmd
+    stderr_chunks = []
+    with subprocess.Popen(  # nosec
+        shlex.split(new_cmd),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as proc:
+        # Standard input and error are handled in their own threads, since
+        # either pipe may fill up while standard output is being read
+        def _write_stdin() -> None:
+            # A broken pipe means that the command already failed
+            with suppress(BrokenPipeError):
+                proc.stdin.write(stdin.encode())
+            with suppress(BrokenPipeError):
+                proc.stdin.close()
+
+        def _read_stderr() -> None:
+            stderr_chunks.append(proc.stderr.read())
+
+        helper_threads = [
+            Thread(target=_write_stdin, daemon=True),
+            Thread(target=_read_stderr, daemon=True),
+        ]
+        for thread in helper_threads:
+            thread.start()
+        processing_error = None
+        try:
+            process_stdout(proc.stdout)
+        except Exception as e:
+            processing_error = e
+        # Consume any remaining output, so that the command can terminate
+        proc.stdout.read()
+        for thread in helper_threads:
+            thread.join()
+    stderr = b"".join(stderr_chunks).decode(errors="replace")
+    logger.debug(f"[_stream_command_output_as_user] {proc.returncode=}")
+    logger.debug(f"[_stream_command_output_as_user] {stderr=}")
+
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"{cmd=}\n\n{proc.returncode=}\n\n{stderr=}\n"
+        ) from processing_error
+    if processing_error is not None:
+        raise processing_error
+
+
 def _mkdir_as_user(*, folder: str, user: str) -> None:
     """
     Create a folder as a different user
@@ -2,7 +2,8 @@ import logging
 import os
 import shlex
 import subprocess  # nosec
-from concurrent.futures import ThreadPoolExecutor
+import time
+from functools import partial
 from pathlib import Path
 from typing import Self
 from typing import override
@@ -18,9 +19,16 @@ from fractal_server.runner.executors.slurm_common.base_slurm_runner import (
 from fractal_server.runner.executors.slurm_common.slurm_job_task_models import (
     SlurmJob,
 )
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    extract_tar_stream,
+)
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    get_tar_streaming_cmd,
+)
 
 from ._subprocess_run_as_user import _mkdir_as_user
 from ._subprocess_run_as_user import _run_command_as_user
+from ._subprocess_run_as_user import _stream_command_output_as_user
 
 logger = set_logger(__name__)
 
@@ -101,76 +109,46 @@ class SlurmSudoRunner(BaseSlurmRunner):
     def _mkdir_remote_folder(self: Self, folder: str) -> None:
         _mkdir_as_user(folder=folder, user=self.slurm_user)
 
-    def _fetch_artifacts_single_job(self: Self, job: SlurmJob) -> None:
-        """
-        Fetch artifacts for a single SLURM jobs.
-        """
-        logger.debug(f"[_fetch_artifacts_single_job] {job.slurm_job_id=} START")
-        source_target_list = [
-            (job.slurm_stdout_remote, job.slurm_stdout_local),
-            (job.slurm_stderr_remote, job.slurm_stderr_local),
-        ]
-        for task in job.tasks:
-            source_target_list.extend(
-                [
-                    (
-                        task.output_file_remote,
-                        task.output_file_local,
-                    ),
-                    (
-                        task.task_files.log_file_remote,
-                        task.task_files.log_file_local,
-                    ),
-                    (
-                        task.task_files.metadiff_file_remote,
-                        task.task_files.metadiff_file_local,
-                    ),
-                ]
-            )
-
-        for source, target in source_target_list:
-            try:
-                res = _run_command_as_user(
-                    cmd=f"cat {source}",
-                    user=self.slurm_user,
-                    check=True,
-                )
-                # Write local file
-                with open(target, "w") as f:
-                    f.write(res.stdout)
-                logger.debug(
-                    f"[_fetch_artifacts_single_job] Copied {source} into "
-                    f"{target}"
-                )
-            except RuntimeError as e:
-                logger.warning(
-                    f"SKIP copy {source} into {target}. "
-                    f"Original error: {str(e)}"
-                )
-        logger.debug(f"[_fetch_artifacts_single_job] {job.slurm_job_id=} END")
-
     def _fetch_artifacts(
         self,
         finished_slurm_jobs: list[SlurmJob],
     ) -> None:
         """
         Fetch artifacts for a list of SLURM jobs.
+
+        A single `tar` command, run as `self.slurm_user`, archives all
+        artifacts and writes them to its standard output, which is extracted
+        into the local working directory while it is being read.
         """
-        MAX_NUM_THREADS = 12
-        THREAD_NAME_PREFIX = "fetch_artifacts"
-        logger.debug(
-            "[_fetch_artifacts] START "
-            f"({MAX_NUM_THREADS=}, {len(finished_slurm_jobs)=})."
+        if len(finished_slurm_jobs) == 0:
+            logger.debug(f"[_fetch_artifacts] EXIT ({finished_slurm_jobs=}).")
+            return None
+
+        t_0 = time.perf_counter()
+        logger.debug(f"[_fetch_artifacts] START ({len(finished_slurm_jobs)=}).")
+
+        self.validate_slurm_jobs_workdirs(finished_slurm_jobs)
+        workdir_local = finished_slurm_jobs[0].workdir_local
+        workdir_remote = finished_slurm_jobs[0].workdir_remote
+
+        filelist = self._get_artifact_filelist(finished_slurm_jobs)
+        _stream_command_output_as_user(
+            cmd=get_tar_streaming_cmd(
+                subfolder_path=workdir_remote,
+                compress=False,
+            ),
+            user=self.slurm_user,
+            stdin="\n".join(filelist) + "\n",
+            process_stdout=partial(
+                extract_tar_stream, subfolder_path=workdir_local
+            ),
+        )
+
+        t_1 = time.perf_counter()
+        logger.info(
+            f"[_fetch_artifacts] End ({len(filelist)=}) - "
+            f"elapsed={t_1 - t_0:.3f} s"
         )
-        with ThreadPoolExecutor(
-            max_workers=MAX_NUM_THREADS,
-            thread_name_prefix=THREAD_NAME_PREFIX,
-        ) as executor:
-            executor.map(
-                self._fetch_artifacts_single_job,
-                finished_slurm_jobs,
-            )
-        logger.debug("[_fetch_artifacts] END.")
 
     @override
     def _run_local_cmd(self: Self, cmd: str) -> str:
@@ -201,7 +179,7 @@ class SlurmSudoRunner(BaseSlurmRunner):
 
         job_id_single_str = ",".join([str(j) for j in job_ids])
         cmd = (
-            "squeue --noheader --format='%i %T' --states=all "
+            "squeue --noheader --format='%i %T' --states=all --array "
             f"--jobs {job_id_single_str}"
         )
         res = _subprocess_run_or_raise(cmd)
@@ -1,29 +1,67 @@
-import shutil
-import subprocess  # nosec
-from functools import cache
+from collections.abc import Iterable
 from typing import Any
 
+from sqlalchemy import Column
+from sqlalchemy import ColumnElement
+from sqlalchemy import Integer
+from sqlalchemy import MetaData
+from sqlalchemy import String
+from sqlalchemy import Table
+from sqlalchemy import and_
+from sqlalchemy import any_
+from sqlalchemy import bindparam
+from sqlalchemy import func
+from sqlalchemy import or_
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import Insert
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import DataError
 from sqlalchemy.orm import Session
 from sqlmodel import select
 from sqlmodel import update
 
+from fractal_server.app.events import DatasetEventType
+from fractal_server.app.events import notify_dataset_event_no_commit
+from fractal_server.app.events import notify_history_units_no_commit
 from fractal_server.app.models.v2 import HistoryImageCache
 from fractal_server.app.models.v2 import HistoryRun
 from fractal_server.app.models.v2 import HistoryUnit
 from fractal_server.app.models.v2 import JobV2
 from fractal_server.app.schemas.v2 import HistoryUnitStatus
+from fractal_server.images.status_tools import _prepare_image_counters_statement
+from fractal_server.images.status_tools import (
+    add_history_units_to_summary_no_commit,
+)
+from fractal_server.images.status_tools import (
+    subtract_history_units_from_summary_no_commit,
+)
 from fractal_server.logger import set_logger
+from fractal_server.runner.v2.log_scanner import scan_logfile
+from fractal_server.runner.v2.log_scanner import scan_logfiles
 
 _CHUNK_SIZE = 2_000
+_COPY_THRESHOLD = 10_000
+_IMAGE_CACHE_COLUMNS = [
+    "zarr_url",
+    "dataset_id",
+    "workflowtask_id",
+    "latest_history_unit_id",
+]
 
-logger = set_logger(__name__)
-
+# Staging table for `_bulk_upsert_image_cache_copy`, dropped upon commit
+_image_cache_staging_table = Table(
+    "historyimagecache_staging",
+    MetaData(),
+    Column("zarr_url", String, nullable=False),
+    Column("dataset_id", Integer, nullable=False),
+    Column("workflowtask_id", Integer, nullable=False),
+    Column("latest_history_unit_id", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
 
-@cache
-def _get_grep_path() -> str:
-    return shutil.which("grep")
+logger = set_logger(__name__)
 
 
 def update_status_of_history_run(
@@ -35,6 +73,16 @@ def update_status_of_history_run(
     run = db_sync.get_one(HistoryRun, history_run_id)
     run.status = status
     db_sync.merge(run)
+    notify_dataset_event_no_commit(
+        dataset_id=run.dataset_id,
+        event_type=DatasetEventType.HISTORY_RUN,
+        data=dict(
+            workflowtask_id=run.workflowtask_id,
+            history_run_id=run.id,
+            status=status,
+        ),
+        db=db_sync,
+    )
     db_sync.commit()
 
 
@@ -45,14 +93,28 @@ def update_history_unit_no_commit(
     db_sync: Session,
 ) -> None:
     unit = db_sync.get_one(HistoryUnit, history_unit_id)
-    unit.status = status
-    res = subprocess.run(  # nosec
-        [_get_grep_path(), "-i", "WARNING", "-q", unit.logfile],
-        stderr=subprocess.DEVNULL,
+    warning_lines = scan_logfile(unit.logfile)
+    has_warnings = len(warning_lines) > 0
+    if (
+        unit.status == status
+        and unit.has_warnings == has_warnings
+        and unit.warning_lines == warning_lines
+    ):
+        return
+    subtract_history_units_from_summary_no_commit(
+        history_unit_ids=[history_unit_id], db=db_sync
     )
-    unit.has_warnings = res.returncode == 0
+    unit.status = status
+    unit.has_warnings = has_warnings
+    unit.warning_lines = warning_lines
     db_sync.merge(unit)
     db_sync.flush()
+    add_history_units_to_summary_no_commit(
+        history_unit_ids=[history_unit_id], db=db_sync
+    )
+    notify_history_units_no_commit(
+        history_unit_ids=[history_unit_id], db=db_sync
+    )
 
 
 def bulk_update_has_warnings_history_unit(
@@ -65,25 +127,30 @@ def bulk_update_has_warnings_history_unit(
             HistoryUnit.id.in_(history_unit_ids)
         )
     ).all()
-    grep_path = _get_grep_path()
+    warning_lines = scan_logfiles([logfile for _, logfile in ids_logfiles])
     units_with_warnings = [
-        _id
+        (_id, warning_lines[logfile])
         for _id, logfile in ids_logfiles
-        if subprocess.run(  # nosec
-            [grep_path, "-i", "WARNING", "-q", logfile],
-            stderr=subprocess.DEVNULL,
-        ).returncode
-        == 0
+        if warning_lines[logfile]
     ]
     len_units_with_warnings = len(units_with_warnings)
     for ind in range(0, len_units_with_warnings, _CHUNK_SIZE):
+        chunk = units_with_warnings[ind : ind + _CHUNK_SIZE]
+        chunk_ids = [_id for _id, _ in chunk]
+        subtract_history_units_from_summary_no_commit(
+            history_unit_ids=chunk_ids, db=db_sync
+        )
         db_sync.execute(
-            update(HistoryUnit)
-            .where(
-                HistoryUnit.id.in_(units_with_warnings[ind : ind + _CHUNK_SIZE])
-            )
-            .values(has_warnings=True)
+            update(HistoryUnit),
+            [
+                dict(id=_id, has_warnings=True, warning_lines=lines)
+                for _id, lines in chunk
+            ],
+        )
+        add_history_units_to_summary_no_commit(
+            history_unit_ids=chunk_ids, db=db_sync
         )
+        notify_history_units_no_commit(history_unit_ids=chunk_ids, db=db_sync)
         db_sync.commit()
 
 
@@ -98,25 +165,316 @@ def bulk_update_status_of_history_unit(
         f"[bulk_update_status_of_history_unit] {len_history_unit_ids=}."
     )
     for ind in range(0, len_history_unit_ids, _CHUNK_SIZE):
+        chunk_ids = history_unit_ids[ind : ind + _CHUNK_SIZE]
+        subtract_history_units_from_summary_no_commit(
+            history_unit_ids=chunk_ids, db=db_sync
+        )
         db_sync.execute(
             update(HistoryUnit)
-            .where(
-                HistoryUnit.id.in_(history_unit_ids[ind : ind + _CHUNK_SIZE])
-            )
+            .where(HistoryUnit.id.in_(chunk_ids))
             .values(status=status)
         )
+        add_history_units_to_summary_no_commit(
+            history_unit_ids=chunk_ids, db=db_sync
+        )
+        notify_history_units_no_commit(history_unit_ids=chunk_ids, db=db_sync)
         # NOTE: keeping commit within the for loop is much more efficient
         db_sync.commit()
 
 
+def bulk_update_history_units_no_commit(
+    *,
+    history_unit_statuses: dict[int, HistoryUnitStatus],
+    db_sync: Session,
+) -> None:
+    """
+    Set the status and warning flag of many history units.
+
+    This is the set-based version of `update_history_unit_no_commit`: units
+    are grouped by their new `(status, has_warnings)` values, and each group
+    is updated through chunked `UPDATE` statements (followed by a bulk
+    update of the `warning_lines` of units with warnings). Units which are
+    already up to date are skipped.
+
+    Args:
+        history_unit_statuses: Map from history-unit ID to the new status.
+        db_sync: A sync db session
+    """
+    history_unit_ids = list(history_unit_statuses.keys())
+    current_units = []
+    for ind in range(0, len(history_unit_ids), _CHUNK_SIZE):
+        chunk_ids = history_unit_ids[ind : ind + _CHUNK_SIZE]
+        res = db_sync.execute(
+            select(
+                HistoryUnit.id,
+                HistoryUnit.logfile,
+                HistoryUnit.status,
+                HistoryUnit.has_warnings,
+                HistoryUnit.warning_lines,
+            ).where(HistoryUnit.id.in_(chunk_ids))
+        )
+        current_units.extend(res.all())
+
+    warning_lines = scan_logfiles(
+        [logfile for _, logfile, _, _, _ in current_units]
+    )
+    ids_by_values: dict[tuple[HistoryUnitStatus, bool], list[int]] = {}
+    for _id, logfile, *old_values in current_units:
+        new_values = (
+            history_unit_statuses[_id],
+            len(warning_lines[logfile]) > 0,
+            warning_lines[logfile],
+        )
+        if new_values != tuple(old_values):
+            ids_by_values.setdefault(new_values[:2], []).append(_id)
+    logfile_by_id = {_id: logfile for _id, logfile, *_ in current_units}
+
+    for (status, has_warnings), ids in ids_by_values.items():
+        logger.debug(
+            "[bulk_update_history_units_no_commit] "
+            f"{status=}, {has_warnings=}, {len(ids)=}."
+        )
+        for ind in range(0, len(ids), _CHUNK_SIZE):
+            chunk_ids = ids[ind : ind + _CHUNK_SIZE]
+            subtract_history_units_from_summary_no_commit(
+                history_unit_ids=chunk_ids, db=db_sync
+            )
+            db_sync.execute(
+                update(HistoryUnit)
+                .where(HistoryUnit.id.in_(chunk_ids))
+                .values(
+                    status=status,
+                    has_warnings=has_warnings,
+                    warning_lines=[],
+                )
+            )
+            if has_warnings:
+                db_sync.execute(
+                    update(HistoryUnit),
+                    [
+                        dict(
+                            id=_id,
+                            warning_lines=warning_lines[logfile_by_id[_id]],
+                        )
+                        for _id in chunk_ids
+                    ],
+                )
+            add_history_units_to_summary_no_commit(
+                history_unit_ids=chunk_ids, db=db_sync
+            )
+            notify_history_units_no_commit(
+                history_unit_ids=chunk_ids, db=db_sync
+            )
+
+
+def _copy_rows_no_commit(
+    *,
+    table_name: str,
+    columns: list[str],
+    rows: Iterable[tuple[Any, ...]],
+    db: Session,
+) -> None:
+    """
+    Write rows into a table through `COPY ... FROM STDIN`.
+
+    The `COPY` runs on the connection of `db`, within its current
+    transaction.
+    """
+    driver_connection = db.connection().connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        with cursor.copy(
+            f"COPY {table_name} ({', '.join(columns)}) FROM STDIN"
+        ) as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def bulk_create_history_units_no_commit(
+    *,
+    history_run_id: int,
+    logfiles: list[str],
+    list_zarr_urls: list[list[str]],
+    db: Session,
+) -> list[int]:
+    """
+    Create many `SUBMITTED` history units for a history run.
+
+    The IDs of the new units are first obtained from the `historyunit.id`
+    sequence (through a single query), and then all units are written
+    through `COPY`. This avoids both the per-unit refresh of ORM objects and
+    the parameter binding of large `INSERT` statements.
+
+    Args:
+        history_run_id:
+        logfiles: The log file of each unit.
+        list_zarr_urls: The `zarr_urls` of each unit.
+        db: A sync database session
+
+    Returns:
+        The IDs of the new units, in the same order as `logfiles`.
+    """
+    num_units = len(logfiles)
+    if num_units == 0:
+        return []
+    res = db.execute(
+        select(
+            func.nextval(
+                func.pg_get_serial_sequence(HistoryUnit.__tablename__, "id")
+            )
+        ).select_from(func.generate_series(1, num_units))
+    )
+    history_unit_ids = sorted(res.scalars().all())
+    _copy_rows_no_commit(
+        table_name=HistoryUnit.__tablename__,
+        columns=[
+            "id",
+            "history_run_id",
+            "status",
+            "has_warnings",
+            "logfile",
+            "zarr_urls",
+        ],
+        rows=(
+            (
+                history_unit_id,
+                history_run_id,
+                HistoryUnitStatus.SUBMITTED.value,
+                False,
+                logfile,
+                zarr_urls,
+            )
+            for history_unit_id, logfile, zarr_urls in zip(
+                history_unit_ids, logfiles, list_zarr_urls, strict=True
+            )
+        ),
+        db=db,
+    )
+    logger.debug(f"[bulk_create_history_units_no_commit] {num_units=}.")
+    return history_unit_ids
+
+
+def _prepare_image_cache_upsert_statement(
+    stmt: Insert,
+) -> Insert:
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            HistoryImageCache.zarr_url,
+            HistoryImageCache.dataset_id,
+            HistoryImageCache.workflowtask_id,
+        ],
+        set_=dict(latest_history_unit_id=stmt.excluded.latest_history_unit_id),
+    )
+
+
+def _get_image_cache_where_clause(
+    list_objects: list[dict[str, Any]],
+) -> ColumnElement[bool]:
+    """
+    Select the `HistoryImageCache` rows with the same keys as some objects.
+
+    NOTE: Objects are grouped by dataset and workflow task, and the
+    `zarr_url`s of each group are bound as a single array parameter. A
+    `(zarr_url, dataset_id, workflowtask_id) IN (...)` condition becomes an
+    `OR` of row comparisons, which is very slow to plan for thousands of
+    rows. A `zarr_url IN (...)` list with thousands of parameters may
+    instead lead to a generic plan (for prepared statements) which scans all
+    rows of a dataset.
+    """
+    zarr_urls_by_key: dict[tuple[int, int], list[str]] = {}
+    for obj in list_objects:
+        key = (obj["dataset_id"], obj["workflowtask_id"])
+        zarr_urls_by_key.setdefault(key, []).append(obj["zarr_url"])
+    return or_(
+        *(
+            and_(
+                HistoryImageCache.dataset_id == dataset_id,
+                HistoryImageCache.workflowtask_id == workflowtask_id,
+                HistoryImageCache.zarr_url
+                == any_(
+                    bindparam(
+                        "zarr_urls",
+                        value=zarr_urls,
+                        type_=ARRAY(String),
+                        unique=True,
+                    )
+                ),
+            )
+            for (dataset_id, workflowtask_id), zarr_urls in (
+                zarr_urls_by_key.items()
+            )
+        )
+    )
+
+
+def _bulk_upsert_image_cache_copy(
+    *,
+    list_upsert_objects: list[dict[str, Any]],
+    db: Session,
+) -> None:
+    """
+    Upsert `HistoryImageCache` rows through a temporary staging table.
+
+    All rows are streamed into the staging table through `COPY`, and then
+    merged into `HistoryImageCache` through a single
+    `INSERT ... SELECT ... ON CONFLICT` statement, in a single transaction.
+    """
+    _image_cache_staging_table.create(db.connection())
+    _copy_rows_no_commit(
+        table_name=_image_cache_staging_table.name,
+        columns=_IMAGE_CACHE_COLUMNS,
+        rows=(
+            tuple(obj[column] for column in _IMAGE_CACHE_COLUMNS)
+            for obj in list_upsert_objects
+        ),
+        db=db,
+    )
+    staging = _image_cache_staging_table.c
+    where = [
+        tuple_(
+            HistoryImageCache.zarr_url,
+            HistoryImageCache.dataset_id,
+            HistoryImageCache.workflowtask_id,
+        ).in_(
+            select(
+                staging.zarr_url,
+                staging.dataset_id,
+                staging.workflowtask_id,
+            )
+        )
+    ]
+    db.execute(_prepare_image_counters_statement(where=where, sign=-1))
+    db.execute(
+        _prepare_image_cache_upsert_statement(
+            pg_insert(HistoryImageCache).from_select(
+                _IMAGE_CACHE_COLUMNS,
+                select(_image_cache_staging_table),
+            )
+        )
+    )
+    db.execute(_prepare_image_counters_statement(where=where, sign=1))
+    history_unit_ids = list(
+        {obj["latest_history_unit_id"] for obj in list_upsert_objects}
+    )
+    for ind in range(0, len(history_unit_ids), _CHUNK_SIZE):
+        notify_history_units_no_commit(
+            history_unit_ids=history_unit_ids[ind : ind + _CHUNK_SIZE],
+            db=db,
+        )
+    db.commit()
+
+
 def bulk_upsert_image_cache_fast(
     *,
     list_upsert_objects: list[dict[str, Any]],
     db: Session,
+    use_copy: bool | None = None,
 ) -> None:
     """
     Insert or update many objects into `HistoryImageCache` and commit
 
+    The image counters of `HistoryStatusSummary` are updated in the same
+    transactions.
+
     This function is an optimized version of
 
     ```python
@@ -125,6 +483,11 @@ def bulk_upsert_image_cache_fast(
     db.commit()
     ```
 
+    Objects are either upserted through `INSERT ... ON CONFLICT` statements
+    in chunks of `_CHUNK_SIZE` (with a commit after each chunk), or streamed
+    through `COPY` into a temporary table and then upserted in a single
+    transaction (see `_bulk_upsert_image_cache_copy`).
+
     See docs at
     https://docs.sqlalchemy.org/en/20/dialects/postgresql.html#insert-on-conflict-upsert
 
@@ -135,6 +498,8 @@ def bulk_upsert_image_cache_fast(
         list_upsert_objects:
             List of dictionaries for objects to be upsert-ed.
         db: A sync database session
+        use_copy: Whether to use `COPY` and a staging table. If `None`, this
+            is only done for more than `_COPY_THRESHOLD` objects.
     """
     len_list_upsert_objects = len(list_upsert_objects)
 
@@ -143,21 +508,32 @@ def bulk_upsert_image_cache_fast(
     if len_list_upsert_objects == 0:
         return None
 
+    if use_copy is None:
+        use_copy = len_list_upsert_objects > _COPY_THRESHOLD
+    if use_copy:
+        _bulk_upsert_image_cache_copy(
+            list_upsert_objects=list_upsert_objects, db=db
+        )
+        return None
+
     for ind in range(0, len_list_upsert_objects, _CHUNK_SIZE):
-        stmt = pg_insert(HistoryImageCache).values(
-            list_upsert_objects[ind : ind + _CHUNK_SIZE]
-        )
-        stmt = stmt.on_conflict_do_update(
-            index_elements=[
-                HistoryImageCache.zarr_url,
-                HistoryImageCache.dataset_id,
-                HistoryImageCache.workflowtask_id,
-            ],
-            set_=dict(
-                latest_history_unit_id=stmt.excluded.latest_history_unit_id
+        chunk = list_upsert_objects[ind : ind + _CHUNK_SIZE]
+        where_chunk = [_get_image_cache_where_clause(chunk)]
+        db.execute(
+            _prepare_image_counters_statement(where=where_chunk, sign=-1)
+        )
+        db.execute(
+            _prepare_image_cache_upsert_statement(
+                pg_insert(HistoryImageCache).values(chunk)
+            )
+        )
+        db.execute(_prepare_image_counters_statement(where=where_chunk, sign=1))
+        notify_history_units_no_commit(
+            history_unit_ids=list(
+                {obj["latest_history_unit_id"] for obj in chunk}
             ),
+            db=db,
         )
-        db.execute(stmt)
         db.commit()
 
 
@@ -1,3 +1,5 @@
+from typing import Any
+from typing import Hashable
 from typing import Iterable
 from typing import TypeVar
 
@@ -9,17 +11,35 @@ from .task_interface import InitArgsModel
 T = TypeVar("T", SingleImage, SingleImageTaskOutput, InitArgsModel)
 
 
+def _hashable_key(value: Any) -> Hashable:
+    """
+    Recursively map a `model_dump()` output to a hashable key.
+
+    Two values are mapped to equal keys if and only if they are equal, since
+    dictionaries become frozensets of items and lists become tuples.
+    """
+    if isinstance(value, dict):
+        return frozenset(
+            (key, _hashable_key(item)) for key, item in value.items()
+        )
+    if isinstance(value, list):
+        return tuple(_hashable_key(item) for item in value)
+    return value
+
+
 def deduplicate_list(
     this_list: Iterable[T],
 ) -> list[T]:
     """
     Custom replacement for `set(this_list)`, when items are non-hashable.
+
+    The first occurrence of each item is kept, in the original order.
     """
-    new_list_dict = []
+    seen_keys = set()
     new_list_objs = []
     for this_obj in this_list:
-        this_dict = this_obj.model_dump()
-        if this_dict not in new_list_dict:
-            new_list_dict.append(this_dict)
+        this_key = _hashable_key(this_obj.model_dump())
+        if this_key not in seen_keys:
+            seen_keys.add(this_key)
             new_list_objs.append(this_obj)
     return new_list_objs
@@ -0,0 +1,182 @@
+"""
+In-process search of warnings in task log files.
+
+A log file "has warnings" if any of its lines includes `warning`
+(case-insensitive), consistently with `grep -i WARNING`. Files are read in
+bounded chunks (or memory-mapped), and the first warning lines are returned
+so that they can be stored without reading the log file again.
+"""
+
+import mmap
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+
+from fractal_server.logger import set_logger
+
+WARNING_PATTERN = re.compile(rb"warning", re.IGNORECASE)
+MAX_WARNING_LINES = 10
+MAX_WARNING_LINE_LENGTH = 1_000
+
+_READ_CHUNK_SIZE = 1024 * 1024
+_PATTERN_OVERLAP = len("warning") - 1
+_MAX_NUM_THREADS = 8
+_THREAD_NAME_PREFIX = "scan_logfiles"
+
+logger = set_logger(__name__)
+
+
+def _decode_line(line: bytes) -> str:
+    line = line[: 4 * MAX_WARNING_LINE_LENGTH]
+    return (
+        line.decode("utf-8", errors="replace")
+        .replace("\x00", "")
+        .rstrip("\r")[:MAX_WARNING_LINE_LENGTH]
+    )
+
+
+def _find_warning_lines(
+    buffer: bytes | mmap.mmap,
+    max_lines: int,
+) -> list[bytes]:
+    """
+    Find the first lines of a buffer that match `WARNING_PATTERN`.
+
+    Lines that are longer than `MAX_WARNING_LINE_LENGTH` are truncated
+    (approximately, since the limit is then applied to decoded lines).
+    """
+    lines = []
+    pos = 0
+    while len(lines) < max_lines:
+        match = WARNING_PATTERN.search(buffer, pos)
+        if match is None:
+            break
+        start = buffer.rfind(b"\n", 0, match.start()) + 1
+        end = buffer.find(b"\n", match.end())
+        if end == -1:
+            end = len(buffer)
+        lines.append(
+            buffer[start : min(end, start + 4 * MAX_WARNING_LINE_LENGTH)]
+        )
+        pos = end + 1
+    return lines
+
+
+def _scan_stream(f: BinaryIO, max_lines: int) -> list[bytes]:
+    """
+    Find warning lines by reading a file in chunks of `_READ_CHUNK_SIZE`.
+
+    Memory usage is bounded also for very long lines: once the incomplete
+    line exceeds the chunk size, it is searched and then dropped (apart from
+    a few bytes that may hold the beginning of a match). In this case, the
+    stored warning line may start in the middle of the actual line.
+    """
+    lines = []
+    tail = b""
+    skip_line = False
+    while len(lines) < max_lines:
+        chunk = f.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer = tail + chunk
+        if skip_line:
+            # Drop the rest of a line that was already stored
+            newline = buffer.find(b"\n")
+            if newline == -1:
+                tail = b""
+                continue
+            buffer = buffer[newline + 1 :]
+            skip_line = False
+        split = buffer.rfind(b"\n") + 1
+        lines.extend(
+            _find_warning_lines(buffer[:split], max_lines - len(lines))
+        )
+        tail = buffer[split:]
+        if len(tail) > _READ_CHUNK_SIZE and len(lines) < max_lines:
+            tail_lines = _find_warning_lines(tail, 1)
+            if tail_lines:
+                lines.extend(tail_lines)
+                skip_line = True
+                tail = b""
+            else:
+                tail = tail[-_PATTERN_OVERLAP:]
+    if tail and not skip_line and len(lines) < max_lines:
+        lines.extend(_find_warning_lines(tail, max_lines - len(lines)))
+    return lines
+
+
+def scan_logfile(
+    logfile: str,
+    *,
+    max_lines: int = MAX_WARNING_LINES,
+    use_mmap: bool = False,
+) -> list[str]:
+    """
+    Find the first warning lines of a log file.
+
+    Args:
+        logfile: Path to the log file.
+        max_lines: Maximum number of warning lines to return.
+        use_mmap: Whether to memory-map the file, rather than reading it in
+            chunks.
+
+    Returns:
+        The first (at most `max_lines`) warning lines. This is an empty list
+        if the file has no warnings, or if it is missing or not readable.
+    """
+    try:
+        with open(logfile, "rb") as f:
+            if use_mmap:
+                try:
+                    with mmap.mmap(
+                        f.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as mm:
+                        lines = _find_warning_lines(mm, max_lines)
+                except ValueError:
+                    # Empty files cannot be memory-mapped
+                    lines = []
+            else:
+                lines = _scan_stream(f, max_lines)
+    except OSError as e:
+        logger.debug(f"Cannot scan '{logfile}'. Original error: {str(e)}")
+        return []
+    return [_decode_line(line) for line in lines]
+
+
+def scan_logfiles(
+    logfiles: list[str],
+    *,
+    max_lines: int = MAX_WARNING_LINES,
+    use_mmap: bool = False,
+) -> dict[str, list[str]]:
+    """
+    Find the first warning lines of many log files, in a thread pool.
+
+    Args:
+        logfiles: Paths to the log files (possibly with repetitions).
+        max_lines: Maximum number of warning lines per file.
+        use_mmap: Whether to memory-map the files.
+
+    Returns:
+        Map from each log file to its first warning lines (see
+        `scan_logfile`).
+    """
+    unique_logfiles = list(dict.fromkeys(logfiles))
+    if len(unique_logfiles) <= 1:
+        return {
+            logfile: scan_logfile(
+                logfile, max_lines=max_lines, use_mmap=use_mmap
+            )
+            for logfile in unique_logfiles
+        }
+    with ThreadPoolExecutor(
+        max_workers=_MAX_NUM_THREADS,
+        thread_name_prefix=_THREAD_NAME_PREFIX,
+    ) as executor:
+        results = executor.map(
+            lambda logfile: scan_logfile(
+                logfile, max_lines=max_lines, use_mmap=use_mmap
+            ),
+            unique_logfiles,
+        )
+        return dict(zip(unique_logfiles, results, strict=True))
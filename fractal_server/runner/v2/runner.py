@@ -1,16 +1,14 @@
 from copy import copy
-from copy import deepcopy
 from pathlib import Path
 from typing import Any
 
-from sqlalchemy.orm.attributes import flag_modified
-from sqlmodel import delete
-from sqlmodel import update
+from sqlmodel import select
 
 from fractal_server.app.db import get_sync_db
+from fractal_server.app.events import DatasetEventType
+from fractal_server.app.events import notify_dataset_event_no_commit
 from fractal_server.app.models.v2 import AccountingRecord
 from fractal_server.app.models.v2 import DatasetV2
-from fractal_server.app.models.v2 import HistoryImageCache
 from fractal_server.app.models.v2 import HistoryRun
 from fractal_server.app.models.v2 import HistoryUnit
 from fractal_server.app.models.v2 import Resource
@@ -21,14 +19,22 @@ from fractal_server.app.schemas.v2 import TaskDump
 from fractal_server.app.schemas.v2 import TaskGroupDump
 from fractal_server.app.schemas.v2 import TaskType
 from fractal_server.images import SingleImage
+from fractal_server.images.db_tools import bulk_delete_images_no_commit
+from fractal_server.images.db_tools import bulk_upsert_images_no_commit
+from fractal_server.images.db_tools import bump_images_version_no_commit
+from fractal_server.images.db_tools import get_dataset_images_sync
+from fractal_server.images.db_tools import update_dataset_facets_no_commit
+from fractal_server.images.image_list import ImageList
 from fractal_server.images.status_tools import IMAGE_STATUS_KEY
+from fractal_server.images.status_tools import delete_image_cache_no_commit
 from fractal_server.images.status_tools import enrich_images_unsorted_sync
+from fractal_server.images.status_tools import set_latest_history_run_no_commit
 from fractal_server.images.tools import filter_image_list
-from fractal_server.images.tools import find_image_by_zarr_url
 from fractal_server.images.tools import merge_type_filters
 from fractal_server.logger import get_logger
 from fractal_server.runner.exceptions import JobExecutionError
 from fractal_server.runner.executors.base_runner import BaseRunner
+from fractal_server.runner.v2.db_tools import bulk_update_status_of_history_unit
 from fractal_server.runner.v2.db_tools import update_status_of_history_run
 from fractal_server.types import AttributeFilters
 
@@ -47,10 +53,21 @@ def _remove_status_from_attributes(
 ) -> list[dict[str, Any]]:
     """
     Drop attribute `IMAGE_STATUS_KEY` from all images.
+
+    Input images are not modified, and only their top level and their
+    `attributes` dictionary are copied.
     """
-    images_copy = deepcopy(images)
-    [img["attributes"].pop(IMAGE_STATUS_KEY, None) for img in images_copy]
-    return images_copy
+    return [
+        img
+        | {
+            "attributes": {
+                key: value
+                for key, value in img["attributes"].items()
+                if key != IMAGE_STATUS_KEY
+            }
+        }
+        for img in images
+    ]
 
 
 def drop_none_attributes(attributes: dict[str, Any]) -> dict[str, Any]:
@@ -64,20 +81,16 @@ def drop_none_attributes(attributes: dict[str, Any]) -> dict[str, Any]:
 def get_origin_attribute_and_types(
     *,
     origin_url: str,
-    images: list[dict[str, Any]],
+    images: ImageList,
 ) -> tuple[dict[str, Any], dict[str, bool]]:
     """
     Search for origin image and extract its attributes/types.
     """
-    origin_img_search = find_image_by_zarr_url(
-        images=images,
-        zarr_url=origin_url,
-    )
-    if origin_img_search is None:
+    origin_image = images.get(origin_url)
+    if origin_image is None:
         updated_attributes = {}
         updated_types = {}
     else:
-        origin_image = origin_img_search["image"]
         updated_attributes = copy(origin_image["attributes"])
         updated_types = copy(origin_image["types"])
     return updated_attributes, updated_types
@@ -116,7 +129,10 @@ def execute_tasks(
 
     # Initialize local dataset attributes
     zarr_dir = dataset.zarr_dir
-    tmp_images = deepcopy(dataset.images)
+    with next(get_sync_db()) as db:
+        tmp_images = ImageList(
+            get_dataset_images_sync(dataset_id=dataset.id, db=db)
+        )
     current_type_filters = copy(job_type_filters)
 
     ENRICH_IMAGES_WITH_STATUS: bool = (
@@ -152,10 +168,12 @@ def execute_tasks(
 
             if ind_wftask == 0 and ENRICH_IMAGES_WITH_STATUS:
                 # FIXME: Could this be done on `type_filtered_images`?
-                tmp_images = enrich_images_unsorted_sync(
-                    images=tmp_images,
-                    dataset_id=dataset.id,
-                    workflowtask_id=wftask.id,
+                tmp_images = ImageList(
+                    enrich_images_unsorted_sync(
+                        images=tmp_images.to_list(),
+                        dataset_id=dataset.id,
+                        workflowtask_id=wftask.id,
+                    )
                 )
             type_filtered_images = filter_image_list(
                 images=tmp_images,
@@ -194,6 +212,23 @@ def execute_tasks(
                 status=HistoryUnitStatus.SUBMITTED,
             )
             db.add(history_run)
+            db.flush()
+            set_latest_history_run_no_commit(
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                history_run_id=history_run.id,
+                db=db,
+            )
+            notify_dataset_event_no_commit(
+                dataset_id=dataset.id,
+                event_type=DatasetEventType.HISTORY_RUN,
+                data=dict(
+                    workflowtask_id=wftask.id,
+                    history_run_id=history_run.id,
+                    status=history_run.status,
+                ),
+                db=db,
+            )
             db.commit()
             db.refresh(history_run)
             history_run_id = history_run.id
@@ -334,31 +369,21 @@ def execute_tasks(
 
             # Update image list
             num_new_images = 0
+            updated_zarr_urls = set()
+            previous_images = {}
             current_task_output.check_zarr_urls_are_unique()
             # NOTE: In principle we could make the task-output processing more
             # granular, and also associate output-processing failures to
             # history status.
             for image_obj in current_task_output.image_list_updates:
                 image = image_obj.model_dump()
-                if image["zarr_url"] in [img["zarr_url"] for img in tmp_images]:
-                    img_search = find_image_by_zarr_url(
-                        images=tmp_images,
-                        zarr_url=image["zarr_url"],
-                    )
-                    if img_search is None:
-                        raise ValueError(
-                            "Unexpected error: "
-                            f"Image with zarr_url {image['zarr_url']} not "
-                            "found, while updating image list."
-                        )
-                    existing_image_index = img_search["index"]
-
+                existing_image = tmp_images.get(image["zarr_url"])
+                if existing_image is not None:
                     if (
                         image["origin"] is None
                         or image["origin"] == image["zarr_url"]
                     ):
                         # CASE 1: Edit existing image
-                        existing_image = img_search["image"]
                         new_attributes = copy(existing_image["attributes"])
                         new_types = copy(existing_image["types"])
                         new_image = dict(
@@ -388,10 +413,16 @@ def execute_tasks(
                     new_types.update(image["types"])
                     new_types.update(task.output_types)
                     new_image["types"] = new_types
+                    if new_image == existing_image:
+                        # Keep the existing image, which needs no update
+                        continue
                     # Validate new image
                     SingleImage(**new_image)
                     # Update image in the dataset image list
-                    tmp_images[existing_image_index] = new_image
+                    previous_images[new_image["zarr_url"]] = tmp_images.replace(
+                        new_image
+                    )
+                    updated_zarr_urls.add(new_image["zarr_url"])
 
                 else:
                     # CASE 3: Add new image
@@ -427,20 +458,20 @@ def execute_tasks(
                     SingleImage(**new_image)
                     # Add image into the dataset image list
                     tmp_images.append(new_image)
+                    updated_zarr_urls.add(new_image["zarr_url"])
                     num_new_images += 1
 
             # Remove images from tmp_images
             for img_zarr_url in current_task_output.image_list_removals:
-                img_search = find_image_by_zarr_url(
-                    images=tmp_images, zarr_url=img_zarr_url
-                )
-                if img_search is None:
+                if img_zarr_url not in tmp_images:
                     raise JobExecutionError(
                         "Cannot remove missing image "
                         f"(zarr_url={img_zarr_url})."
                     )
                 else:
-                    tmp_images.pop(img_search["index"])
+                    previous_images[img_zarr_url] = tmp_images.remove(
+                        img_zarr_url
+                    )
 
             # Update type_filters based on task-manifest output_types
             type_filters_from_task_manifest = task.output_types
@@ -451,33 +482,57 @@ def execute_tasks(
                 f"Original error: {str(e)}"
             )
             with next(get_sync_db()) as db:
-                db.execute(
-                    update(HistoryUnit)
-                    .where(HistoryUnit.history_run_id == history_run_id)
-                    .values(status=HistoryUnitStatus.FAILED)
+                history_unit_ids = (
+                    db.execute(
+                        select(HistoryUnit.id).where(
+                            HistoryUnit.history_run_id == history_run_id
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+                bulk_update_status_of_history_unit(
+                    history_unit_ids=history_unit_ids,
+                    status=HistoryUnitStatus.FAILED,
+                    db_sync=db,
                 )
-                db.commit()
             raise e
 
         with next(get_sync_db()) as db:
-            # Write current dataset images into the database.
-            db_dataset = db.get_one(DatasetV2, dataset.id)
+            # Write new/updated and removed images into the database.
+            updated_images = [
+                img
+                for img in tmp_images
+                if img["zarr_url"] in updated_zarr_urls
+            ]
+            old_images = list(previous_images.values())
             if ENRICH_IMAGES_WITH_STATUS:
-                db_dataset.images = _remove_status_from_attributes(tmp_images)
-            else:
-                db_dataset.images = tmp_images
-            flag_modified(db_dataset, "images")
-            db.merge(db_dataset)
-
-            db.execute(
-                delete(HistoryImageCache)
-                .where(HistoryImageCache.dataset_id == dataset.id)
-                .where(HistoryImageCache.workflowtask_id == wftask.id)
-                .where(
-                    HistoryImageCache.zarr_url.in_(
-                        current_task_output.image_list_removals
-                    )
-                )
+                updated_images = _remove_status_from_attributes(updated_images)
+                old_images = _remove_status_from_attributes(old_images)
+            bulk_upsert_images_no_commit(
+                dataset_id=dataset.id,
+                images=updated_images,
+                db=db,
+            )
+            bulk_delete_images_no_commit(
+                dataset_id=dataset.id,
+                zarr_urls=current_task_output.image_list_removals,
+                db=db,
+            )
+            update_dataset_facets_no_commit(
+                dataset_id=dataset.id,
+                old_images=old_images,
+                new_images=updated_images,
+                db=db,
+            )
+            if updated_images or current_task_output.image_list_removals:
+                bump_images_version_no_commit(dataset_id=dataset.id, db=db)
+
+            delete_image_cache_no_commit(
+                dataset_id=dataset.id,
+                zarr_urls=current_task_output.image_list_removals,
+                workflowtask_id=wftask.id,
+                db=db,
             )
 
             db.commit()
@@ -7,7 +7,6 @@ from pydantic import BaseModel
 from pydantic import ConfigDict
 
 from fractal_server.app.db import get_sync_db
-from fractal_server.app.models.v2 import HistoryUnit
 from fractal_server.app.models.v2 import TaskV2
 from fractal_server.app.models.v2 import WorkflowTaskV2
 from fractal_server.app.schemas.v2 import HistoryUnitStatus
@@ -34,6 +33,7 @@ from fractal_server.runner.v2.task_interface import (
     _cast_and_validate_TaskOutput,
 )
 
+from .db_tools import bulk_create_history_units_no_commit
 from .db_tools import bulk_update_has_warnings_history_unit
 from .db_tools import update_history_unit_no_commit
 from .deduplicate_list import deduplicate_list
@@ -202,20 +202,17 @@ def run_task_non_parallel(
         elif task_type == TaskType.CONVERTER_NON_PARALLEL:
             zarr_urls = []
 
-        history_unit = HistoryUnit(
+        (history_unit_id,) = bulk_create_history_units_no_commit(
             history_run_id=history_run_id,
-            status=HistoryUnitStatus.SUBMITTED,
-            logfile=task_files.log_file_local,
-            zarr_urls=zarr_urls,
+            logfiles=[task_files.log_file_local],
+            list_zarr_urls=[zarr_urls],
+            db=db,
         )
-        db.add(history_unit)
         db.commit()
-        db.refresh(history_unit)
         logger.debug(
             "[run_task_non_parallel] Created `HistoryUnit` with "
             f"{history_run_id=}."
         )
-        history_unit_id = history_unit.id
         bulk_upsert_image_cache_fast(
             db=db,
             list_upsert_objects=[
@@ -225,7 +222,7 @@ def run_task_non_parallel(
                     zarr_url=zarr_url,
                     latest_history_unit_id=history_unit_id,
                 )
-                for zarr_url in history_unit.zarr_urls
+                for zarr_url in zarr_urls
             ],
         )
 
@@ -312,36 +309,31 @@ def run_task_parallel(
         batch_size=runner_config.batch_size_or_zero,
     )
 
-    history_units = [
-        HistoryUnit(
+    with next(get_sync_db()) as db:
+        history_unit_ids = bulk_create_history_units_no_commit(
             history_run_id=history_run_id,
-            status=HistoryUnitStatus.SUBMITTED,
-            logfile=list_task_files[ind].log_file_local,
-            zarr_urls=[image["zarr_url"]],
+            logfiles=[
+                task_files.log_file_local for task_files in list_task_files
+            ],
+            list_zarr_urls=[[image["zarr_url"]] for image in images],
+            db=db,
         )
-        for ind, image in enumerate(images)
-    ]
-
-    with next(get_sync_db()) as db:
-        db.add_all(history_units)
         db.commit()
         logger.debug(
-            f"[run_task_non_parallel] Created {len(history_units)} "
+            f"[run_task_parallel] Created {len(history_unit_ids)} "
             "`HistoryUnit`s."
         )
 
-        for history_unit in history_units:
-            db.refresh(history_unit)
-        history_unit_ids = [history_unit.id for history_unit in history_units]
-
         history_image_caches = [
             dict(
                 workflowtask_id=wftask.id,
                 dataset_id=dataset_id,
-                zarr_url=history_unit.zarr_urls[0],
-                latest_history_unit_id=history_unit.id,
+                zarr_url=image["zarr_url"],
+                latest_history_unit_id=history_unit_id,
+            )
+            for image, history_unit_id in zip(
+                images, history_unit_ids, strict=True
             )
-            for history_unit in history_units
         ]
 
         bulk_upsert_image_cache_fast(
@@ -435,16 +427,13 @@ def run_task_compound(
     # Create database History entries
     with next(get_sync_db()) as db:
         # Create a single `HistoryUnit` for the whole compound task
-        history_unit = HistoryUnit(
+        (init_history_unit_id,) = bulk_create_history_units_no_commit(
             history_run_id=history_run_id,
-            status=HistoryUnitStatus.SUBMITTED,
-            logfile=task_files_init.log_file_local,
-            zarr_urls=input_image_zarr_urls,
+            logfiles=[task_files_init.log_file_local],
+            list_zarr_urls=[input_image_zarr_urls],
+            db=db,
         )
-        db.add(history_unit)
         db.commit()
-        db.refresh(history_unit)
-        init_history_unit_id = history_unit.id
         logger.debug(
             "[run_task_compound] Created `HistoryUnit` with "
             f"{init_history_unit_id=}."
@@ -544,24 +533,23 @@ def run_task_compound(
     ]
 
     # Create one `HistoryUnit` per parallelization item
-    history_units = [
-        HistoryUnit(
+    with next(get_sync_db()) as db:
+        history_unit_ids = bulk_create_history_units_no_commit(
             history_run_id=history_run_id,
-            status=HistoryUnitStatus.SUBMITTED,
-            logfile=list_task_files[ind].log_file_local,
-            zarr_urls=[parallelization_item.zarr_url],
+            logfiles=[
+                task_files.log_file_local for task_files in list_task_files
+            ],
+            list_zarr_urls=[
+                [parallelization_item.zarr_url]
+                for parallelization_item in parallelization_list
+            ],
+            db=db,
         )
-        for ind, parallelization_item in enumerate(parallelization_list)
-    ]
-    with next(get_sync_db()) as db:
-        db.add_all(history_units)
         db.commit()
-        for history_unit in history_units:
-            db.refresh(history_unit)
         logger.debug(
-            f"[run_task_compound] Created {len(history_units)} `HistoryUnit`s."
+            f"[run_task_compound] Created {len(history_unit_ids)} "
+            "`HistoryUnit`s."
         )
-        history_unit_ids = [history_unit.id for history_unit in history_units]
 
     results, exceptions = runner.multisubmit(
         base_command=task.command_parallel,
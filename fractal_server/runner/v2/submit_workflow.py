@@ -15,6 +15,8 @@ from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session as DBSyncSession
 
 from fractal_server.app.db import DB
+from fractal_server.app.events import DatasetEventType
+from fractal_server.app.events import notify_dataset_event_no_commit
 from fractal_server.app.models.v2 import DatasetV2
 from fractal_server.app.models.v2 import JobV2
 from fractal_server.app.models.v2 import Profile
@@ -76,6 +78,13 @@ def fail_job(
     job.end_timestamp = get_timestamp()
     job.log = log_msg
     db.merge(job)
+    if job.dataset_id is not None:
+        notify_dataset_event_no_commit(
+            dataset_id=job.dataset_id,
+            event_type=DatasetEventType.JOB,
+            data=dict(job_id=job.id, status=job.status),
+            db=db,
+        )
     db.commit()
     return
 
@@ -269,6 +278,12 @@ def submit_workflow(
                 logs = f.read()
             job.log = logs
             db_sync.merge(job)
+            notify_dataset_event_no_commit(
+                dataset_id=job.dataset_id,
+                event_type=DatasetEventType.JOB,
+                data=dict(job_id=job.id, status=job.status),
+                db=db_sync,
+            )
             db_sync.commit()
 
     except JobExecutionError as e:
@@ -2,12 +2,15 @@ import json
 import logging
 import os
 import time
+from collections.abc import Callable
 from collections.abc import Generator
 from contextlib import contextmanager
 from functools import wraps
 from pathlib import Path
 from threading import Lock
+from threading import Thread
 from typing import Any
+from typing import BinaryIO
 from typing import Literal
 
 import paramiko.sftp_client
@@ -508,6 +511,109 @@ class FractalSSH:
                 ),
             )
 
+    @retry_if_socket_error
+    def stream_command_output(
+        self,
+        *,
+        cmd: str,
+        stdin: str,
+        process_stdout: Callable[[BinaryIO], None],
+        lock_timeout: float | None = None,
+    ) -> None:
+        """
+        Run a command via SSH, and process its standard output as a stream.
+
+        The lock is only held while opening the SSH channel of the command,
+        so that other commands and transfers can take place (over their own
+        channels) while the output is being processed.
+
+        Args:
+            cmd: Command to be run.
+            stdin: Standard input of the command.
+            process_stdout:
+                Function which reads the standard output of the command, as
+                a binary file-like object.
+            lock_timeout: Timeout for lock acquisition (overrides default).
+        """
+        validate_cmd(cmd)
+
+        actual_lock_timeout = self.default_lock_timeout
+        if lock_timeout is not None:
+            actual_lock_timeout = lock_timeout
+
+        t_0 = time.perf_counter()
+        with _acquire_lock_with_timeout(
+            lock=self._lock,
+            label=f"stream_command_output({cmd})",
+            timeout=actual_lock_timeout,
+            pid=self._pid,
+            logger_name=self.logger_name,
+        ):
+            self._connection.open()
+            channel = self._connection.transport.open_session()
+
+        stderr_chunks = []
+        processing_error = None
+
+        # Standard input and error are handled in their own threads, since
+        # unread data would eventually fill the SSH window of the channel
+        def _write_stdin() -> None:
+            channel.sendall(stdin.encode())
+            channel.shutdown_write()
+
+        def _read_stderr() -> None:
+            while chunk := channel.recv_stderr(32768):
+                stderr_chunks.append(chunk)
+
+        try:
+            # `cmd` was already checked through `validate_cmd`
+            channel.exec_command(cmd)  # nosec
+            helper_threads = [
+                Thread(target=_write_stdin, daemon=True),
+                Thread(target=_read_stderr, daemon=True),
+            ]
+            for thread in helper_threads:
+                thread.start()
+            with channel.makefile("rb") as stdout:
+                try:
+                    process_stdout(stdout)
+                except Exception as e:
+                    processing_error = e
+                # Consume any remaining output, so that the command can
+                # terminate
+                stdout.read()
+            for thread in helper_threads:
+                thread.join()
+            exit_status = channel.recv_exit_status()
+        except Exception as e:
+            self.log_and_raise(
+                e=e,
+                message=f"Error in `stream_command_output`, for `{cmd}`.",
+            )
+        finally:
+            channel.close()
+
+        stderr = b"".join(stderr_chunks).decode(errors="replace")
+        if exit_status != 0:
+            error_msg = (
+                f"Running command `{cmd}` over SSH failed.\n"
+                f"Exit status: {exit_status}.\nStandard error:\n{stderr}"
+            )
+            self.logger.error(error_msg)
+            raise FractalSSHCommandError(error_msg) from processing_error
+        if processing_error is not None:
+            self.log_and_raise(
+                e=processing_error,
+                message=f"Error while processing the output of `{cmd}`.",
+            )
+        t_1 = time.perf_counter()
+        self.logger.info(
+            f"END   streaming output of '{cmd}' over SSH, "
+            f"elapsed={t_1 - t_0:.3f}"
+        )
+        self.logger.debug("STDERR:")
+        self.logger.debug(stderr)
+
     def mkdir(self, *, folder: str, parents: bool = True) -> None:
         """
         Create a folder remotely via SSH.
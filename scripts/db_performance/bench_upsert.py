@@ -0,0 +1,150 @@
+"""
+Compare the two modes of `bulk_upsert_image_cache_fast`:
+
+* chunked `INSERT ... ON CONFLICT` statements, with a commit per chunk;
+* `COPY` into a temporary staging table, followed by a single
+  `INSERT ... SELECT ... ON CONFLICT` statement.
+
+For each number of rows, a fresh dataset is created and both the insertion
+of new `HistoryImageCache` rows and the update of all existing rows are
+timed.
+
+Run (from the repository root, against an empty database, e.g. after
+`fractalctl set-db` and `fractalctl init-db-data`):
+
+```bash
+python scripts/db_performance/bench_upsert.py [NUM_ROWS ...]
+```
+"""
+
+import sys
+import time
+
+from create_dbs import insert_history_run
+from create_dbs import insert_job
+from sqlalchemy import func
+from sqlalchemy import select
+
+from fractal_server.app.db import get_sync_db
+from fractal_server.app.models import HistoryImageCache
+from fractal_server.app.schemas.v2 import DatasetCreate
+from fractal_server.app.schemas.v2 import ProjectCreate
+from fractal_server.app.schemas.v2 import TaskCreate
+from fractal_server.app.schemas.v2 import WorkflowCreate
+from fractal_server.app.schemas.v2 import WorkflowTaskCreate
+from fractal_server.runner.v2.db_tools import (
+    bulk_create_history_units_no_commit,
+)
+from fractal_server.runner.v2.db_tools import bulk_upsert_image_cache_fast
+from scripts.client import FractalClient
+
+DEFAULT_LIST_NUM_ROWS = [10_000, 100_000, 1_000_000]
+MODES = {"chunked": False, "copy": True}
+
+
+def measure_upsert(
+    *,
+    dataset_id: int,
+    workflowtask_id: int,
+    history_unit_id: int,
+    zarr_urls: list[str],
+    use_copy: bool,
+) -> float:
+    list_upsert_objects = [
+        dict(
+            zarr_url=zarr_url,
+            dataset_id=dataset_id,
+            workflowtask_id=workflowtask_id,
+            latest_history_unit_id=history_unit_id,
+        )
+        for zarr_url in zarr_urls
+    ]
+    with next(get_sync_db()) as db:
+        t_start = time.perf_counter()
+        bulk_upsert_image_cache_fast(
+            list_upsert_objects=list_upsert_objects,
+            db=db,
+            use_copy=use_copy,
+        )
+        elapsed = time.perf_counter() - t_start
+        num_rows = db.execute(
+            select(func.count())
+            .select_from(HistoryImageCache)
+            .where(HistoryImageCache.dataset_id == dataset_id)
+            .where(HistoryImageCache.latest_history_unit_id == history_unit_id)
+        ).scalar_one()
+        if num_rows != len(zarr_urls):
+            sys.exit(f"Expected {len(zarr_urls)} rows, found {num_rows}.")
+    return elapsed
+
+
+if __name__ == "__main__":
+    list_num_rows = [int(arg) for arg in sys.argv[1:]] or DEFAULT_LIST_NUM_ROWS
+
+    admin = FractalClient()
+    name = f"bench-upsert-{int(time.time())}"
+    task = admin.add_task(
+        TaskCreate(
+            name=name,
+            command_non_parallel="echo",
+            command_parallel="echo",
+            version="0",
+        )
+    )
+    project = admin.add_project(ProjectCreate(name=name))
+
+    print(f"{'rows':>9} {'mode':>8} {'insert (s)':>11} {'update (s)':>11}")
+    for num_rows in list_num_rows:
+        zarr_urls = [f"/zarr/{ind:07d}" for ind in range(num_rows)]
+        for mode, use_copy in MODES.items():
+            # Log in again, since tokens may expire during slow cases
+            admin = FractalClient()
+            dataset = admin.add_dataset(
+                project.id, DatasetCreate(name=f"{name}-{num_rows}-{mode}")
+            )
+            workflow = admin.add_workflow(
+                project.id, WorkflowCreate(name=f"{name}-{num_rows}-{mode}")
+            )
+            wftask = admin.add_workflowtask(
+                project.id, workflow.id, WorkflowTaskCreate(task_id=task.id)
+            )
+            with next(get_sync_db()) as db:
+                job = insert_job(
+                    project_id=project.id,
+                    workflow_id=workflow.id,
+                    dataset_id=dataset.id,
+                    db=db,
+                )
+                history_run_id = insert_history_run(
+                    dataset_id=dataset.id,
+                    workflowtask_id=wftask.id,
+                    task_id=task.id,
+                    job_id=job.id,
+                    db=db,
+                )
+                history_unit_ids = bulk_create_history_units_no_commit(
+                    history_run_id=history_run_id,
+                    logfiles=["/log/1", "/log/2"],
+                    list_zarr_urls=[[], []],
+                    db=db,
+                )
+                db.commit()
+
+            elapsed = [
+                measure_upsert(
+                    dataset_id=dataset.id,
+                    workflowtask_id=wftask.id,
+                    history_unit_id=history_unit_id,
+                    zarr_urls=zarr_urls,
+                    use_copy=use_copy,
+                )
+                for history_unit_id in history_unit_ids
+            ]
+            print(
+                f"{num_rows:>9} {mode:>8} {elapsed[0]:>11.3f} "
+                f"{elapsed[1]:>11.3f}"
+            )
+            with open("out_upsert.csv", "a") as f:
+                f.write(
+                    f"{num_rows},{mode},{elapsed[0]:.7f},{elapsed[1]:.7f}\n"
+                )
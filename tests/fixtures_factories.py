@@ -7,6 +7,7 @@ from sqlalchemy.orm.attributes import flag_modified
 from sqlmodel import select
 
 from fractal_server.app.models.security import UserOAuth
+from fractal_server.app.models.v2 import DatasetImage
 from fractal_server.app.models.v2 import DatasetV2
 from fractal_server.app.models.v2 import JobV2
 from fractal_server.app.models.v2 import LinkUserProjectV2
@@ -30,6 +31,7 @@ from fractal_server.app.routes.auth._aux_auth import (
     _verify_user_belongs_to_group,
 )
 from fractal_server.app.schemas.v2 import ProjectPermissions
+from fractal_server.images.db_tools import update_dataset_facets_async_no_commit
 from fractal_server.images.models import SingleImage
 from fractal_server.runner.set_start_and_last_task_index import (
     set_start_and_last_task_index,
@@ -95,8 +97,8 @@ async def dataset_factory(db: AsyncSession, tmp_path):
 
         # Make sure that `zarr_dir` and images are valid
         args["zarr_dir"] = normalize_url(args["zarr_dir"])
-        old_images = args.get("images", [])
-        args["images"] = [SingleImage(**img).model_dump() for img in old_images]
+        old_images = args.pop("images", [])
+        images = [SingleImage(**img).model_dump() for img in old_images]
 
         project_id = args["project_id"]
         project = await db.get(ProjectV2, project_id)
@@ -108,6 +110,16 @@ async def dataset_factory(db: AsyncSession, tmp_path):
 
         _dataset = DatasetV2(**args)
         db.add(_dataset)
+        await db.flush()
+        db.add_all(
+            [DatasetImage(dataset_id=_dataset.id, **img) for img in images]
+        )
+        await update_dataset_facets_async_no_commit(
+            dataset_id=_dataset.id,
+            old_images=[],
+            new_images=images,
+            db=db,
+        )
         await db.commit()
         await db.refresh(_dataset)
         return _dataset
@@ -9,3 +9,10 @@ def test_parser(db, capsys):
         parser.parse_args(args=["invalid-command"])
     args = parser.parse_args(args=["recent"])
     assert args.cmd == "recent"
+    args = parser.parse_args(
+        args=["compact-history", "--older-than-days", "30"]
+    )
+    assert args.cmd == "compact-history"
+    assert args.older_than_days == 30
+    with pytest.raises(SystemExit):
+        parser.parse_args(args=["compact-history"])
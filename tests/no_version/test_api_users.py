@@ -432,25 +432,21 @@ async def test_edit_user_project_dirs(
                 name="ds-1",
                 project_id=project.id,
                 zarr_dir="/dir1/data/zarr",
-                images=[],
             ),
             DatasetV2(
                 name="ds-2",
                 project_id=project.id,
                 zarr_dir="/dir2/subdir/data/zarr",
-                images=[],
             ),
             DatasetV2(
                 name="ds-3",
                 project_id=project.id,
                 zarr_dir="s3://bucket/dir1/data/zarr",
-                images=[],
             ),
             DatasetV2(
                 name="ds-4",
                 project_id=project.id,
                 zarr_dir="s3://bucket/dir2/subdir/data/zarr",
-                images=[],
             ),
         ]
     )
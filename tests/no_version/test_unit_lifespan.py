@@ -154,3 +154,12 @@ async def test_lifespan_slurm_ssh(override_settings_factory, db):
         assert len(app.state.jobs) == 0
         assert isinstance(app.state.fractal_ssh_list, FractalSSHList)
         assert app.state.fractal_ssh_list.size == 0
+
+
+async def test_lifespan_history_compaction(override_settings_factory, db):
+    override_settings_factory(FRACTAL_HISTORY_RETENTION_DAYS=30)
+    app = FastAPI()
+    async with lifespan(app):
+        task = app.state.history_compaction_task
+        assert not task.done()
+    assert task.cancelled()
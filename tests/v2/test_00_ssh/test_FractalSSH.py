@@ -9,6 +9,7 @@ from paramiko.ssh_exception import NoValidConnectionsError
 
 from fractal_server.logger import set_logger
 from fractal_server.ssh._fabric import FractalSSH
+from fractal_server.ssh._fabric import FractalSSHCommandError
 from fractal_server.ssh._fabric import FractalSSHList
 from fractal_server.ssh._fabric import FractalSSHTimeoutError
 from fractal_server.ssh._fabric import _acquire_lock_with_timeout
@@ -304,6 +305,34 @@ def test_write_remote_file(fractal_ssh: FractalSSH, tmp777_path: Path):
         assert f.read() == content
 
 
+@pytest.mark.container
+@pytest.mark.ssh
+def test_stream_command_output(fractal_ssh: FractalSSH):
+    outputs = []
+
+    def _read_stdout(stdout):
+        outputs.append(stdout.read())
+
+    # The lock is available to other methods while the output is processed
+    def _read_stdout_and_run_command(stdout):
+        outputs.append(stdout.read())
+        outputs.append(fractal_ssh.run_command(cmd="echo 2").encode())
+
+    fractal_ssh.stream_command_output(
+        cmd="cat",
+        stdin="line 1\n",
+        process_stdout=_read_stdout_and_run_command,
+    )
+    assert outputs == [b"line 1\n", b"2\n"]
+
+    with pytest.raises(FractalSSHCommandError, match="No such file"):
+        fractal_ssh.stream_command_output(
+            cmd="ls /missing/folder",
+            stdin="",
+            process_stdout=_read_stdout,
+        )
+
+
 def test_novalidconnectionserror_in_sftp_methods(caplog):
     """
     Test `NoValidConnectionError`s in SFTP-based methods.
@@ -1,19 +1,26 @@
 import platform
+import shlex
 import shutil
 import subprocess
 from pathlib import Path
 
 import pytest
 
-from fractal_server.runner.executors.slurm_ssh.run_subprocess import (
-    run_subprocess,
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    extract_tar_stream,
 )
-from fractal_server.runner.executors.slurm_ssh.tar_commands import (
+from fractal_server.runner.executors.slurm_common.tar_commands import (
     get_tar_compression_cmd,
 )
-from fractal_server.runner.executors.slurm_ssh.tar_commands import (
+from fractal_server.runner.executors.slurm_common.tar_commands import (
     get_tar_extraction_cmd,
 )
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    get_tar_streaming_cmd,
+)
+from fractal_server.runner.executors.slurm_ssh.run_subprocess import (
+    run_subprocess,
+)
 
 
 def _compress_folder(subfolder_path: Path, filelist_path: Path | None):
@@ -121,6 +128,37 @@ def test_compress_and_extract_with_filelist(tmp_path: Path):
     assert (extracted_path / "subfolder/file3.txt").exists()
 
 
+@pytest.mark.skipif(
+    platform.system() == "Darwin",
+    reason="tar option used in this test is not supported on Mac (BSD tar)",
+)
+@pytest.mark.parametrize("compress", [True, False])
+def test_stream_and_extract(tmp_path: Path, compress: bool):
+    subfolder_path = tmp_path / "subfolder"
+    create_test_files(subfolder_path)
+    extracted_path = tmp_path / "extracted"
+    extracted_path.mkdir()
+
+    tar_cmd = get_tar_streaming_cmd(
+        subfolder_path=subfolder_path, compress=compress
+    )
+    with subprocess.Popen(
+        shlex.split(tar_cmd),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as proc:
+        proc.stdin.write(b"file1.txt\nmissing.txt\n")
+        proc.stdin.close()
+        extract_tar_stream(fileobj=proc.stdout, subfolder_path=extracted_path)
+    assert proc.returncode == 0
+
+    assert (extracted_path / "file1.txt").read_text() == "File 1"
+    assert not (extracted_path / "file2.txt").exists()
+    assert not (extracted_path / "missing.txt").exists()
+    assert not (tmp_path / "subfolder.tar.gz").exists()
+
+
 def test_compress_folder_failure(tmp_path: Path):
     with pytest.raises(subprocess.CalledProcessError) as exc_info:
         _compress_folder(tmp_path / "something", filelist_path=None)
@@ -77,6 +77,23 @@ async def test_accounting(
         assert res.json()["current_page"] == 3
         assert res.json()["items"][0]["num_tasks"] == 3
 
+        # Test keyset pagination
+        res = await client.post(
+            "/admin/v2/accounting/?page_size=2&last_id=0", json={}
+        )
+        assert res.status_code == 200
+        assert res.json()["total_count"] is None
+        assert [item["num_tasks"] for item in res.json()["items"]] == [1, 2]
+        last_id = res.json()["items"][-1]["id"]
+        res = await client.post(
+            f"/admin/v2/accounting/?page_size=2&last_id={last_id}"
+            "&with_count=true",
+            json={},
+        )
+        assert res.status_code == 200
+        assert res.json()["total_count"] == 3
+        assert [item["num_tasks"] for item in res.json()["items"]] == [3]
+
 
 async def test_accounting_api_failure(
     db,
@@ -9,6 +9,7 @@ from devtools import debug
 from sqlmodel import select
 
 from fractal_server.app.models.v2 import HistoryRun
+from fractal_server.app.models.v2 import HistoryStatusSummary
 from fractal_server.app.models.v2 import HistoryUnit
 from fractal_server.app.models.v2 import JobV2
 from fractal_server.app.routes.api.v2._aux_functions import (
@@ -19,6 +20,7 @@ from fractal_server.app.schemas.v2 import JobStatusType
 from fractal_server.app.schemas.v2 import ResourceType
 from fractal_server.runner.filenames import SHUTDOWN_FILENAME
 from fractal_server.runner.filenames import WORKFLOW_LOG_FILENAME
+from fractal_server.runner.v2.db_tools import bulk_upsert_image_cache_fast
 
 PREFIX = "/admin/v2"
 
@@ -131,6 +133,22 @@ async def test_view_job(
         assert res.json()["current_page"] == 2
         assert res.json()["items"][0]["log"] == "log-b"
 
+        # get all jobs, with keyset pagination
+        res = await client.get(f"{PREFIX}/job/?page_size=2&last_id=0")
+        assert res.status_code == 200
+        assert res.json()["total_count"] is None
+        assert [job["log"] for job in res.json()["items"]] == [
+            "log-a",
+            "log-b",
+        ]
+        last_id = res.json()["items"][-1]["id"]
+        res = await client.get(
+            f"{PREFIX}/job/?page_size=2&last_id={last_id}&with_count=true"
+        )
+        assert res.status_code == 200
+        assert res.json()["total_count"] == 3
+        assert [job["log"] for job in res.json()["items"]] == ["log-c"]
+
         # get jobs by project_owner_id
         res = await client.get(f"{PREFIX}/job/?project_owner_id={user1_id}")
         assert res.status_code == 200
@@ -320,6 +338,7 @@ async def test_patch_job(
     client,
     registered_superuser_client,
     db,
+    db_sync,
     tmp_path,
 ):
     ORIGINAL_STATUS = JobStatusType.SUBMITTED
@@ -329,7 +348,7 @@ async def test_patch_job(
         project = await project_factory(user)
         workflow = await workflow_factory(project_id=project.id)
         task = await task_factory(user_id=user.id, name="task")
-        await _workflow_insert_task(
+        wftask = await _workflow_insert_task(
             workflow_id=workflow.id, task_id=task.id, db=db, order=0
         )
         dataset = await dataset_factory(project_id=project.id)
@@ -351,6 +370,7 @@ async def test_patch_job(
         hr = HistoryRun(
             dataset_id=dataset.id,
             job_id=job.id,
+            workflowtask_id=wftask.id,
             workflowtask_dump={},
             task_group_dump={},
             num_available_images=0,
@@ -370,6 +390,21 @@ async def test_patch_job(
             ]
         )
         await db.commit()
+        res = await db.execute(
+            select(HistoryUnit.id).where(HistoryUnit.history_run_id == hr.id)
+        )
+        bulk_upsert_image_cache_fast(
+            list_upsert_objects=[
+                dict(
+                    zarr_url=f"/zarr/{unit_id}",
+                    dataset_id=dataset.id,
+                    workflowtask_id=wftask.id,
+                    latest_history_unit_id=unit_id,
+                )
+                for unit_id in res.scalars().all()
+            ],
+            db=db_sync,
+        )
         db.expunge_all()
 
         # Read job as job owner (standard user)
@@ -446,6 +481,11 @@ async def test_patch_job(
             )
             for history_units in res.scalars().all():
                 assert history_units.status == NEW_STATUS
+            summary = await db.get(
+                HistoryStatusSummary, (dataset.id, wftask.id)
+            )
+            assert summary.num_submitted_images == 0
+            assert summary.num_failed_images == 3
 
         # Read job as job owner (standard user)
         res = await client.get(f"/api/v2/project/{project.id}/job/{job.id}/")
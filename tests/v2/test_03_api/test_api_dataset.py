@@ -488,7 +488,47 @@ async def test_export_dataset(
             f"/api/v2/project/{project.id}/dataset/{dataset.id}/export/"
         )
         assert res.status_code == 200
-        assert res.json() == DatasetExport(**dataset.model_dump()).model_dump()
+        assert (
+            res.json()
+            == DatasetExport(**dataset.model_dump(), images=[]).model_dump()
+        )
+
+        images = [
+            SingleImage(zarr_url=f"{dataset.zarr_dir}/{ind}").model_dump()
+            for ind in (2, 0, 1)
+        ]
+        dataset = await dataset_factory(project_id=project.id, images=images)
+        url = f"/api/v2/project/{project.id}/dataset/{dataset.id}/export/"
+        res = await client.get(url)
+        assert res.status_code == 200
+        assert res.json()["images"] == images
+
+        # Conditional requests
+        etag = res.headers["ETag"]
+        res = await client.get(url, headers={"If-None-Match": etag})
+        assert res.status_code == 304
+        assert res.headers["ETag"] == etag
+        assert res.content == b""
+        res = await client.get(url, headers={"If-None-Match": '"other"'})
+        assert res.status_code == 200
+        res = await client.delete(
+            f"/api/v2/project/{project.id}/dataset/{dataset.id}/images/"
+            f"?zarr_url={images[0]['zarr_url']}"
+        )
+        assert res.status_code == 204
+        res = await client.get(url, headers={"If-None-Match": etag})
+        assert res.status_code == 200
+        assert res.headers["ETag"] != etag
+        assert res.json()["images"] == images[1:]
+        etag = res.headers["ETag"]
+        res = await client.patch(
+            f"/api/v2/project/{project.id}/dataset/{dataset.id}/",
+            json=dict(name="new-name"),
+        )
+        assert res.status_code == 200
+        res = await client.get(url, headers={"If-None-Match": etag})
+        assert res.status_code == 200
+        assert res.json()["name"] == "new-name"
 
 
 async def test_get_datasets(
@@ -1,3 +1,6 @@
+import asyncio
+
+import pytest
 from sqlmodel import func
 from sqlmodel import select
 
@@ -5,6 +8,10 @@ from fractal_server.app.models import HistoryImageCache
 from fractal_server.app.models import HistoryRun
 from fractal_server.app.models import HistoryUnit
 from fractal_server.images import SingleImage
+from fractal_server.images import snapshot as snapshot_module
+from fractal_server.images.db_tools import get_dataset_images_async
+from fractal_server.images.snapshot import get_dataset_image_snapshot_async
+from fractal_server.images.snapshot import get_snapshot_cache
 from fractal_server.images.tools import find_image_by_zarr_url
 from fractal_server.images.tools import match_filter
 
@@ -82,12 +89,16 @@ async def test_image_with_non_homogeneous_attributes(
         assert set(res.json()["attributes"]["b"]) == {32, "bar"}
 
 
+@pytest.mark.parametrize("snapshot_cache_mb", [0, 10])
 async def test_query_images(
+    snapshot_cache_mb: int,
     MockCurrentUser,
+    override_settings_factory,
     client,
     project_factory,
     dataset_factory,
 ):
+    override_settings_factory(FRACTAL_IMAGE_SNAPSHOT_CACHE_MB=snapshot_cache_mb)
     N = 101
     images = n_images(N)
     async with MockCurrentUser() as user:
@@ -213,6 +224,43 @@ async def test_query_images(
     assert res.json()["page_size"] == 1000
     assert len(res.json()["items"]) == res.json()["total_count"]
 
+    # Filter by attributes and types, in the database
+    for type_filters, attribute_filters in [
+        ({}, {"string_attribute": ["1"]}),
+        ({}, {"int_attribute": [0], "string_attribute": ["0", "1"]}),
+        ({"flag": True}, {"int_attribute": [0, 1]}),
+        ({"1": True, "flag": False}, {"1": [1]}),
+        ({"3": False}, {"int_attribute": [1]}),
+    ]:
+        res = await client.post(
+            f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/images/query/"
+            "?page_size=20&page=2",
+            json=dict(
+                type_filters=type_filters,
+                attribute_filters=attribute_filters,
+            ),
+        )
+        assert res.status_code == 200
+        expected_images = [
+            image
+            for image in images
+            if match_filter(
+                image=image,
+                type_filters=type_filters,
+                attribute_filters=attribute_filters,
+            )
+        ]
+        assert res.json()["total_count"] == len(expected_images)
+        if len(expected_images) > 20:
+            assert res.json()["current_page"] == 2
+            assert res.json()["items"] == expected_images[20:40]
+        elif len(expected_images) > 0:
+            assert res.json()["current_page"] == 1
+            assert res.json()["items"] == expected_images
+        else:
+            assert res.json()["items"] == []
+        assert_expected_attributes_and_flags(res, N)
+
     # Filter with non-existing type
     res = await client.post(
         f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/images/query/"
@@ -441,10 +489,8 @@ async def test_patch_images(
     assert res.json()["attributes"] == {"a": "b"}
     assert res.json()["types"] == {"c": True, "d": False}
 
-    await db.refresh(dataset)
-    ret = find_image_by_zarr_url(
-        images=dataset.images, zarr_url=IMAGES[0]["zarr_url"]
-    )
+    images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    ret = find_image_by_zarr_url(images=images, zarr_url=IMAGES[0]["zarr_url"])
     assert ret["image"]["attributes"] == {"a": "b"}
     assert ret["image"]["types"] == {"c": True, "d": False}
     res = await client.patch(
@@ -452,3 +498,380 @@ async def test_patch_images(
         json=dict(zarr_url="/foo/bar"),
     )
     assert res.status_code == 404
+
+
+async def test_images_version_and_snapshot(
+    MockCurrentUser,
+    client,
+    project_factory,
+    dataset_factory,
+    override_settings_factory,
+    db,
+):
+    override_settings_factory(FRACTAL_IMAGE_SNAPSHOT_CACHE_MB=10)
+    N = 10
+    images = n_images(N)
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+    dataset = await dataset_factory(
+        project_id=project.id, zarr_dir=ZARR_DIR, images=images
+    )
+    assert dataset.images_version == 0
+    url = f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/images/"
+
+    async def _get_images_version() -> int:
+        await db.refresh(dataset)
+        return dataset.images_version
+
+    async def _query_zarr_urls(**query) -> list[str]:
+        res = await client.post(f"{url}query/", json=query)
+        assert res.status_code == 200
+        return [image["zarr_url"] for image in res.json()["items"]]
+
+    assert await _query_zarr_urls() == [img["zarr_url"] for img in images]
+    assert (
+        get_snapshot_cache().get(
+            dataset_id=dataset.id,
+            version=(dataset.timestamp_created, 0),
+        )
+        is not None
+    )
+
+    # Each write bumps the version, and cached snapshots become obsolete
+    new_image = SingleImage(
+        zarr_url=f"{ZARR_DIR}/new", types={"flag": False}
+    ).model_dump()
+    res = await client.post(url, json=new_image)
+    assert res.status_code == 201
+    assert await _get_images_version() == 1
+    assert await _query_zarr_urls(type_filters={"flag": False}) == [
+        f"{ZARR_DIR}/new"
+    ]
+
+    res = await client.patch(
+        url,
+        json=dict(zarr_url=f"{ZARR_DIR}/new", types={"flag": True}),
+    )
+    assert res.status_code == 200
+    assert await _get_images_version() == 2
+    assert await _query_zarr_urls(type_filters={"flag": False}) == []
+
+    res = await client.delete(f"{url}?zarr_url={ZARR_DIR}/new")
+    assert res.status_code == 204
+    assert await _get_images_version() == 3
+    assert await _query_zarr_urls() == [img["zarr_url"] for img in images]
+
+
+@pytest.mark.parametrize("snapshot_cache_mb", [0, 10])
+async def test_query_images_equality_rules(
+    snapshot_cache_mb: int,
+    MockCurrentUser,
+    client,
+    project_factory,
+    dataset_factory,
+    override_settings_factory,
+):
+    """
+    Attribute filters follow Python equality (as in `match_filter`), both in
+    the database and in the snapshot.
+    """
+    override_settings_factory(FRACTAL_IMAGE_SNAPSHOT_CACHE_MB=snapshot_cache_mb)
+    images = [
+        SingleImage(
+            zarr_url=f"{ZARR_DIR}/{ind}", attributes=dict(x=value)
+        ).model_dump()
+        for ind, value in enumerate([True, 1, 1.0, "1", False, 0, 2])
+    ]
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+    dataset = await dataset_factory(
+        project_id=project.id, zarr_dir=ZARR_DIR, images=images
+    )
+    url = f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/images/query/"
+
+    for values in [[1], [True], [1.0], [0], [False], ["1"], [2, 0]]:
+        attribute_filters = dict(x=values)
+        res = await client.post(
+            url, json=dict(attribute_filters=attribute_filters)
+        )
+        assert res.status_code == 200
+        assert [image["zarr_url"] for image in res.json()["items"]] == [
+            image["zarr_url"]
+            for image in images
+            if match_filter(
+                image=image,
+                type_filters={},
+                attribute_filters=attribute_filters,
+            )
+        ]
+    # A bool attribute matches an int filter value
+    res = await client.post(url, json=dict(attribute_filters=dict(x=[1])))
+    assert f"{ZARR_DIR}/0" in [
+        image["zarr_url"] for image in res.json()["items"]
+    ]
+
+
+async def test_query_images_etag(
+    MockCurrentUser,
+    client,
+    project_factory,
+    dataset_factory,
+):
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+    dataset = await dataset_factory(
+        project_id=project.id, zarr_dir=ZARR_DIR, images=n_images(10)
+    )
+    url = f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/images/"
+
+    res = await client.post(f"{url}query/?page_size=5")
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    res = await client.post(
+        f"{url}query/?page_size=5", headers={"If-None-Match": etag}
+    )
+    assert res.status_code == 304
+    assert res.headers["ETag"] == etag
+    res = await client.post(
+        f"{url}query/?page_size=5", headers={"If-None-Match": f"W/{etag}"}
+    )
+    assert res.status_code == 304
+    res = await client.post(
+        f"{url}query/?page_size=5",
+        headers={"If-None-Match": f'"abc", {etag}'},
+    )
+    assert res.status_code == 304
+
+    # Different query parameters lead to different entity tags
+    for query_string, payload in [
+        ("page_size=5&page=2", None),
+        ("page_size=6", None),
+        ("page_size=5", dict(type_filters={"flag": True})),
+        ("page_size=5", dict(zarr_url=f"{ZARR_DIR}/1")),
+    ]:
+        res = await client.post(
+            f"{url}query/?{query_string}",
+            json=payload,
+            headers={"If-None-Match": etag},
+        )
+        assert res.status_code == 200
+        assert res.headers["ETag"] != etag
+
+    # Any image write leads to a new entity tag
+    res = await client.patch(
+        url, json=dict(zarr_url=f"{ZARR_DIR}/1", attributes={"a": 1})
+    )
+    assert res.status_code == 200
+    res = await client.post(
+        f"{url}query/?page_size=5", headers={"If-None-Match": etag}
+    )
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+    assert res.json()["items"][1]["attributes"] == {"a": 1}
+
+
+async def test_image_batch(
+    MockCurrentUser,
+    client,
+    project_factory,
+    dataset_factory,
+    workflow_factory,
+    task_factory,
+    workflowtask_factory,
+    job_factory,
+    db,
+):
+    N = 5
+    images = n_images(N)
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+        dataset = await dataset_factory(
+            project_id=project.id, zarr_dir=ZARR_DIR, images=images
+        )
+        workflow = await workflow_factory(project_id=project.id)
+        task = await task_factory(user_id=user.id)
+        wftask = await workflowtask_factory(
+            workflow_id=workflow.id, task_id=task.id
+        )
+        job = await job_factory(
+            project_id=project.id,
+            dataset_id=dataset.id,
+            workflow_id=workflow.id,
+            working_dir="/foo",
+            status="done",
+        )
+    history_run = HistoryRun(
+        dataset_id=dataset.id,
+        workflowtask_id=wftask.id,
+        workflowtask_dump={},
+        task_group_dump={},
+        status="done",
+        num_available_images=N,
+        job_id=job.id,
+    )
+    db.add(history_run)
+    await db.commit()
+    history_unit = HistoryUnit(
+        history_run_id=history_run.id,
+        logfile="/log",
+        status="done",
+        zarr_urls=[img["zarr_url"] for img in images],
+    )
+    db.add(history_unit)
+    await db.commit()
+    for img in images:
+        db.add(
+            HistoryImageCache(
+                zarr_url=img["zarr_url"],
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                latest_history_unit_id=history_unit.id,
+            )
+        )
+    await db.commit()
+
+    url = f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/images/batch/"
+
+    # Invalid operations
+    for operations, expected_error in [
+        (
+            [dict(action="create", image=dict(zarr_url="/foo/bar"))],
+            "not relative to",
+        ),
+        (
+            [dict(action="create", image=dict(zarr_url=ZARR_DIR))],
+            "cannot be equal to `Dataset.zarr_dir`",
+        ),
+        (
+            [dict(action="create", image=dict(zarr_url=f"{ZARR_DIR}/0"))],
+            "already in",
+        ),
+        (
+            [
+                dict(action="delete", zarr_url=f"{ZARR_DIR}/1"),
+                dict(action="patch", image=dict(zarr_url=f"{ZARR_DIR}/1")),
+            ],
+            "Invalid operation 1 (patch): No image with zarr_url",
+        ),
+        (
+            [
+                dict(action="create", image=dict(zarr_url=f"{ZARR_DIR}/new")),
+                dict(action="create", image=dict(zarr_url=f"{ZARR_DIR}/new")),
+            ],
+            "Invalid operation 1 (create)",
+        ),
+        (
+            [dict(action="delete", zarr_url=f"{ZARR_DIR}/missing")],
+            "No image with zarr_url",
+        ),
+    ]:
+        res = await client.post(url, json=dict(operations=operations))
+        assert res.status_code == 422
+        assert expected_error in res.json()["detail"]
+    res = await client.post(
+        url, json=dict(operations=[dict(action="rename", zarr_url="/x")])
+    )
+    assert res.status_code == 422
+    # Nothing was applied
+    assert await get_dataset_images_async(dataset_id=dataset.id, db=db) == [
+        img | dict(origin=None) for img in images
+    ]
+
+    # Valid operations
+    res = await client.post(
+        url,
+        json=dict(
+            operations=[
+                dict(action="create", image=dict(zarr_url=f"{ZARR_DIR}/new")),
+                dict(
+                    action="patch",
+                    image=dict(zarr_url=f"{ZARR_DIR}/new", types={"t": True}),
+                ),
+                dict(action="delete", zarr_url=f"{ZARR_DIR}/1"),
+                dict(
+                    action="patch",
+                    image=dict(zarr_url=f"{ZARR_DIR}/2", attributes={"a": 1}),
+                ),
+                dict(action="delete", zarr_url=f"{ZARR_DIR}/0"),
+                dict(action="create", image=dict(zarr_url=f"{ZARR_DIR}/0")),
+                dict(action="create", image=dict(zarr_url=f"{ZARR_DIR}/x")),
+                dict(action="delete", zarr_url=f"{ZARR_DIR}/x"),
+            ]
+        ),
+    )
+    assert res.status_code == 200
+    assert res.json() == dict(num_created=3, num_patched=2, num_deleted=3)
+
+    db.expunge_all()
+    new_images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    assert [img["zarr_url"] for img in new_images] == [
+        f"{ZARR_DIR}/2",
+        f"{ZARR_DIR}/3",
+        f"{ZARR_DIR}/4",
+        f"{ZARR_DIR}/new",
+        f"{ZARR_DIR}/0",
+    ]
+    assert new_images[0]["attributes"] == {"a": 1}
+    assert new_images[0]["types"] == images[2]["types"]
+    assert new_images[3]["types"] == {"t": True}
+    assert new_images[4] == dict(
+        zarr_url=f"{ZARR_DIR}/0", origin=None, attributes={}, types={}
+    )
+
+    # Deleted images are removed from the history cache
+    res = await db.execute(select(HistoryImageCache.zarr_url))
+    assert sorted(res.scalars().all()) == [
+        f"{ZARR_DIR}/2",
+        f"{ZARR_DIR}/3",
+        f"{ZARR_DIR}/4",
+    ]
+
+    # Facets reflect the new image list
+    res = await client.post(
+        f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/images/query/"
+    )
+    assert res.json()["total_count"] == len(new_images)
+    assert res.json()["attributes"]["a"] == [1]
+    assert "0" not in res.json()["attributes"]
+    assert "1" not in res.json()["attributes"]
+    assert "t" in res.json()["types"]
+
+
+async def test_concurrent_snapshot_builds(
+    MockCurrentUser,
+    project_factory,
+    dataset_factory,
+    override_settings_factory,
+    monkeypatch,
+    db,
+):
+    override_settings_factory(FRACTAL_IMAGE_SNAPSHOT_CACHE_MB=10)
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+    dataset = await dataset_factory(
+        project_id=project.id, zarr_dir=ZARR_DIR, images=n_images(10)
+    )
+
+    built_snapshots = []
+
+    class _CountingSnapshot(snapshot_module.DatasetImageSnapshot):
+        def __init__(self, images):
+            super().__init__(images)
+            built_snapshots.append(self)
+
+    monkeypatch.setattr(
+        snapshot_module, "DatasetImageSnapshot", _CountingSnapshot
+    )
+
+    # Concurrent cache misses for the same version lead to a single build
+    snapshots = await asyncio.gather(
+        *(
+            get_dataset_image_snapshot_async(dataset=dataset, db=db)
+            for _ in range(5)
+        )
+    )
+    assert len(built_snapshots) == 1
+    assert all(snapshot is built_snapshots[0] for snapshot in snapshots)
+    assert snapshots[0].size == 10
+    assert len(snapshot_module._build_locks) == 0
@@ -0,0 +1,261 @@
+import asyncio
+from types import SimpleNamespace
+
+import psycopg
+import pytest
+
+from fractal_server.app import events as events_module
+from fractal_server.app.events import DatasetEventType
+from fractal_server.app.events import EventBrokerUnavailableError
+from fractal_server.app.events import event_broker
+from fractal_server.app.events import notify_dataset_event_no_commit
+from fractal_server.app.models.v2 import HistoryRun
+from fractal_server.app.models.v2 import HistoryUnit
+from fractal_server.app.routes.api.v2 import events
+from fractal_server.app.schemas.v2 import HistoryUnitStatus
+from fractal_server.runner.v2.db_tools import bulk_update_status_of_history_unit
+from fractal_server.runner.v2.db_tools import bulk_upsert_image_cache_fast
+from fractal_server.runner.v2.db_tools import update_status_of_history_run
+
+PREFIX = "api/v2"
+
+
+async def _get_event(queue: asyncio.Queue) -> dict:
+    return await asyncio.wait_for(queue.get(), timeout=5)
+
+
+async def test_event_broker(
+    db_sync,
+    project_factory,
+    dataset_factory,
+    workflow_factory,
+    workflowtask_factory,
+    task_factory,
+    job_factory,
+    MockCurrentUser,
+):
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+        dataset = await dataset_factory(project_id=project.id)
+        other_dataset = await dataset_factory(project_id=project.id)
+        workflow = await workflow_factory(project_id=project.id)
+        task = await task_factory(user_id=user.id)
+        wftask = await workflowtask_factory(
+            workflow_id=workflow.id, task_id=task.id
+        )
+        job = await job_factory(
+            project_id=project.id,
+            dataset_id=dataset.id,
+            workflow_id=workflow.id,
+            working_dir="/foo",
+            status="submitted",
+        )
+
+    try:
+        async with event_broker.subscribe(dataset.id) as queue:
+            # Events are only delivered upon commit, and only to the
+            # subscribers of the corresponding dataset
+            for dataset_id in [other_dataset.id, dataset.id]:
+                notify_dataset_event_no_commit(
+                    dataset_id=dataset_id,
+                    event_type=DatasetEventType.JOB,
+                    data=dict(job_id=job.id, status="done"),
+                    db=db_sync,
+                )
+            await asyncio.sleep(0.1)
+            assert queue.empty()
+            db_sync.commit()
+            assert await _get_event(queue) == dict(
+                type="job",
+                dataset_id=dataset.id,
+                job_id=job.id,
+                status="done",
+            )
+
+            # History-run and history-unit events
+            history_run = HistoryRun(
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                job_id=job.id,
+                workflowtask_dump={},
+                task_group_dump={},
+                num_available_images=2,
+                status=HistoryUnitStatus.SUBMITTED,
+            )
+            db_sync.add(history_run)
+            db_sync.commit()
+            units = [
+                HistoryUnit(
+                    history_run_id=history_run.id,
+                    status=HistoryUnitStatus.SUBMITTED,
+                    logfile="/log",
+                )
+                for _ in range(2)
+            ]
+            db_sync.add_all(units)
+            db_sync.commit()
+
+            # History-unit events carry the status-summary counters
+            bulk_upsert_image_cache_fast(
+                list_upsert_objects=[
+                    dict(
+                        zarr_url=f"/zarr/{unit.id}",
+                        dataset_id=dataset.id,
+                        workflowtask_id=wftask.id,
+                        latest_history_unit_id=unit.id,
+                    )
+                    for unit in units
+                ],
+                db=db_sync,
+            )
+            counters = dict(
+                num_submitted_images=2,
+                num_done_images=0,
+                num_failed_images=0,
+                num_images_with_warnings=0,
+                num_units_with_warnings=0,
+            )
+            assert await _get_event(queue) == dict(
+                type="history_units",
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                history_run_id=history_run.id,
+                **counters,
+            )
+
+            update_status_of_history_run(
+                history_run_id=history_run.id,
+                status=HistoryUnitStatus.DONE,
+                db_sync=db_sync,
+            )
+            assert await _get_event(queue) == dict(
+                type="history_run",
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                history_run_id=history_run.id,
+                status="done",
+            )
+
+            bulk_update_status_of_history_unit(
+                history_unit_ids=[unit.id for unit in units],
+                status=HistoryUnitStatus.DONE,
+                db_sync=db_sync,
+            )
+            counters.update(num_submitted_images=0, num_done_images=2)
+            assert await _get_event(queue) == dict(
+                type="history_units",
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                history_run_id=history_run.id,
+                **counters,
+            )
+            await asyncio.sleep(0.1)
+            assert queue.empty()
+    finally:
+        await event_broker.close()
+
+
+async def test_stream_dataset_events(
+    db_sync,
+    project_factory,
+    dataset_factory,
+    MockCurrentUser,
+    monkeypatch,
+):
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+        dataset = await dataset_factory(project_id=project.id)
+
+    class MockRequest:
+        disconnected = False
+
+        async def is_disconnected(self) -> bool:
+            return self.disconnected
+
+    monkeypatch.setattr(events, "SSE_KEEPALIVE_INTERVAL", 0.1)
+    request = MockRequest()
+    stream = events._stream_dataset_events(
+        dataset_id=dataset.id, request=request
+    )
+    try:
+        assert await anext(stream) == "event: ready\ndata: {}\n\n"
+        assert await anext(stream) == ": keep-alive\n\n"
+        notify_dataset_event_no_commit(
+            dataset_id=dataset.id,
+            event_type=DatasetEventType.JOB,
+            data=dict(job_id=1),
+            db=db_sync,
+        )
+        db_sync.commit()
+        assert await anext(stream) == (
+            "event: job\n"
+            f'data: {{"type": "job", "dataset_id": {dataset.id}, '
+            '"job_id": 1}\n\n'
+        )
+        request.disconnected = True
+        assert [item async for item in stream] == []
+    finally:
+        await stream.aclose()
+        await event_broker.close()
+
+
+async def test_stream_dataset_events_access(
+    client,
+    project_factory,
+    dataset_factory,
+    MockCurrentUser,
+):
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+        other_project = await project_factory(user)
+        dataset = await dataset_factory(project_id=project.id)
+        res = await client.get(
+            f"{PREFIX}/project/{other_project.id}/dataset/{dataset.id}/events/"
+        )
+        assert res.status_code == 404
+
+    async with MockCurrentUser():
+        res = await client.get(
+            f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/events/"
+        )
+        assert res.status_code == 403
+
+
+async def test_event_broker_unavailable(
+    client,
+    project_factory,
+    dataset_factory,
+    MockCurrentUser,
+    monkeypatch,
+):
+    class MockAsyncConnection:
+        @staticmethod
+        async def connect(*args, **kwargs):
+            raise psycopg.OperationalError("connection refused")
+
+    # Only the listening connection fails, while the db is still available
+    await event_broker.close()
+    monkeypatch.setattr(events_module, "_LISTEN_TIMEOUT", 0.1)
+    monkeypatch.setattr(
+        events_module,
+        "psycopg",
+        SimpleNamespace(
+            AsyncConnection=MockAsyncConnection, Error=psycopg.Error
+        ),
+    )
+    try:
+        with pytest.raises(EventBrokerUnavailableError):
+            async with event_broker.subscribe(1):
+                pass
+        assert event_broker._subscribers == {}
+
+        async with MockCurrentUser() as user:
+            project = await project_factory(user)
+            dataset = await dataset_factory(project_id=project.id)
+            res = await client.get(
+                f"{PREFIX}/project/{project.id}/dataset/{dataset.id}/events/"
+            )
+            assert res.status_code == 503
+            assert "Could not listen" in res.json()["detail"]
+    finally:
+        await event_broker.close()
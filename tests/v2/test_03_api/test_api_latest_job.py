@@ -1,11 +1,11 @@
 import json
 
 from devtools import debug
+from sqlmodel import select
 
 from fractal_server.app.models import JobV2
 from fractal_server.app.models import TaskGroupV2
 from fractal_server.app.models import TaskV2
-from fractal_server.app.models.v2 import HistoryImageCache
 from fractal_server.app.models.v2 import HistoryRun
 from fractal_server.app.models.v2 import HistoryUnit
 from fractal_server.app.routes.api.v2._aux_functions import (
@@ -14,6 +14,11 @@ from fractal_server.app.routes.api.v2._aux_functions import (
 from fractal_server.app.schemas.v2 import HistoryUnitStatus
 from fractal_server.app.schemas.v2 import JobStatusType
 from fractal_server.app.schemas.v2 import ResourceType
+from fractal_server.images.status_tools import (
+    add_history_units_to_summary_no_commit,
+)
+from fractal_server.images.status_tools import set_latest_history_run_no_commit
+from fractal_server.runner.v2.db_tools import bulk_upsert_image_cache_fast
 
 PREFIX = "/api/v2"
 backends_available = list(element.value for element in ResourceType)
@@ -119,6 +124,7 @@ async def test_get_latest_job_tasks_statuses(
     MockCurrentUser,
     client,
     db,
+    db_sync,
     local_resource_profile_db,
 ):
     """
@@ -260,6 +266,16 @@ async def test_get_latest_job_tasks_statuses(
         ]
     )
     await db.commit()
+    for run in (
+        await db.execute(select(HistoryRun).order_by(HistoryRun.id))
+    ).scalars():
+        set_latest_history_run_no_commit(
+            dataset_id=run.dataset_id,
+            workflowtask_id=run.workflowtask_id,
+            history_run_id=run.id,
+            db=db_sync,
+        )
+    db_sync.commit()
 
     res = await client.get(
         f"api/v2/project/{project.id}/latest-job/"
@@ -312,6 +328,7 @@ async def test_get_latest_job_image_counters(
     workflowtask_factory,
     job_factory,
     db,
+    db_sync,
     client,
     MockCurrentUser,
 ):
@@ -344,6 +361,13 @@ async def test_get_latest_job_image_counters(
         db.add(run1)
         await db.commit()
         await db.refresh(run1)
+        set_latest_history_run_no_commit(
+            dataset_id=dataset.id,
+            workflowtask_id=wftask1.id,
+            history_run_id=run1.id,
+            db=db_sync,
+        )
+        db_sync.commit()
 
         unit_a = HistoryUnit(
             history_run_id=run1.id,
@@ -372,32 +396,25 @@ async def test_get_latest_job_image_counters(
         await db.refresh(unit_a)
         await db.refresh(unit_b)
         await db.refresh(unit_c)
-
-        db.add(
-            HistoryImageCache(
-                zarr_url="/a",
-                workflowtask_id=wftask1.id,
-                dataset_id=dataset.id,
-                latest_history_unit_id=unit_a.id,
-            )
-        )
-        db.add(
-            HistoryImageCache(
-                zarr_url="/b",
-                workflowtask_id=wftask1.id,
-                dataset_id=dataset.id,
-                latest_history_unit_id=unit_b.id,
-            )
+        # Units are created with `has_warnings=True`, so their contribution
+        # must be added explicitly
+        add_history_units_to_summary_no_commit(
+            history_unit_ids=[unit_a.id, unit_b.id, unit_c.id], db=db_sync
         )
-        db.add(
-            HistoryImageCache(
-                zarr_url="/c",
-                workflowtask_id=wftask1.id,
-                dataset_id=dataset.id,
-                latest_history_unit_id=unit_c.id,
-            )
+        db_sync.commit()
+
+        bulk_upsert_image_cache_fast(
+            list_upsert_objects=[
+                dict(
+                    zarr_url=f"/{name}",
+                    workflowtask_id=wftask1.id,
+                    dataset_id=dataset.id,
+                    latest_history_unit_id=unit.id,
+                )
+                for name, unit in [("a", unit_a), ("b", unit_b), ("c", unit_c)]
+            ],
+            db=db_sync,
         )
-        await db.commit()
 
         wftask2 = await workflowtask_factory(
             workflow_id=workflow.id, task_id=task.id
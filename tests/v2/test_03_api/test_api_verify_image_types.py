@@ -1,3 +1,5 @@
+import pytest
+
 from fractal_server.app.models.v2 import HistoryImageCache
 from fractal_server.app.models.v2 import HistoryRun
 from fractal_server.app.models.v2 import HistoryUnit
@@ -6,13 +8,17 @@ from fractal_server.images.status_tools import IMAGE_STATUS_KEY
 from tests.v2.test_03_api.test_api_workflow_task import PREFIX
 
 
+@pytest.mark.parametrize("snapshot_cache_mb", [0, 10])
 async def test_verify_image_types(
+    snapshot_cache_mb: int,
     db,
+    override_settings_factory,
     MockCurrentUser,
     project_factory,
     dataset_factory,
     client,
 ):
+    override_settings_factory(FRACTAL_IMAGE_SNAPSHOT_CACHE_MB=snapshot_cache_mb)
     ZARR_DIR = "/zarr_dir"
 
     images = []
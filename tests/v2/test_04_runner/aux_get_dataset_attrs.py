@@ -1,10 +1,9 @@
 from typing import Any
 
-from fractal_server.app.models import DatasetV2
+from fractal_server.images.db_tools import get_dataset_images_async
 
 
 async def _get_dataset_attrs(db, dataset_id) -> dict[str, Any]:
     await db.close()
-    db_dataset = await db.get(DatasetV2, dataset_id)
-    dataset_attrs = db_dataset.model_dump(include={"images"})
-    return dataset_attrs
+    images = await get_dataset_images_async(dataset_id=dataset_id, db=db)
+    return dict(images=images)
@@ -0,0 +1,172 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from devtools import debug
+
+from fractal_server.app.schemas.v2 import HistoryUnitStatusWithUnset
+from fractal_server.images.db_tools import bulk_upsert_images_no_commit
+from fractal_server.images.db_tools import get_dataset_images_async
+from fractal_server.images.db_tools import update_dataset_facets_no_commit
+from fractal_server.images.status_tools import IMAGE_STATUS_KEY
+from fractal_server.runner.executors.local.runner import LocalRunner
+
+from .execute_tasks import execute_tasks_mod
+
+
+@pytest.fixture()
+def local_runner(
+    tmp_path,
+    local_resource_profile_objects,
+):
+    root_dir_local = tmp_path / "job"
+    user_cache_dir = (tmp_path / "fractal/.fractal_cache").as_posix()
+    resource, profile = local_resource_profile_objects[:]
+    with LocalRunner(
+        root_dir_local=root_dir_local,
+        resource=resource,
+        profile=profile,
+        fractal_job_id=99,
+        user_cache_dir=user_cache_dir,
+        resource_id=999,
+    ) as r:
+        yield r
+
+
+def _get_current_rss_mb() -> float:
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    raise RuntimeError("Could not find VmRSS in /proc/self/status.")
+
+
+@contextmanager
+def _track_peak_rss_increase(interval: float = 0.005):
+    """
+    Sample the resident set size of the current process in a background
+    thread, and store its peak increase (in MB) in the yielded dictionary.
+
+    Note: sampling avoids resetting the process-wide high-water mark (as
+    `/proc/self/clear_refs` would do), at the cost of possibly missing very
+    short-lived peaks.
+    """
+    result = dict(peak_rss_increase=0.0)
+    rss_start = _get_current_rss_mb()
+    stop = threading.Event()
+
+    def _sample():
+        peak = rss_start
+        while not stop.is_set():
+            peak = max(peak, _get_current_rss_mb())
+            stop.wait(interval)
+        result["peak_rss_increase"] = peak - rss_start
+
+    thread = threading.Thread(target=_sample)
+    thread.start()
+    try:
+        yield result
+    finally:
+        stop.set()
+        thread.join()
+
+
+# Upper bound (in MB) for the peak-RSS growth of `execute_tasks` when going
+# from 1k to 100k images. This leaves room for loading the images once and
+# for the status-filter bookkeeping, but not for full copies of the list.
+MAX_PEAK_RSS_GROWTH_MB = 400
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"),
+    reason="RSS measurement relies on `/proc`.",
+)
+async def test_benchmark_execute_tasks_memory(
+    db,
+    db_sync,
+    MockCurrentUser,
+    project_factory,
+    dataset_factory,
+    workflow_factory,
+    workflowtask_factory,
+    job_factory,
+    tmp_path: Path,
+    local_runner: LocalRunner,
+    fractal_tasks_mock_db,
+    local_resource_profile_db,
+):
+    """
+    Memory benchmark of `execute_tasks`, for a non-parallel task which
+    flags all input images as modified, with status-based filtering.
+
+    Run it with `pytest -m benchmark`.
+    """
+    resource, _ = local_resource_profile_db
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+    workflow = await workflow_factory(project_id=project.id)
+    wftask = await workflowtask_factory(
+        workflow_id=workflow.id,
+        task_id=fractal_tasks_mock_db["generic_task"].id,
+        args_non_parallel=dict(sleep_time=0),
+    )
+
+    async def _run(num_images: int) -> float:
+        zarr_dir = (tmp_path / f"zarr_dir_{num_images}").as_posix()
+        dataset = await dataset_factory(
+            project_id=project.id, zarr_dir=zarr_dir
+        )
+        images = [
+            dict(
+                zarr_url=f"{zarr_dir}/plate.zarr/{ind // 100}/{ind % 100}",
+                origin=None,
+                attributes=dict(
+                    plate="plate.zarr", well=f"{ind // 100}", tile=ind % 100
+                ),
+                types=dict(is_3D=True),
+            )
+            for ind in range(num_images)
+        ]
+        bulk_upsert_images_no_commit(
+            dataset_id=dataset.id, images=images, db=db_sync
+        )
+        update_dataset_facets_no_commit(
+            dataset_id=dataset.id, old_images=[], new_images=images, db=db_sync
+        )
+        db_sync.commit()
+        del images
+
+        job = await job_factory(
+            project_id=project.id,
+            dataset_id=dataset.id,
+            workflow_id=workflow.id,
+            working_dir=tmp_path.as_posix(),
+        )
+        t_start = time.perf_counter()
+        with _track_peak_rss_increase() as rss:
+            execute_tasks_mod(
+                wf_task_list=[wftask],
+                dataset=dataset,
+                workflow_dir_local=tmp_path / f"job_{num_images}",
+                job_id=job.id,
+                runner=local_runner,
+                user_id=user.id,
+                job_attribute_filters={
+                    IMAGE_STATUS_KEY: [HistoryUnitStatusWithUnset.UNSET]
+                },
+                resource_id=resource.id,
+            )
+        elapsed = time.perf_counter() - t_start
+        debug(num_images, elapsed, rss["peak_rss_increase"])
+
+        images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+        assert len(images) == num_images
+        assert all(IMAGE_STATUS_KEY not in img["attributes"] for img in images)
+        return rss["peak_rss_increase"]
+
+    peak_small = await _run(1_000)
+    peak_large = await _run(100_000)
+    assert peak_large - peak_small < MAX_PEAK_RSS_GROWTH_MB
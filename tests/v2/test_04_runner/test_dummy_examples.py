@@ -12,6 +12,7 @@ from fractal_server.app.models.v2 import HistoryRun
 from fractal_server.app.models.v2 import HistoryUnit
 from fractal_server.app.schemas.v2 import HistoryUnitStatus
 from fractal_server.app.schemas.v2 import HistoryUnitStatusWithUnset
+from fractal_server.images.db_tools import get_dataset_images_async
 from fractal_server.images.status_tools import IMAGE_STATUS_KEY
 from fractal_server.runner.exceptions import JobExecutionError
 from fractal_server.runner.executors.local.runner import LocalRunner
@@ -213,9 +214,9 @@ async def test_dummy_insert_single_image(
         **execute_tasks_args,
     )
     db.expunge_all()
-    dataset_case_2 = await db.get(DatasetV2, dataset_case_2.id)
-    debug(dataset_case_2.images)
-    assert dataset_case_2.images[0] == {
+    images = await get_dataset_images_async(dataset_id=dataset_case_2.id, db=db)
+    debug(images)
+    assert images[0] == {
         "zarr_url": zarr_url_3D,
         "origin": None,
         "attributes": {"well": "B03"},
@@ -224,7 +225,7 @@ async def test_dummy_insert_single_image(
             "illumination_corrected": True,
         },
     }
-    assert dataset_case_2.images[1] == {
+    assert images[1] == {
         "zarr_url": zarr_url_2D,
         "origin": zarr_url_3D,
         "attributes": {"well": "B03"},
@@ -315,7 +316,8 @@ async def test_dummy_remove_images(
         ],
     )
 
-    assert len(dataset.images) == N
+    images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    assert len(images) == N
     res = await db.execute(select(func.count(HistoryImageCache.zarr_url)))
     assert res.scalar() == 0
 
@@ -332,11 +334,11 @@ async def test_dummy_remove_images(
         dataset_id=dataset.id,
         wftask_id=wftask.id,
         job_id=job.id,
-        zarr_urls=[img["zarr_url"] for img in dataset.images] + ["/foo"],
+        zarr_urls=[img["zarr_url"] for img in images] + ["/foo"],
     )
 
-    await db.refresh(dataset)
-    assert len(dataset.images) == N
+    images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    assert len(images) == N
     res = await db.execute(select(func.count(HistoryImageCache.zarr_url)))
     assert res.scalar() == N + 1
 
@@ -350,8 +352,8 @@ async def test_dummy_remove_images(
         runner=local_runner,
     )
 
-    await db.refresh(dataset)
-    assert len(dataset.images) == 0
+    images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    assert len(images) == 0
     res = await db.execute(select(func.count(HistoryImageCache.zarr_url)))
     assert res.scalar() == 1
 
@@ -529,8 +531,8 @@ async def test_dummy_insert_single_image_with_attribute_none(
         runner=local_runner,
     )
     # Assert that attribute was not set
-    await db.refresh(dataset)
-    assert "attribute-name" not in dataset.images[0]["attributes"].keys()
+    images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    assert "attribute-name" not in images[0]["attributes"].keys()
 
 
 async def test_dummy_insert_single_image_normalization(
@@ -582,9 +584,9 @@ async def test_dummy_insert_single_image_normalization(
         runner=local_runner,
     )
     # Assert that URLs are normalized
-    await db.refresh(dataset)
-    debug(dataset.images)
-    for image in dataset.images:
+    images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    debug(images)
+    for image in images:
         assert normalize_url(image["zarr_url"]) == image["zarr_url"]
 
 
@@ -652,9 +654,9 @@ async def test_default_inclusion_of_images(
     )
 
     # Assert that images were included by default
-    await db.refresh(dataset)
-    debug(dataset)
-    assert dataset.images[0]["types"] == dict(my_type=True)
+    images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    debug(images)
+    assert images[0]["types"] == dict(my_type=True)
 
 
 async def test_compound_task_with_compute_failure(
@@ -42,6 +42,17 @@ def test_deduplicate_list_of_dicts():
     debug(new)
     assert len(new) == 2
 
+    # First occurrences are kept in order, and dictionaries with the same
+    # items (in any order) are duplicates
+    old = [
+        InitArgsModel(zarr_url="/b", init_args=dict(x=[1, {"y": 2, "z": 3}])),
+        InitArgsModel(zarr_url="/a", init_args=dict(x=[1])),
+        InitArgsModel(zarr_url="/b", init_args=dict(x=[1, {"z": 3, "y": 2}])),
+        InitArgsModel(zarr_url="/a", init_args=dict(x=[1, 2])),
+    ]
+    new = deduplicate_list(old)
+    assert new == [old[0], old[1], old[3]]
+
 
 def test_task_output():
     # Test 'check_zarr_urls_are_unique'
@@ -6,17 +6,28 @@ from devtools import debug
 from sqlalchemy.exc import NoResultFound
 from sqlmodel import select
 
+from fractal_server.app.models.v2 import HistoryImageCache
 from fractal_server.app.models.v2 import HistoryRun
+from fractal_server.app.models.v2 import HistoryStatusSummary
 from fractal_server.app.models.v2 import HistoryUnit
 from fractal_server.app.models.v2 import JobV2
 from fractal_server.app.routes.api.v2._aux_functions import (
     _workflow_insert_task,
 )
 from fractal_server.app.schemas.v2 import HistoryUnitStatus
+from fractal_server.images.status_tools import delete_image_cache_no_commit
+from fractal_server.images.status_tools import set_latest_history_run_no_commit
+from fractal_server.runner.v2.db_tools import (
+    bulk_create_history_units_no_commit,
+)
 from fractal_server.runner.v2.db_tools import (
     bulk_update_has_warnings_history_unit,
 )
+from fractal_server.runner.v2.db_tools import (
+    bulk_update_history_units_no_commit,
+)
 from fractal_server.runner.v2.db_tools import bulk_update_status_of_history_unit
+from fractal_server.runner.v2.db_tools import bulk_upsert_image_cache_fast
 from fractal_server.runner.v2.db_tools import update_executor_error_log_safe
 from fractal_server.runner.v2.db_tools import update_history_unit_no_commit
 
@@ -133,6 +144,81 @@ async def test_update_status_of_history_unit(
             )
 
 
+async def test_bulk_create_history_units(
+    db_sync,
+    dataset_factory,
+    project_factory,
+    task_factory,
+    workflow_factory,
+    workflowtask_factory,
+    job_factory,
+    MockCurrentUser,
+):
+    async with MockCurrentUser() as user:
+        task = await task_factory(user.id)
+        project = await project_factory(user)
+        dataset = await dataset_factory(project_id=project.id)
+        workflow = await workflow_factory(project_id=project.id)
+        await workflowtask_factory(workflow_id=workflow.id, task_id=task.id)
+        job = await job_factory(
+            project_id=project.id,
+            dataset_id=dataset.id,
+            workflow_id=workflow.id,
+            working_dir="/foo",
+            status="done",
+        )
+    hr = HistoryRun(
+        dataset_id=dataset.id,
+        task_group_dump={},
+        workflowtask_dump={},
+        status=HistoryUnitStatus.SUBMITTED,
+        num_available_images=0,
+        job_id=job.id,
+    )
+    db_sync.add(hr)
+    db_sync.commit()
+
+    num_units = 30
+    logfiles = [f"/log/{ind}" for ind in range(num_units)]
+    list_zarr_urls = [
+        [f"/zarr/{ind}", f"/zarr/{ind}b"] for ind in range(num_units)
+    ]
+    history_unit_ids = bulk_create_history_units_no_commit(
+        history_run_id=hr.id,
+        logfiles=logfiles,
+        list_zarr_urls=list_zarr_urls,
+        db=db_sync,
+    )
+    db_sync.commit()
+    assert len(history_unit_ids) == num_units
+    assert history_unit_ids == sorted(history_unit_ids)
+    for ind, history_unit_id in enumerate(history_unit_ids):
+        unit = db_sync.get(HistoryUnit, history_unit_id)
+        assert unit.history_run_id == hr.id
+        assert unit.status == HistoryUnitStatus.SUBMITTED
+        assert unit.has_warnings is False
+        assert unit.warning_lines == []
+        assert unit.logfile == logfiles[ind]
+        assert unit.zarr_urls == list_zarr_urls[ind]
+
+    assert (
+        bulk_create_history_units_no_commit(
+            history_run_id=hr.id, logfiles=[], list_zarr_urls=[], db=db_sync
+        )
+        == []
+    )
+
+    # The IDs were taken from the table sequence
+    unit = HistoryUnit(
+        history_run_id=hr.id,
+        status=HistoryUnitStatus.SUBMITTED,
+        logfile="/log/other",
+    )
+    db_sync.add(unit)
+    db_sync.commit()
+    assert unit.id > max(history_unit_ids)
+
+
 async def test_bulk_update_has_warnings_history_unit(
     # Fixtures
     db_sync,
@@ -286,3 +372,237 @@ async def test_update_executor_error_log_safe(
     )
     job = db_sync.get(JobV2, job_id)
     assert job.executor_error_log is None
+
+
+def _assert_summary_is_consistent(*, dataset_id: int, wftask_id: int, db_sync):
+    """
+    Compare `HistoryStatusSummary` counters with the ones computed from
+    `HistoryImageCache` and `HistoryUnit`.
+    """
+    db_sync.expire_all()
+    summary = db_sync.get(HistoryStatusSummary, (dataset_id, wftask_id))
+    latest_units = (
+        db_sync.execute(
+            select(HistoryUnit)
+            .join(
+                HistoryImageCache,
+                HistoryImageCache.latest_history_unit_id == HistoryUnit.id,
+            )
+            .where(HistoryImageCache.dataset_id == dataset_id)
+            .where(HistoryImageCache.workflowtask_id == wftask_id)
+        )
+        .scalars()
+        .all()
+    )
+    all_units = (
+        db_sync.execute(
+            select(HistoryUnit)
+            .join(HistoryRun, HistoryRun.id == HistoryUnit.history_run_id)
+            .where(HistoryRun.dataset_id == dataset_id)
+            .where(HistoryRun.workflowtask_id == wftask_id)
+        )
+        .scalars()
+        .all()
+    )
+    for unit_status in HistoryUnitStatus:
+        assert getattr(summary, f"num_{unit_status}_images") == sum(
+            1 for unit in latest_units if unit.status == unit_status
+        )
+    assert summary.num_images_with_warnings == sum(
+        1 for unit in latest_units if unit.has_warnings
+    )
+    assert summary.num_units_with_warnings == sum(
+        1 for unit in all_units if unit.has_warnings
+    )
+    return summary
+
+
+async def test_history_status_summary(
+    db_sync,
+    dataset_factory,
+    project_factory,
+    task_factory,
+    workflow_factory,
+    workflowtask_factory,
+    job_factory,
+    MockCurrentUser,
+    tmp_path,
+):
+    warning_logfile = tmp_path / "warnings.log"
+    warning_logfile.write_text("This has WaRnInGs!\n")
+    no_warning_logfile = tmp_path / "no_warnings.log"
+    no_warning_logfile.write_text("Some logs\n")
+
+    async with MockCurrentUser() as user:
+        task = await task_factory(user.id)
+        project = await project_factory(user)
+        dataset = await dataset_factory(project_id=project.id)
+        workflow = await workflow_factory(project_id=project.id)
+        wftask = await workflowtask_factory(
+            workflow_id=workflow.id,
+            task_id=task.id,
+        )
+        job = await job_factory(
+            project_id=project.id,
+            dataset_id=dataset.id,
+            workflow_id=workflow.id,
+            working_dir="/foo",
+            status="done",
+        )
+
+    summary_args = dict(
+        dataset_id=dataset.id, wftask_id=wftask.id, db_sync=db_sync
+    )
+
+    history_run_ids = []
+    for _ in range(2):
+        hr = HistoryRun(
+            dataset_id=dataset.id,
+            workflowtask_id=wftask.id,
+            task_group_dump={},
+            workflowtask_dump={},
+            status=HistoryUnitStatus.SUBMITTED,
+            num_available_images=0,
+            job_id=job.id,
+        )
+        db_sync.add(hr)
+        db_sync.flush()
+        set_latest_history_run_no_commit(
+            dataset_id=dataset.id,
+            workflowtask_id=wftask.id,
+            history_run_id=hr.id,
+            db=db_sync,
+        )
+        db_sync.commit()
+        history_run_ids.append(hr.id)
+    summary = _assert_summary_is_consistent(**summary_args)
+    assert summary.latest_history_run_id == history_run_ids[-1]
+
+    units = [
+        HistoryUnit(
+            history_run_id=history_run_ids[0],
+            status=HistoryUnitStatus.SUBMITTED,
+            logfile=warning_logfile.as_posix(),
+        ),
+        HistoryUnit(
+            history_run_id=history_run_ids[0],
+            status=HistoryUnitStatus.SUBMITTED,
+            logfile=no_warning_logfile.as_posix(),
+        ),
+        HistoryUnit(
+            history_run_id=history_run_ids[1],
+            status=HistoryUnitStatus.SUBMITTED,
+            logfile=warning_logfile.as_posix(),
+        ),
+    ]
+    db_sync.add_all(units)
+    db_sync.commit()
+    unit_ids = [unit.id for unit in units]
+
+    # Images /0, /1 and /2 belong to the first unit, /3 to the second one
+    bulk_upsert_image_cache_fast(
+        list_upsert_objects=[
+            dict(
+                zarr_url=f"/{ind}",
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                latest_history_unit_id=unit_ids[0 if ind < 3 else 1],
+            )
+            for ind in range(4)
+        ],
+        db=db_sync,
+    )
+    summary = _assert_summary_is_consistent(**summary_args)
+    assert summary.num_submitted_images == 4
+
+    # Single-unit update, including warnings
+    update_history_unit_no_commit(
+        history_unit_id=unit_ids[0],
+        status=HistoryUnitStatus.DONE,
+        db_sync=db_sync,
+    )
+    db_sync.commit()
+    summary = _assert_summary_is_consistent(**summary_args)
+    assert summary.num_done_images == 3
+    assert summary.num_images_with_warnings == 3
+    assert summary.num_units_with_warnings == 1
+    assert db_sync.get(HistoryUnit, unit_ids[0]).warning_lines == [
+        "This has WaRnInGs!"
+    ]
+
+    # Bulk updates
+    bulk_update_status_of_history_unit(
+        history_unit_ids=unit_ids[1:],
+        status=HistoryUnitStatus.FAILED,
+        db_sync=db_sync,
+    )
+    bulk_update_has_warnings_history_unit(
+        history_unit_ids=unit_ids[1:],
+        db_sync=db_sync,
+    )
+    summary = _assert_summary_is_consistent(**summary_args)
+    assert summary.num_failed_images == 1
+    assert summary.num_units_with_warnings == 2
+
+    # Move images /2 and /3 to the third unit (through a staging table)
+    bulk_upsert_image_cache_fast(
+        list_upsert_objects=[
+            dict(
+                zarr_url=f"/{ind}",
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                latest_history_unit_id=unit_ids[2],
+            )
+            for ind in [2, 3]
+        ],
+        db=db_sync,
+        use_copy=True,
+    )
+    summary = _assert_summary_is_consistent(**summary_args)
+    assert summary.num_done_images == 2
+    assert summary.num_failed_images == 2
+
+    # Remove images
+    delete_image_cache_no_commit(
+        dataset_id=dataset.id,
+        zarr_urls=["/0", "/3", "/missing"],
+        workflowtask_id=wftask.id,
+        db=db_sync,
+    )
+    db_sync.commit()
+    summary = _assert_summary_is_consistent(**summary_args)
+    assert summary.num_done_images == 1
+    assert summary.num_failed_images == 1
+
+    # Set-based update of many units, with a missing log file
+    unit = db_sync.get(HistoryUnit, unit_ids[1])
+    unit.logfile = (tmp_path / "missing.log").as_posix()
+    db_sync.commit()
+    bulk_update_history_units_no_commit(
+        history_unit_statuses={
+            unit_ids[0]: HistoryUnitStatus.FAILED,
+            unit_ids[1]: HistoryUnitStatus.DONE,
+            unit_ids[2]: HistoryUnitStatus.DONE,
+        },
+        db_sync=db_sync,
+    )
+    db_sync.commit()
+    summary = _assert_summary_is_consistent(**summary_args)
+    assert summary.num_done_images == 1
+    assert summary.num_failed_images == 1
+    assert summary.num_images_with_warnings == 2
+    assert summary.num_units_with_warnings == 2
+    assert [
+        (unit.status, unit.has_warnings, unit.warning_lines)
+        for unit in db_sync.execute(
+            select(HistoryUnit)
+            .where(HistoryUnit.id.in_(unit_ids))
+            .order_by(HistoryUnit.id)
+        )
+        .scalars()
+        .all()
+    ] == [
+        (HistoryUnitStatus.FAILED, True, ["This has WaRnInGs!"]),
+        (HistoryUnitStatus.DONE, False, []),
+        (HistoryUnitStatus.DONE, True, ["This has WaRnInGs!"]),
+    ]
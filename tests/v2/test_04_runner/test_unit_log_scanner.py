@@ -0,0 +1,77 @@
+import pytest
+
+from fractal_server.runner.v2 import log_scanner
+from fractal_server.runner.v2.log_scanner import MAX_WARNING_LINE_LENGTH
+from fractal_server.runner.v2.log_scanner import scan_logfile
+from fractal_server.runner.v2.log_scanner import scan_logfiles
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+@pytest.mark.parametrize("chunk_size", [50, 1024 * 1024])
+def test_scan_logfile(use_mmap: bool, chunk_size: int, tmp_path, monkeypatch):
+    monkeypatch.setattr(log_scanner, "_READ_CHUNK_SIZE", chunk_size)
+
+    logfile = tmp_path / "log.txt"
+    logfile.write_text(
+        "Some logs\n"
+        "This has WaRnInGs!\n"
+        "Some more logs\n"
+        "warning: second\r\n"
+        "Not a warn-ing\n"
+        "last line with a WARNING, without newline"
+    )
+    assert scan_logfile(logfile.as_posix(), use_mmap=use_mmap) == [
+        "This has WaRnInGs!",
+        "warning: second",
+        "last line with a WARNING, without newline",
+    ]
+    assert scan_logfile(logfile.as_posix(), max_lines=1, use_mmap=use_mmap) == [
+        "This has WaRnInGs!"
+    ]
+
+    # No warnings, empty and missing files
+    no_warnings_logfile = tmp_path / "no_warnings.txt"
+    no_warnings_logfile.write_text("Some logs\n" * 10)
+    empty_logfile = tmp_path / "empty.txt"
+    empty_logfile.touch()
+    for path in [no_warnings_logfile, empty_logfile, tmp_path / "missing"]:
+        assert scan_logfile(path.as_posix(), use_mmap=use_mmap) == []
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_scan_logfile_long_lines(use_mmap: bool, tmp_path, monkeypatch):
+    monkeypatch.setattr(log_scanner, "_READ_CHUNK_SIZE", 16)
+
+    logfile = tmp_path / "log.txt"
+    logfile.write_text(
+        "x" * 100
+        + "WARN"
+        + "ING"
+        + "y" * 10_000
+        + "warning\n"
+        + "z" * 100
+        + "\n"
+        + "warning"
+        + "\n"
+    )
+    lines = scan_logfile(logfile.as_posix(), use_mmap=use_mmap)
+    assert len(lines) == 2
+    assert "WARNING" in lines[0]
+    assert len(lines[0]) <= MAX_WARNING_LINE_LENGTH
+    assert lines[1] == "warning"
+
+
+def test_scan_logfiles(tmp_path):
+    logfiles = []
+    for ind in range(20):
+        logfile = tmp_path / f"{ind}.log"
+        logfile.write_text(f"line {ind}\n" + ("Warning\n" if ind % 2 else ""))
+        logfiles.append(logfile.as_posix())
+    missing = (tmp_path / "missing.log").as_posix()
+
+    res = scan_logfiles(logfiles + logfiles[:5] + [missing])
+    assert list(res.keys()) == logfiles + [missing]
+    for ind, logfile in enumerate(logfiles):
+        assert res[logfile] == (["Warning"] if ind % 2 else [])
+    assert res[missing] == []
+    assert scan_logfiles([]) == {}
@@ -108,3 +108,49 @@ def test_deduplicate_list(this_list):
     new_list = deduplicate_list(this_list=this_list)
 
     debug(len(this_list), len(new_list))
+
+
+def _deduplicate_list_quadratic(this_list):
+    """
+    Previous (quadratic) implementation of `deduplicate_list`, kept as a
+    reference for correctness and timing.
+    """
+    new_list_dict = []
+    new_list_objs = []
+    for this_obj in this_list:
+        this_dict = this_obj.model_dump()
+        if this_dict not in new_list_dict:
+            new_list_dict.append(this_dict)
+            new_list_objs.append(this_obj)
+    return new_list_objs
+
+
+@pytest.mark.parametrize("N", [1_000, 10_000, 20_000])
+def test_deduplicate_list_scaling(N: int):
+    """
+    Micro-benchmark of `deduplicate_list`, for parallelization lists with
+    50% of duplicate items. The quadratic reference implementation is only
+    run on the smallest list, to keep this test fast.
+    """
+    this_list = [
+        InitArgsModel(
+            zarr_url=f"/tmp_{ind % (N // 2)}",
+            init_args=dict(a=1, b=[ind % (N // 2), "x"], c=dict(d=True)),
+        )
+        for ind in range(N)
+    ]
+
+    t_start = perf_counter()
+    new_list = deduplicate_list(this_list=this_list)
+    time_linear = perf_counter() - t_start
+    assert len(new_list) == N // 2
+    assert new_list == this_list[: N // 2]
+
+    if N == 1_000:
+        t_start = perf_counter()
+        old_new_list = _deduplicate_list_quadratic(this_list)
+        time_quadratic = perf_counter() - t_start
+        assert old_new_list == new_list
+        debug(N, time_linear, time_quadratic)
+    else:
+        debug(N, time_linear)
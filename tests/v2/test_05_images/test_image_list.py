@@ -0,0 +1,53 @@
+import pytest
+
+from fractal_server.images.image_list import ImageList
+
+
+def _image(zarr_url: str, **attributes) -> dict:
+    return dict(zarr_url=zarr_url, attributes=attributes, types={})
+
+
+def test_image_list():
+    images = ImageList(_image(f"/{ind}") for ind in range(5))
+    assert len(images) == 5
+    assert "/0" in images
+    assert "/x" not in images
+    assert images.get("/x") is None
+    assert images.get("/3") == _image("/3")
+
+    # Append
+    images.append(_image("/5"))
+    assert [img["zarr_url"] for img in images] == [f"/{i}" for i in range(6)]
+    with pytest.raises(ValueError, match="already present"):
+        images.append(_image("/5"))
+
+    # Replace, preserving position
+    old_image = images.replace(_image("/2", a=1))
+    assert old_image == _image("/2")
+    assert images.get("/2") == _image("/2", a=1)
+    assert images.to_list()[2] == _image("/2", a=1)
+    with pytest.raises(KeyError):
+        images.replace(_image("/x"))
+
+    # Remove, preserving order of other images
+    removed_image = images.remove("/1")
+    assert removed_image == _image("/1")
+    assert "/1" not in images
+    assert len(images) == 5
+    assert [img["zarr_url"] for img in images] == ["/0", "/2", "/3", "/4", "/5"]
+    with pytest.raises(KeyError):
+        images.remove("/1")
+
+    # Removing most images triggers compaction, without changing the content
+    for zarr_url in ["/0", "/3", "/4"]:
+        images.remove(zarr_url)
+    assert len(images._images) == 2
+    assert [img["zarr_url"] for img in images] == ["/2", "/5"]
+    assert images.get("/5") == _image("/5")
+    images.append(_image("/1"))
+    assert images.replace(_image("/1", b=2)) == _image("/1")
+    assert images.to_list() == [
+        _image("/2", a=1),
+        _image("/5"),
+        _image("/1", b=2),
+    ]
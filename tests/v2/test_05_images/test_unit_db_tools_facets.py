@@ -0,0 +1,154 @@
+from sqlmodel import select
+
+from fractal_server.app.models.v2 import DatasetAttributeFacet
+from fractal_server.app.models.v2 import DatasetTypeFacet
+from fractal_server.images.db_tools import bulk_delete_images_no_commit
+from fractal_server.images.db_tools import bulk_upsert_images_no_commit
+from fractal_server.images.db_tools import (
+    get_dataset_attributes_and_types_async,
+)
+from fractal_server.images.db_tools import get_dataset_images_async
+from fractal_server.images.db_tools import update_dataset_facets_no_commit
+from fractal_server.images.tools import aggregate_attributes
+from fractal_server.images.tools import aggregate_types
+
+
+async def _assert_facets_match_images(*, dataset_id: int, db):
+    images = await get_dataset_images_async(dataset_id=dataset_id, db=db)
+    attributes, types = await get_dataset_attributes_and_types_async(
+        dataset_id=dataset_id, db=db
+    )
+    assert attributes == aggregate_attributes(images)
+    assert types == sorted(aggregate_types(images))
+
+
+async def test_dataset_facets(
+    db,
+    db_sync,
+    project_factory,
+    dataset_factory,
+    MockCurrentUser,
+):
+    images = [
+        dict(
+            zarr_url=f"/zarr/{ind}",
+            attributes=dict(well=f"A0{ind % 3}", plate="p.zarr"),
+            types=dict(is_3D=bool(ind % 2)),
+        )
+        for ind in range(10)
+    ]
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+        dataset = await dataset_factory(
+            project_id=project.id, zarr_dir="/zarr", images=images
+        )
+    await _assert_facets_match_images(dataset_id=dataset.id, db=db)
+
+    res = await db.execute(
+        select(DatasetAttributeFacet.num_images)
+        .where(DatasetAttributeFacet.dataset_id == dataset.id)
+        .where(DatasetAttributeFacet.key == "well")
+        .order_by(DatasetAttributeFacet.value)
+    )
+    assert res.scalars().all() == [4, 3, 3]
+
+    # Edit two images, remove two images and add a new one
+    old_images = images[:4]
+    new_images = [
+        dict(
+            zarr_url="/zarr/0",
+            attributes=dict(well="B01", plate="p.zarr"),
+            types=dict(is_3D=False),
+        ),
+        dict(
+            zarr_url="/zarr/1",
+            attributes=dict(well="A01"),
+            types=dict(is_3D=True, illumination_corrected=True),
+        ),
+        dict(
+            zarr_url="/zarr/new",
+            attributes=dict(well="A00", plate="p.zarr"),
+            types=dict(),
+        ),
+    ]
+    bulk_upsert_images_no_commit(
+        dataset_id=dataset.id, images=new_images, db=db_sync
+    )
+    bulk_delete_images_no_commit(
+        dataset_id=dataset.id, zarr_urls=["/zarr/2", "/zarr/3"], db=db_sync
+    )
+    update_dataset_facets_no_commit(
+        dataset_id=dataset.id,
+        old_images=old_images,
+        new_images=new_images,
+        db=db_sync,
+    )
+    db_sync.commit()
+    await _assert_facets_match_images(dataset_id=dataset.id, db=db)
+
+    # Facets with no images are removed
+    res = await db.execute(
+        select(DatasetAttributeFacet).where(
+            DatasetAttributeFacet.num_images <= 0
+        )
+    )
+    assert res.scalars().all() == []
+
+    # A no-op update does not change facets
+    update_dataset_facets_no_commit(
+        dataset_id=dataset.id,
+        old_images=new_images,
+        new_images=new_images,
+        db=db_sync,
+    )
+    db_sync.commit()
+    await _assert_facets_match_images(dataset_id=dataset.id, db=db)
+
+    # Removing all images removes all facets
+    images = await get_dataset_images_async(dataset_id=dataset.id, db=db)
+    bulk_delete_images_no_commit(
+        dataset_id=dataset.id,
+        zarr_urls=[img["zarr_url"] for img in images],
+        db=db_sync,
+    )
+    update_dataset_facets_no_commit(
+        dataset_id=dataset.id,
+        old_images=images,
+        new_images=[],
+        db=db_sync,
+    )
+    db_sync.commit()
+    for table in (DatasetAttributeFacet, DatasetTypeFacet):
+        res = await db.execute(
+            select(table).where(table.dataset_id == dataset.id)
+        )
+        assert res.scalars().all() == []
+
+
+async def test_dataset_facets_value_types(
+    db,
+    project_factory,
+    dataset_factory,
+    MockCurrentUser,
+):
+    """
+    Facet values follow JSON equality, where `1` and `1.0` are the same value
+    but `True` and `1` are not.
+    """
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+        dataset = await dataset_factory(
+            project_id=project.id,
+            zarr_dir="/zarr",
+            images=[
+                dict(zarr_url="/zarr/a", attributes=dict(x=1)),
+                dict(zarr_url="/zarr/b", attributes=dict(x=1.0)),
+                dict(zarr_url="/zarr/c", attributes=dict(x=True)),
+            ],
+        )
+    res = await db.execute(
+        select(DatasetAttributeFacet.num_images)
+        .where(DatasetAttributeFacet.dataset_id == dataset.id)
+        .order_by(DatasetAttributeFacet.num_images)
+    )
+    assert res.scalars().all() == [1, 2]
@@ -1,5 +1,6 @@
 import pytest
 
+from fractal_server.images.tools import ImageFilter
 from fractal_server.images.tools import filter_image_list
 from fractal_server.images.tools import find_image_by_zarr_url
 from fractal_server.images.tools import match_filter
@@ -198,3 +199,46 @@ def test_merge_type_filters_mutable_args():
     )
     assert task_input_types == dict(key1=False, key2=True)
     assert wftask_type_filters == dict(key1=False, key3=True)
+
+
+def test_image_filter():
+    image_filter = ImageFilter()
+    assert image_filter.is_empty
+    assert image_filter.match({"types": {}, "attributes": {}})
+    assert ImageFilter(type_filters={}, attribute_filters={}).is_empty
+
+    image_filter = ImageFilter(
+        type_filters={"a": True, "b": False},
+        attribute_filters={"x": [1, 2, 3], "y": ["foo"]},
+    )
+    assert not image_filter.is_empty
+
+    assert image_filter.match(
+        {"types": {"a": True}, "attributes": {"x": 2, "y": "foo"}}
+    )
+    assert image_filter.match(
+        {"types": {"a": True, "b": False}, "attributes": {"x": 1, "y": "foo"}}
+    )
+    assert not image_filter.match(
+        {"types": {"a": True, "b": True}, "attributes": {"x": 1, "y": "foo"}}
+    )
+    assert not image_filter.match(
+        {"types": {}, "attributes": {"x": 1, "y": "foo"}}
+    )
+    assert not image_filter.match(
+        {"types": {"a": True}, "attributes": {"x": 4, "y": "foo"}}
+    )
+    assert not image_filter.match(
+        {"types": {"a": True}, "attributes": {"x": 1}}
+    )
+    # Non-hashable attribute values never match
+    assert not image_filter.match(
+        {"types": {"a": True}, "attributes": {"x": [1], "y": "foo"}}
+    )
+    # Same equality as `list.__contains__`
+    assert image_filter.match(
+        {"types": {"a": True}, "attributes": {"x": 1.0, "y": "foo"}}
+    )
+    assert image_filter.match(
+        {"types": {"a": True}, "attributes": {"x": True, "y": "foo"}}
+    )
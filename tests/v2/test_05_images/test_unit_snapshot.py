@@ -0,0 +1,178 @@
+import random
+
+import pytest
+
+from fractal_server.images.snapshot import DatasetImageSnapshot
+from fractal_server.images.snapshot import DatasetImageSnapshotCache
+from fractal_server.images.snapshot import _bitset_to_positions
+from fractal_server.images.tools import ImageFilter
+from fractal_server.images.tools import filter_image_list
+
+
+def _make_images(num_images: int) -> list[dict]:
+    rng = random.Random(42)
+    images = []
+    for ind in range(num_images):
+        attributes = dict(
+            plate="plate.zarr",
+            well=f"{ind // 10}",
+            parity=ind % 2,
+            unique=f"{ind}",
+        )
+        if ind % 7 == 0:
+            attributes.pop("parity")
+        types = {}
+        if ind % 3:
+            types["is_3D"] = bool(ind % 2)
+        if rng.random() < 0.1:
+            types["rare"] = True
+        images.append(
+            dict(
+                zarr_url=f"/zarr/{ind}",
+                origin=f"/zarr/{ind - 1}" if ind % 5 == 0 else None,
+                attributes=attributes,
+                types=types,
+            )
+        )
+    return images
+
+
+def _non_unique_types(images: list[dict]) -> list[str]:
+    keys = {key for image in images for key in image["types"]}
+    return sorted(
+        key
+        for key in keys
+        if len({image["types"].get(key, False) for image in images}) > 1
+    )
+
+
+def test_bitset_to_positions():
+    bitset = sum(1 << position for position in [0, 3, 8, 9, 64, 1000])
+    assert _bitset_to_positions(0) == []
+    assert _bitset_to_positions(bitset) == [0, 3, 8, 9, 64, 1000]
+    assert _bitset_to_positions(bitset, offset=2) == [8, 9, 64, 1000]
+    assert _bitset_to_positions(bitset, offset=3, limit=2) == [9, 64]
+    assert _bitset_to_positions(bitset, offset=6) == []
+
+
+@pytest.mark.parametrize(
+    "type_filters,attribute_filters",
+    [
+        ({}, {}),
+        ({"is_3D": True}, {}),
+        ({"is_3D": False}, {}),
+        ({"rare": True, "is_3D": False}, {}),
+        ({"missing": False}, {}),
+        ({"missing": True}, {}),
+        ({}, {"parity": [1]}),
+        ({}, {"parity": [0, 1]}),
+        ({}, {"well": ["1", "5", "99"], "parity": [0]}),
+        ({}, {"unique": ["3", "4"]}),
+        ({}, {"plate": ["other.zarr"]}),
+        ({}, {"missing": ["x"]}),
+        ({"is_3D": True}, {"well": ["2", "3"], "plate": ["plate.zarr"]}),
+    ],
+)
+def test_snapshot_filters(type_filters: dict, attribute_filters: dict):
+    images = _make_images(1_000)
+    snapshot = DatasetImageSnapshot(images)
+    assert snapshot.size == len(images)
+    assert snapshot.nbytes > 0
+
+    image_filter = ImageFilter(
+        type_filters=type_filters,
+        attribute_filters=attribute_filters,
+    )
+    expected = filter_image_list(
+        images,
+        type_filters=type_filters,
+        attribute_filters=attribute_filters,
+    )
+    bitset = snapshot.get_bitset(image_filter)
+    assert bitset.bit_count() == len(expected)
+    assert snapshot.get_images(bitset) == expected
+    assert snapshot.get_images(bitset, offset=5, limit=7) == expected[5:12]
+    assert snapshot.get_non_unique_types(bitset) == _non_unique_types(expected)
+
+    images_page, total_count, page, page_size = snapshot.get_page(
+        image_filter, page=3, page_size=10
+    )
+    assert total_count == len(expected)
+    if total_count > 20:
+        assert page == 3
+        assert images_page == expected[20:30]
+    if total_count > 0:
+        images_page, _, _, page_size = snapshot.get_page(
+            image_filter, page=1, page_size=None
+        )
+        assert page_size == total_count
+        assert images_page == expected
+
+
+def test_snapshot_equality_rules():
+    images = [
+        dict(zarr_url="/a", attributes=dict(x=1), types={}),
+        dict(zarr_url="/b", attributes=dict(x=1.0), types={}),
+        dict(zarr_url="/c", attributes=dict(x=True), types={}),
+        dict(zarr_url="/d", attributes=dict(x="1"), types={}),
+    ]
+    snapshot = DatasetImageSnapshot(images)
+
+    # Values are not merged across types
+    all_images = snapshot.get_images(snapshot.get_bitset(ImageFilter()))
+    assert [image["attributes"]["x"] for image in all_images] == [
+        1,
+        1.0,
+        True,
+        "1",
+    ]
+    assert type(all_images[1]["attributes"]["x"]) is float
+
+    # Python equality, as in `ImageFilter`
+    for value in [1, 1.0, True]:
+        image_filter = ImageFilter(attribute_filters=dict(x=[value]))
+        assert _bitset_to_positions(snapshot.get_bitset(image_filter)) == [
+            0,
+            1,
+            2,
+        ]
+
+    # Filter by `zarr_url`
+    image_filter = ImageFilter(attribute_filters=dict(x=["1"]))
+    assert snapshot.get_bitset(image_filter, zarr_url="/d") == 1 << 3
+    assert snapshot.get_bitset(image_filter, zarr_url="/a") == 0
+    assert snapshot.get_bitset(image_filter, zarr_url="/x") == 0
+
+
+def test_snapshot_cache():
+    snapshots = {
+        dataset_id: DatasetImageSnapshot(_make_images(100))
+        for dataset_id in range(3)
+    }
+    nbytes = snapshots[0].nbytes
+    cache = DatasetImageSnapshotCache(max_bytes=int(2.5 * nbytes))
+
+    cache.set(dataset_id=0, version=0, snapshot=snapshots[0])
+    cache.set(dataset_id=1, version=0, snapshot=snapshots[1])
+    assert cache.get(dataset_id=0, version=0) is snapshots[0]
+    assert cache.get(dataset_id=2, version=0) is None
+
+    # Least-recently-used snapshots are evicted first
+    cache.set(dataset_id=2, version=0, snapshot=snapshots[2])
+    assert len(cache) == 2
+    assert cache.get(dataset_id=1, version=0) is None
+    assert cache.get(dataset_id=0, version=0) is snapshots[0]
+    assert cache.get(dataset_id=2, version=0) is snapshots[2]
+
+    # Obsolete versions are dropped
+    assert cache.get(dataset_id=0, version=1) is None
+    assert len(cache) == 1
+    cache.set(dataset_id=0, version=1, snapshot=snapshots[0])
+    assert cache.get(dataset_id=0, version=1) is snapshots[0]
+
+    # Snapshots larger than the memory budget are not cached
+    large_snapshot = DatasetImageSnapshot(_make_images(1_000))
+    assert large_snapshot.nbytes > cache.max_bytes
+    cache.set(dataset_id=3, version=0, snapshot=large_snapshot)
+    assert cache.get(dataset_id=3, version=0) is None
+    assert len(cache) == 2
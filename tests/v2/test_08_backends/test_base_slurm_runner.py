@@ -1,16 +1,28 @@
+import os
+import shlex
+import subprocess
 import sys
 from pathlib import Path
 
 import pytest
 from devtools import debug
 
+from fractal_server.runner.config import JobRunnerConfigSLURM
 from fractal_server.runner.exceptions import JobExecutionError
+from fractal_server.runner.executors.slurm_common._poll_schedule import (
+    PollSchedule,
+)
 from fractal_server.runner.executors.slurm_common.base_slurm_runner import (  # noqa
     BaseSlurmRunner,
 )
 from fractal_server.runner.executors.slurm_common.slurm_job_task_models import (  # noqa
     SlurmJob,
 )
+from fractal_server.runner.executors.slurm_common.slurm_job_task_models import (  # noqa
+    SlurmTask,
+)
+from tests.v2._aux_runner import get_default_slurm_config
+from tests.v2.test_08_backends.aux_unit_runner import get_dummy_task_files
 
 
 class MockBaseSlurmRunner(BaseSlurmRunner):
@@ -328,3 +340,227 @@ async def test_extract_slurm_error_and_set_executor_error_log(tmp_path: Path):
         runner.executor_error_log = None
         runner._set_executor_error_log([job2, job3])
         assert runner.executor_error_log is None
+
+
+async def test_slurm_job_array(tmp_path: Path, monkeypatch):
+    with MockBaseSlurmRunner(
+        root_dir_local=tmp_path / "server",
+        root_dir_remote=tmp_path / "user",
+        user_cache_dir=(tmp_path / "cache").as_posix(),
+        slurm_runner_type="sudo",
+        python_worker_interpreter=sys.executable,
+        resource_id=999,
+    ) as runner:
+        runner.shared_config = JobRunnerConfigSLURM(
+            default_slurm_config={},
+            batching_config=dict(
+                target_num_jobs=1,
+                max_num_jobs=1,
+                target_cpus_per_job=1,
+                max_cpus_per_job=1,
+                target_mem_per_job=1,
+                max_mem_per_job=1,
+            ),
+            job_array_config=dict(max_running_elements=2),
+        )
+
+        # Prepare three array elements, with two tasks each
+        slurm_jobs = []
+        for array_index in range(3):
+            tasks = []
+            for ind in range(2 * array_index, 2 * array_index + 2):
+                task_files = get_dummy_task_files(
+                    tmp_path,
+                    component=str(ind),
+                    prefix=f"prefix-{array_index}",
+                    is_slurm=True,
+                )
+                task_files.wftask_subfolder_local.mkdir(
+                    parents=True, exist_ok=True
+                )
+                tasks.append(
+                    SlurmTask(
+                        prefix=task_files.prefix,
+                        index=ind,
+                        component=task_files.component,
+                        workdir_local=task_files.wftask_subfolder_local,
+                        workdir_remote=task_files.wftask_subfolder_remote,
+                        parameters={"zarr_url": f"/zarr/{ind}"},
+                        task_files=task_files,
+                        workflow_task_order=0,
+                        workflow_task_id=1,
+                        task_name="name",
+                    )
+                )
+            slurm_jobs.append(
+                SlurmJob(
+                    prefix="prefix-0",
+                    workdir_local=task_files.wftask_subfolder_local,
+                    workdir_remote=task_files.wftask_subfolder_remote,
+                    tasks=tasks,
+                    array_index=array_index,
+                )
+            )
+
+        config = get_default_slurm_config()
+        config.parallel_tasks_per_job = 4
+        submit_command = runner._prepare_slurm_job_array(
+            base_command="true",
+            slurm_jobs=slurm_jobs,
+            slurm_config=config,
+        )
+        submission_script = slurm_jobs[0].slurm_submission_script_local
+        assert submit_command == f"sbatch --parsable {submission_script}"
+        with open(submission_script) as f:
+            script = f.read()
+        debug(script)
+        assert "#SBATCH --array=0-2%2" in script
+        assert "#SBATCH --ntasks=2" in script
+        assert "-slurm-%A_%a.err" in script
+        assert "-slurm-%A_%a.out" in script
+
+        # Run the submission script for the second element, with a mock of
+        # `srun` which only records its arguments
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        srun_log = tmp_path / "srun.log"
+        mock_srun = bin_dir / "srun"
+        mock_srun.write_text(f'#!/bin/sh\necho "$@" >> {srun_log}\n')
+        mock_srun.chmod(0o755)
+        subprocess.run(
+            ["sh", submission_script],
+            env=dict(
+                PATH=f"{bin_dir}:{os.environ['PATH']}",
+                SLURM_ARRAY_TASK_ID="1",
+                SLURM_CPUS_PER_TASK="1",
+            ),
+            check=True,
+            capture_output=True,
+        )
+        srun_calls = srun_log.read_text().splitlines()
+        assert len(srun_calls) == 2
+        input_files = {
+            call.split("--input-file ")[1].split()[0] for call in srun_calls
+        }
+        assert input_files == {
+            task.input_file_local for task in slurm_jobs[1].tasks
+        }
+
+        # Submit job array
+        remote_cmds = []
+
+        def _mock_run_remote_cmd(cmd: str) -> str:
+            remote_cmds.append(cmd)
+            return "123\n"
+
+        monkeypatch.setattr(runner, "_run_remote_cmd", _mock_run_remote_cmd)
+        runner._submit_slurm_job_array(
+            submit_command=submit_command,
+            slurm_jobs=slurm_jobs,
+        )
+        assert runner.job_ids == ["123_0", "123_1", "123_2"]
+        assert runner.job_ids_int == [123]
+        assert slurm_jobs[1].slurm_stdout_local_path.name == (
+            "prefix-0-slurm-123_1.out"
+        )
+
+        # Array elements are queried through their job array
+        def _mock_run_squeue(*, job_ids: list[str]) -> str:
+            if job_ids != ["123"]:
+                raise ValueError(f"Unexpected {job_ids=}.")
+            return "123_0 COMPLETED\n123_1 RUNNING\n"
+
+        monkeypatch.setattr(runner, "run_squeue", _mock_run_squeue)
+        assert runner._get_finished_jobs(job_ids=runner.job_ids) == {
+            "123_0",
+            "123_2",
+        }
+
+        # Job arrays are cancelled as a whole
+        assert runner.scancel_jobs() == ["123_0", "123_1", "123_2"]
+        assert remote_cmds[-1] == "scancel 123"
+
+
+async def test_detect_finished_jobs(tmp_path: Path, monkeypatch):
+    workdir = tmp_path / "user/task"
+    workdir.mkdir(parents=True)
+    with MockBaseSlurmRunner(
+        root_dir_local=tmp_path / "server",
+        root_dir_remote=tmp_path / "user",
+        user_cache_dir=(tmp_path / "cache").as_posix(),
+        slurm_runner_type="sudo",
+        python_worker_interpreter=sys.executable,
+        resource_id=999,
+    ) as runner:
+        for job_id in ["1", "2", "3"]:
+            tasks = []
+            for component in ["a", "b"]:
+                task_files = get_dummy_task_files(
+                    tmp_path,
+                    component=f"{job_id}{component}",
+                    prefix=f"prefix-{job_id}",
+                    is_slurm=True,
+                )
+                tasks.append(
+                    SlurmTask(
+                        prefix=task_files.prefix,
+                        index=0,
+                        component=task_files.component,
+                        workdir_local=tmp_path / "server/task",
+                        workdir_remote=workdir,
+                        parameters={},
+                        task_files=task_files,
+                        workflow_task_order=0,
+                        workflow_task_id=1,
+                        task_name="name",
+                    )
+                )
+            runner.jobs[job_id] = SlurmJob(
+                slurm_job_id=job_id,
+                prefix=f"prefix-{job_id}",
+                workdir_local=tmp_path / "server/task",
+                workdir_remote=workdir,
+                tasks=tasks,
+            )
+
+        # Job 1 wrote all output files, job 2 only one of them
+        runner.jobs["1"].tasks[0].output_file_remote_path.touch()
+        runner.jobs["1"].tasks[1].output_file_remote_path.touch()
+        runner.jobs["2"].tasks[0].output_file_remote_path.touch()
+        (workdir / "prefix-2-2b-output.json.tmp").touch()
+
+        def _run_remote_cmd(cmd: str) -> str:
+            res = subprocess.run(
+                shlex.split(cmd),
+                check=True,
+                capture_output=True,
+                encoding="utf-8",
+            )
+            return res.stdout
+
+        squeue_calls = []
+
+        def _mock_get_finished_jobs(job_ids: list[str]) -> set[str]:
+            squeue_calls.append(job_ids)
+            return {"3"}
+
+        monkeypatch.setattr(runner, "_run_remote_cmd", _run_remote_cmd)
+        monkeypatch.setattr(
+            runner, "_get_finished_jobs", _mock_get_finished_jobs
+        )
+        assert runner._get_jobs_with_outputs(job_ids=runner.job_ids) == {"1"}
+
+        # `squeue` only runs when due, and only for the other jobs
+        poll_schedule = PollSchedule(poll_interval=5)
+        assert runner._detect_finished_jobs(poll_schedule) == {"1"}
+        assert squeue_calls == []
+        poll_schedule.request_squeue()
+        assert runner._detect_finished_jobs(poll_schedule) == {"1", "3"}
+        assert squeue_calls == [["2", "3"]]
+
+        # Errors in `find` are ignored
+        def _fail(cmd: str) -> str:
+            raise RuntimeError("find failed")
+
+        monkeypatch.setattr(runner, "_run_remote_cmd", _fail)
+        assert runner._get_jobs_with_outputs(job_ids=runner.job_ids) == set()
@@ -0,0 +1,66 @@
+from fractal_server.runner.executors.slurm_common._poll_schedule import (
+    PollSchedule,
+)
+
+
+def test_poll_schedule_output_checks():
+    schedule = PollSchedule(poll_interval=5, start_time=0.0)
+    assert schedule.next_check_interval(now=0.0) == 0.5
+
+    # Back off, up to the poll interval
+    intervals = []
+    for now in range(6):
+        schedule.record_output_check(now=float(now), num_finished=0)
+        intervals.append(schedule.next_check_interval(now=float(now)))
+    assert intervals == [1.0, 2.0, 4.0, 5.0, 5.0, 5.0]
+
+    # Reset after finished jobs
+    schedule.record_output_check(now=10.0, num_finished=1)
+    assert schedule.next_check_interval(now=10.0) == 0.5
+    schedule.record_output_check(now=10.5, num_finished=0)
+    schedule.record_output_check(now=11.5, num_finished=0)
+    assert schedule.next_check_interval(now=11.5) == 2.0
+
+    # Tighten near the expected completion of the next wave of jobs, based
+    # on the duration of the first finished job (i.e. 10 seconds)
+    schedule.record_output_check(now=12.5, num_finished=0)
+    schedule.record_output_check(now=16.5, num_finished=0)
+    assert schedule.next_check_interval(now=16.5) == 3.5
+    assert schedule.next_check_interval(now=19.8) == 0.5
+    assert schedule.next_check_interval(now=20.5) == 5.0
+
+
+def test_poll_schedule_squeue():
+    schedule = PollSchedule(poll_interval=5, start_time=0.0)
+    assert not schedule.is_squeue_due(now=4.0)
+    assert schedule.is_squeue_due(now=5.0)
+
+    # Back off, up to eight times the poll interval
+    schedule.record_squeue(now=5.0, num_finished=0)
+    assert not schedule.is_squeue_due(now=14.0)
+    assert schedule.is_squeue_due(now=15.0)
+    for now in [15.0, 35.0, 75.0]:
+        schedule.record_squeue(now=now, num_finished=0)
+    assert not schedule.is_squeue_due(now=114.0)
+    assert schedule.is_squeue_due(now=115.0)
+
+    # Reset after finished jobs
+    schedule.record_squeue(now=115.0, num_finished=1)
+    assert schedule.is_squeue_due(now=120.0)
+
+    # Request a check right away
+    schedule.record_squeue(now=120.0, num_finished=0)
+    assert not schedule.is_squeue_due(now=121.0)
+    schedule.request_squeue()
+    assert schedule.is_squeue_due(now=121.0)
+    schedule.record_squeue(now=121.0, num_finished=0)
+    assert not schedule.is_squeue_due(now=130.0)
+    assert schedule.is_squeue_due(now=131.0)
+
+
+def test_poll_schedule_zero_poll_interval():
+    schedule = PollSchedule(poll_interval=0, start_time=0.0)
+    schedule.record_output_check(now=1.0, num_finished=0)
+    assert schedule.next_check_interval(now=1.0) == 0
+    schedule.record_squeue(now=1.0, num_finished=0)
+    assert schedule.is_squeue_due(now=1.0)
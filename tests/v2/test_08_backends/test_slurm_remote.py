@@ -40,6 +40,8 @@ def test_slurm_remote(tmp_path: Path):
         assert success
         assert result == RESULT
 
+    assert not Path(f"{out_fname}.tmp").exists()
+
     with open(log_path) as f:
         assert f.read() == "--in-json xxx --out-json yyy\n"
 
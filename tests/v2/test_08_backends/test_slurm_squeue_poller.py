@@ -0,0 +1,99 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fractal_server.runner.executors.slurm_common._squeue_poller import (
+    SqueuePoller,
+)
+from fractal_server.runner.executors.slurm_common._squeue_poller import (
+    get_squeue_poller,
+)
+
+
+def test_squeue_poller():
+    calls = []
+    statuses = {"1": "RUNNING", "2": "PENDING", "3_0": "COMPLETED"}
+
+    def run_squeue(*, job_ids: list[str]) -> str:
+        calls.append(job_ids)
+        return "\n".join(
+            f"{job_id} {status}"
+            for job_id, status in statuses.items()
+            if job_id.split("_")[0] in job_ids
+        )
+
+    poller = SqueuePoller(max_age=100)
+
+    # A single `squeue` command for the jobs of both requesters
+    assert poller.get_statuses(
+        requester="A", job_ids=["1"], run_squeue=run_squeue
+    ) == {"1": "RUNNING"}
+    assert poller.get_statuses(
+        requester="B", job_ids=["2", "3"], run_squeue=run_squeue
+    ) == {"2": "PENDING", "3_0": "COMPLETED"}
+    assert calls == [["1"], ["1", "2", "3"]]
+    assert poller.get_statuses(
+        requester="A", job_ids=["1"], run_squeue=run_squeue
+    ) == {"1": "RUNNING"}
+    assert len(calls) == 2
+
+    # A new `squeue` command is run when the output is too old, and it does
+    # not include the finished job "3"
+    poller.max_age = 0
+    statuses["1"] = "COMPLETED"
+    assert poller.get_statuses(
+        requester="A", job_ids=["1"], run_squeue=run_squeue
+    ) == {"1": "COMPLETED"}
+    assert calls[-1] == ["1", "2"]
+
+    # After an error, only the jobs of the current requester are polled
+    def failing_run_squeue(*, job_ids: list[str]) -> str:
+        raise RuntimeError("squeue failed")
+
+    with pytest.raises(RuntimeError, match="squeue failed"):
+        poller.get_statuses(
+            requester="B", job_ids=["2"], run_squeue=failing_run_squeue
+        )
+    poller.get_statuses(requester="A", job_ids=["4"], run_squeue=run_squeue)
+    assert calls[-1] == ["2", "4"]
+
+    # Forgotten requesters are not polled
+    poller.forget(requester="B")
+    poller.get_statuses(requester="A", job_ids=["4"], run_squeue=run_squeue)
+    assert calls[-1] == ["4"]
+
+
+def test_squeue_poller_threads():
+    calls = []
+
+    def run_squeue(*, job_ids: list[str]) -> str:
+        calls.append(job_ids)
+        time.sleep(0.1)
+        return "\n".join(f"{job_id} RUNNING" for job_id in job_ids)
+
+    poller = SqueuePoller(max_age=100)
+    for ind in range(10):
+        poller.get_statuses(
+            requester=ind, job_ids=[str(ind)], run_squeue=run_squeue
+        )
+    calls.clear()
+    poller._timestamp = -100
+
+    def _get_statuses(ind: int) -> dict[str, str]:
+        return poller.get_statuses(
+            requester=ind, job_ids=[str(ind)], run_squeue=run_squeue
+        )
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(_get_statuses, range(10)))
+    assert results == [{str(ind): "RUNNING"} for ind in range(10)]
+    assert len(calls) == 1
+    assert len(calls[0]) == 10
+
+
+def test_get_squeue_poller():
+    poller = get_squeue_poller(key=("test", 1), max_age=5)
+    assert get_squeue_poller(key=("test", 1), max_age=10) is poller
+    assert poller.max_age == 5
+    assert get_squeue_poller(key=("test", 2), max_age=5) is not poller
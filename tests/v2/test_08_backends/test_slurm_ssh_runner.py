@@ -182,6 +182,10 @@ async def test_submit_fail(
 
 @pytest.mark.ssh
 @pytest.mark.container
+@pytest.mark.parametrize(
+    "artifact_streaming_config",
+    [None, {"max_jobs_per_stream": 1, "max_concurrent_streams": 2}],
+)
 async def test_multisubmit_parallel(
     db,
     tmp777_path,
@@ -190,8 +194,13 @@ async def test_multisubmit_parallel(
     slurm_ssh_resource_profile_db: tuple[Resource, Profile],
     valid_user_id,
     fractal_job_id_mock,
+    artifact_streaming_config: dict | None,
 ):
     res, prof = slurm_ssh_resource_profile_db[:]
+    res.jobs_runner_config = {
+        **res.jobs_runner_config,
+        "artifact_streaming_config": artifact_streaming_config,
+    }
 
     history_run_id, history_unit_ids, wftask_id = history_mock_for_multisubmit
 
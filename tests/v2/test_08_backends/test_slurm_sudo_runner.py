@@ -158,6 +158,10 @@ async def test_submit_fail(
 
 
 @pytest.mark.container
+@pytest.mark.parametrize(
+    "job_array_config",
+    [None, {"max_array_size": 3, "max_running_elements": 2}],
+)
 async def test_multisubmit_parallel(
     db,
     tmp777_path,
@@ -166,9 +170,14 @@ async def test_multisubmit_parallel(
     valid_user_id,
     slurm_sudo_resource_profile_db,
     fractal_job_id_mock,
+    job_array_config: dict | None,
 ):
     history_run_id, history_unit_ids, wftask_id = history_mock_for_multisubmit
     resource, profile = slurm_sudo_resource_profile_db[:]
+    resource.jobs_runner_config = {
+        **resource.jobs_runner_config,
+        "job_array_config": job_array_config,
+    }
 
     with SlurmSudoRunner(
         root_dir_local=tmp777_path / "server",
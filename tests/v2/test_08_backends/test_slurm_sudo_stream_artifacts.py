@@ -0,0 +1,53 @@
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    extract_tar_stream,
+)
+from fractal_server.runner.executors.slurm_common.tar_commands import (
+    get_tar_streaming_cmd,
+)
+from fractal_server.runner.executors.slurm_sudo._subprocess_run_as_user import (  # noqa: E501
+    _stream_command_output_as_user,
+)
+
+
+def test_stream_command_output_as_user(tmp_path: Path):
+    remote_dir = tmp_path / "remote"
+    local_dir = tmp_path / "local"
+    remote_dir.mkdir()
+    local_dir.mkdir()
+    for name in ["job.out", "job.err", "task-log.txt"]:
+        (remote_dir / name).write_text(f"content of {name}")
+    filelist = ["job.out", "job.err", "task-log.txt", "missing.json"]
+
+    # Artifacts are extracted, and missing ones are skipped
+    _stream_command_output_as_user(
+        cmd=get_tar_streaming_cmd(subfolder_path=remote_dir, compress=False),
+        user=None,
+        stdin="\n".join(filelist) + "\n",
+        process_stdout=partial(extract_tar_stream, subfolder_path=local_dir),
+    )
+    assert sorted(path.name for path in local_dir.iterdir()) == [
+        "job.err",
+        "job.out",
+        "task-log.txt",
+    ]
+    for name in ["job.out", "job.err", "task-log.txt"]:
+        assert (local_dir / name).read_text() == f"content of {name}"
+
+    # A failing command raises a `RuntimeError`
+    with pytest.raises(RuntimeError, match="returncode"):
+        _stream_command_output_as_user(
+            cmd=get_tar_streaming_cmd(
+                subfolder_path=tmp_path / "missing-folder",
+                compress=False,
+            ),
+            user=None,
+            stdin="\n".join(filelist) + "\n",
+            process_stdout=partial(
+                extract_tar_stream, subfolder_path=local_dir
+            ),
+        )
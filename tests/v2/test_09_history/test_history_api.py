@@ -14,6 +14,8 @@ from fractal_server.app.schemas.v2 import HistoryUnitStatus
 from fractal_server.app.schemas.v2 import HistoryUnitStatusWithUnset
 from fractal_server.images import SingleImage
 from fractal_server.images.status_tools import IMAGE_STATUS_KEY
+from fractal_server.runner.v2.db_tools import bulk_update_status_of_history_unit
+from fractal_server.runner.v2.db_tools import bulk_upsert_image_cache_fast
 
 
 def _assert_dict_equal_with_timestamps(
@@ -540,6 +542,47 @@ async def test_get_history_run_units(
         assert res["total_count"] == 6
         assert len(res["items"]) == 5
 
+        # Keyset pagination
+        unit_ids = []
+        last_id = 0
+        while True:
+            res = await client.get(
+                f"/api/v2/project/{project.id}/status/run/{hr.id}/units/"
+                f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}"
+                f"&page_size=5&last_id={last_id}"
+            )
+            assert res.status_code == 200
+            res = res.json()
+            assert res["page_size"] == 5
+            assert res["total_count"] is None
+            if not res["items"]:
+                break
+            unit_ids.extend(item["id"] for item in res["items"])
+            last_id = res["items"][-1]["id"]
+        assert len(unit_ids) == 13
+        assert unit_ids == sorted(unit_ids)
+
+        res = await client.get(
+            f"/api/v2/project/{project.id}/status/run/{hr.id}/units/"
+            f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}"
+            f"&unit_status=failed&page_size=5&last_id={unit_ids[8]}"
+            "&with_count=true"
+        )
+        assert res.status_code == 200
+        res = res.json()
+        assert res["total_count"] == 7
+        assert [item["id"] for item in res["items"]] == unit_ids[9:]
+
+        # Invalid keyset pagination
+        for query in ["last_id=1", "page=2&page_size=5&last_id=1"]:
+            res = await client.get(
+                f"/api/v2/project/{project.id}/status/run/{hr.id}/units/"
+                f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}"
+                f"&{query}"
+            )
+            assert res.status_code == 422
+            assert "Invalid pagination parameters" in str(res.json())
+
 
 async def test_get_history_images(
     project_factory,
@@ -753,6 +796,194 @@ async def test_get_history_images(
         assert set(res.json()["types"]) == {"x", "is_b"}
         assert res.json()["total_count"] == 5
 
+        # CASE 6: images are sorted by `zarr_url`, also across pages
+        res = await client.post(
+            f"/api/v2/project/{project.id}/status/images/"
+            f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}"
+            "&page=2&page_size=3",
+            json={},
+        )
+        assert res.status_code == 200
+        res = res.json()
+        assert res["current_page"] == 2
+        assert res["page_size"] == 3
+        assert res["total_count"] == 10
+        assert [item["zarr_url"] for item in res["items"]] == [
+            "/a3",
+            "/a4",
+            "/b0",
+        ]
+        res = await client.post(
+            f"/api/v2/project/{project.id}/status/images/"
+            f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}"
+            "&page=5&page_size=3",
+            json={},
+        )
+        assert res.json()["total_count"] == 10
+        assert res.json()["items"] == []
+
+        # CASE 7: status and attribute filters, with warnings
+        hu.has_warnings = True
+        db.add(hu)
+        await db.commit()
+        res = await client.post(
+            f"/api/v2/project/{project.id}/status/images/"
+            f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}"
+            "&include_warnings=true",
+            json=dict(
+                attribute_filters={
+                    IMAGE_STATUS_KEY: [
+                        HistoryUnitStatusWithUnset.DONE,
+                        HistoryUnitStatusWithUnset.UNSET,
+                    ],
+                    "well": ["well-1", "well-2"],
+                },
+                type_filters={"is_b": False},
+            ),
+        )
+        assert res.status_code == 200
+        assert res.json()["total_count"] == 2
+        assert [
+            (
+                item["zarr_url"],
+                item["attributes"][IMAGE_STATUS_KEY],
+                item["has_warnings"],
+            )
+            for item in res.json()["items"]
+        ] == [("/a1", "done", True), ("/a2", "unset", False)]
+
+        # CASE 8: status filter with no valid status
+        res = await client.post(
+            f"/api/v2/project/{project.id}/status/images/"
+            f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}",
+            json=dict(attribute_filters={IMAGE_STATUS_KEY: [1]}),
+        )
+        assert res.status_code == 200
+        assert res.json()["total_count"] == 0
+        assert res.json()["items"] == []
+
+
+async def test_get_history_images_etag(
+    project_factory,
+    workflow_factory,
+    task_factory,
+    dataset_factory,
+    workflowtask_factory,
+    job_factory,
+    db,
+    db_sync,
+    client,
+    MockCurrentUser,
+):
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+        dataset = await dataset_factory(
+            project_id=project.id,
+            images=[dict(zarr_url=f"/a{i}") for i in range(3)],
+        )
+        workflow = await workflow_factory(project_id=project.id)
+        task = await task_factory(user_id=user.id)
+        wftask = await workflowtask_factory(
+            workflow_id=workflow.id, task_id=task.id
+        )
+        job = await job_factory(
+            project_id=project.id,
+            dataset_id=dataset.id,
+            workflow_id=workflow.id,
+            working_dir="/foo",
+            status="done",
+        )
+        url = (
+            f"/api/v2/project/{project.id}/status/images/"
+            f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}"
+        )
+
+        async def _post(etag: str | None = None, **query):
+            headers = {} if etag is None else {"If-None-Match": etag}
+            return await client.post(url, json=query, headers=headers)
+
+        res = await _post()
+        assert res.status_code == 200
+        etag = res.headers["ETag"]
+        res = await _post(etag=etag)
+        assert res.status_code == 304
+        assert res.headers["ETag"] == etag
+        res = await _post(etag=etag, type_filters={"x": True})
+        assert res.status_code == 200
+        res = await client.post(
+            f"{url}&include_warnings=true",
+            json={},
+            headers={"If-None-Match": etag},
+        )
+        assert res.status_code == 200
+
+        # A new history unit leads to a new entity tag
+        hr = HistoryRun(
+            dataset_id=dataset.id,
+            workflowtask_id=wftask.id,
+            workflowtask_dump={},
+            task_group_dump={},
+            status=HistoryUnitStatus.SUBMITTED,
+            num_available_images=3,
+            job_id=job.id,
+        )
+        db.add(hr)
+        await db.commit()
+        hu1, hu2 = (
+            HistoryUnit(
+                history_run_id=hr.id,
+                logfile=f"/fake/log{ind}",
+                status=HistoryUnitStatus.DONE,
+                zarr_urls=[f"/a{ind}"],
+            )
+            for ind in (1, 2)
+        )
+        db.add_all([hu1, hu2])
+        await db.commit()
+
+        def _link_images(unit_ids: dict[str, int]) -> None:
+            bulk_upsert_image_cache_fast(
+                list_upsert_objects=[
+                    dict(
+                        zarr_url=zarr_url,
+                        dataset_id=dataset.id,
+                        workflowtask_id=wftask.id,
+                        latest_history_unit_id=unit_id,
+                    )
+                    for zarr_url, unit_id in unit_ids.items()
+                ],
+                db=db_sync,
+            )
+
+        _link_images({"/a1": hu1.id})
+        res = await _post(etag=etag)
+        assert res.status_code == 200
+        assert res.headers["ETag"] != etag
+        etag = res.headers["ETag"]
+
+        # An updated history unit leads to a new entity tag
+        bulk_update_status_of_history_unit(
+            history_unit_ids=[hu1.id],
+            status=HistoryUnitStatus.FAILED,
+            db_sync=db_sync,
+        )
+        res = await _post(etag=etag)
+        assert res.status_code == 200
+        assert res.headers["ETag"] != etag
+        etag = res.headers["ETag"]
+        res = await _post(etag=etag)
+        assert res.status_code == 304
+
+        # Swapping the latest units of two images leads to a new entity tag,
+        # even if the status counters are unchanged
+        _link_images({"/a1": hu1.id, "/a2": hu2.id})
+        res = await _post(etag=res.headers["ETag"])
+        etag = res.headers["ETag"]
+        _link_images({"/a1": hu2.id, "/a2": hu1.id})
+        res = await _post(etag=etag)
+        assert res.status_code == 200
+        assert res.headers["ETag"] != etag
+
 
 async def test_get_logs(
     project_factory,
@@ -0,0 +1,190 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from fractal_server.app import history_compaction
+from fractal_server.app.history_compaction import compact_history_runs
+from fractal_server.app.history_compaction import (
+    compact_history_runs_periodically,
+)
+from fractal_server.app.models.v2 import HistoryImageCache
+from fractal_server.app.models.v2 import HistoryRun
+from fractal_server.app.models.v2 import HistoryUnit
+from fractal_server.app.schemas.v2 import HistoryUnitStatus
+from fractal_server.images.status_tools import set_latest_history_run_no_commit
+from fractal_server.utils import get_timestamp
+
+
+async def test_compact_history_runs(
+    project_factory,
+    workflow_factory,
+    task_factory,
+    dataset_factory,
+    workflowtask_factory,
+    job_factory,
+    db_sync,
+    db,
+    client,
+    MockCurrentUser,
+):
+    now = get_timestamp()
+    old = now - timedelta(days=40)
+
+    async with MockCurrentUser() as user:
+        project = await project_factory(user)
+        dataset = await dataset_factory(project_id=project.id)
+        workflow = await workflow_factory(project_id=project.id)
+        task = await task_factory(user_id=user.id)
+        wftask = await workflowtask_factory(
+            workflow_id=workflow.id, task_id=task.id
+        )
+        job = await job_factory(
+            project_id=project.id,
+            dataset_id=dataset.id,
+            workflow_id=workflow.id,
+            working_dir="/foo",
+            status="done",
+        )
+
+        runs = {}
+        for name, status, timestamp in [
+            ("superseded", HistoryUnitStatus.DONE, old),
+            ("ongoing", HistoryUnitStatus.SUBMITTED, old),
+            ("recent", HistoryUnitStatus.FAILED, now),
+            ("latest", HistoryUnitStatus.DONE, old),
+        ]:
+            runs[name] = HistoryRun(
+                dataset_id=dataset.id,
+                workflowtask_id=wftask.id,
+                workflowtask_dump={},
+                task_group_dump={},
+                num_available_images=4,
+                status=status,
+                timestamp_started=timestamp,
+                job_id=job.id,
+                task_id=task.id,
+            )
+            db_sync.add(runs[name])
+            db_sync.commit()
+            db_sync.refresh(runs[name])
+        set_latest_history_run_no_commit(
+            dataset_id=dataset.id,
+            workflowtask_id=wftask.id,
+            history_run_id=runs["latest"].id,
+            db=db_sync,
+        )
+
+        # Four units per run: the second one has warnings, the third one is
+        # failed and the fourth one is the latest unit of an image
+        units = {}
+        for name, run in runs.items():
+            units[name] = [
+                HistoryUnit(
+                    history_run_id=run.id,
+                    logfile=f"/log/{name}/{ind}",
+                    status=(
+                        HistoryUnitStatus.FAILED
+                        if ind == 2
+                        else HistoryUnitStatus.DONE
+                    ),
+                    has_warnings=(ind == 1),
+                    zarr_urls=[f"/zarr/{name}"],
+                )
+                for ind in range(4)
+            ]
+            db_sync.add_all(units[name])
+            db_sync.commit()
+            db_sync.add(
+                HistoryImageCache(
+                    zarr_url=f"/zarr/{name}",
+                    dataset_id=dataset.id,
+                    workflowtask_id=wftask.id,
+                    latest_history_unit_id=units[name][3].id,
+                )
+            )
+            db_sync.commit()
+
+        url = (
+            f"/api/v2/project/{project.id}/status/run/"
+            f"?workflowtask_id={wftask.id}&dataset_id={dataset.id}"
+        )
+        res = await client.get(url)
+        assert res.status_code == 200
+        run_list = sorted(res.json(), key=lambda run: run["id"])
+        assert run_list[0]["num_done_units"] == 3
+        assert run_list[0]["num_failed_units"] == 1
+        assert run_list[0]["num_units_with_warnings"] == 1
+
+        # Compaction is skipped while another one is ongoing
+        await db.execute(
+            select(func.pg_advisory_lock(history_compaction._ADVISORY_LOCK_KEY))
+        )
+        assert compact_history_runs(older_than_days=30, db=db_sync) == 0
+        await db.execute(
+            select(
+                func.pg_advisory_unlock(history_compaction._ADVISORY_LOCK_KEY)
+            )
+        )
+        await db.commit()
+
+        # Only the unreferenced units of the superseded run are deleted
+        assert (
+            compact_history_runs(older_than_days=30, db=db_sync, batch_size=1)
+            == 3
+        )
+        for name in runs:
+            history_unit_ids = db_sync.execute(
+                select(HistoryUnit.id)
+                .where(HistoryUnit.history_run_id == runs[name].id)
+                .order_by(HistoryUnit.id)
+            ).scalars()
+            if name == "superseded":
+                assert list(history_unit_ids) == [units[name][3].id]
+            else:
+                assert list(history_unit_ids) == [
+                    unit.id for unit in units[name]
+                ]
+        db_sync.expire_all()
+        superseded_run = db_sync.get(HistoryRun, runs["superseded"].id)
+        assert superseded_run.num_compacted_done_units == 2
+        assert superseded_run.num_compacted_failed_units == 1
+        assert superseded_run.num_compacted_submitted_units == 0
+        assert superseded_run.num_compacted_units_with_warnings == 1
+
+        # The run list is unchanged
+        res = await client.get(url)
+        assert res.status_code == 200
+        assert sorted(res.json(), key=lambda run: run["id"]) == run_list
+
+        # Compaction is idempotent
+        assert compact_history_runs(older_than_days=30, db=db_sync) == 0
+        res = await client.get(url)
+        assert sorted(res.json(), key=lambda run: run["id"]) == run_list
+
+
+async def test_compact_history_runs_periodically(monkeypatch):
+    calls = []
+
+    def _mock_compact_history_runs(*, older_than_days, db):
+        calls.append(older_than_days)
+        if len(calls) == 1:
+            raise RuntimeError("Error in the first compaction")
+        return 0
+
+    monkeypatch.setattr(
+        history_compaction,
+        "compact_history_runs",
+        _mock_compact_history_runs,
+    )
+    task = asyncio.create_task(
+        compact_history_runs_periodically(older_than_days=7, interval=0.01)
+    )
+    await asyncio.sleep(0.5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert len(calls) > 1
+    assert set(calls) == {7}
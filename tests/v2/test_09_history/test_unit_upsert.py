@@ -13,6 +13,14 @@ from fractal_server.app.schemas.v2 import HistoryUnitStatus
 from fractal_server.runner.v2.db_tools import bulk_upsert_image_cache_fast
 
 
+def bulk_upsert_image_cache_copy(
+    *, db: Session, list_upsert_objects: list[dict[str, Any]]
+) -> None:
+    bulk_upsert_image_cache_fast(
+        db=db, list_upsert_objects=list_upsert_objects, use_copy=True
+    )
+
+
 def bulk_upsert_image_cache_slow(
     *, db: Session, list_upsert_objects: list[dict[str, Any]]
 ) -> None:
@@ -27,6 +35,8 @@ def bulk_upsert_image_cache_slow(
         (bulk_upsert_image_cache_fast, 100),
         (bulk_upsert_image_cache_slow, 100),
         (bulk_upsert_image_cache_fast, 3_500),
+        (bulk_upsert_image_cache_copy, 100),
+        (bulk_upsert_image_cache_copy, 3_500),
     ],
 )
 async def test_upsert_function(